@@ -1,38 +1,74 @@
+import numpy as np
 import pandas as pd
 from config import *
 from helpers import *
 from charge_mapper import ChargeMapper
+from shared.billing_calendar import billing_calendar
+from shared.money import to_paise, to_rupees, prorate, apply_rate
+from shared.validation import RuleSet, merge_rules
 from annexure_builder import build_annexure_row
 
 
-def process_billing(df):
-
-    charge_mapper = ChargeMapper(INPUT_CHARGES_FILE)
+def process_billing(df, ctx=None, engine=None):
+    """
+    Run the billing engine over the employee DataFrame.
+
+    ctx: RunContext with the billing period, rates and charges file
+    (default: config.run_context())
+    engine: "columnar" (whole-column computation) or "rows" (reference
+    row loop), default ctx.billing_engine. Both return identical
+    (annex_df, error_df).
+
+    With ctx.money_mode "paise" the amount columns of annex_df are int64
+    paise (see _paise_amounts); only the columnar engine computes those.
+    The columnar engine checks rows against BUILTIN_VALIDATION_RULES and
+    ctx.validation_rules, and leaves the failing rows per rule in
+    error_df.attrs["rule_counts"].
+    """
+    if ctx is None:
+        ctx = run_context()
+    if engine is None:
+        engine = ctx.billing_engine
+    if engine == "rows":
+        if ctx.money_mode == "paise":
+            raise ValueError('MONEY_MODE "paise" needs BILLING_ENGINE "columnar"')
+        if ctx.validation_rules:
+            raise ValueError('VALIDATION_RULES need BILLING_ENGINE "columnar"')
+        return process_billing_rows(df, ctx)
+    return process_billing_columnar(df, ctx)
+
+
+# ================= REFERENCE ROW ENGINE =================
+def process_billing_rows(df, ctx):
+
+    charge_mapper = ChargeMapper.for_context(ctx)
+    periods = billing_calendar(ctx.billing_month, ctx.billing_year)
 
     annex_rows = []
     error_rows = []
 
     for _, row in df.iterrows():
 
-        start, end = get_billing_dates(row["Billing Cycle"], BILLING_MONTH, BILLING_YEAR)
+        period = periods.period(row["Billing Cycle"])
+        start, end = period.start, period.end
         
         # ================= DIFFERENTIAL BILLING CHECK =================
         employee_type = str(row.get("Employee Type", "")).strip().lower()
         
         if "diffrential" in employee_type:
             # For differential billing, use full billing amount and calculate GST directly
-            total_days = (end - start).days + 1
+            total_days = period.total_days
             payable_billing = row["Billing"]
             final_charge = 0
             total = payable_billing + final_charge + row["Out of Pocket Exp"] + row["Arrears"]
             
             gst = str(row.get("GST", "")).upper()
             if "IGST" in gst:
-                igst = total * IGST_RATE
+                igst = total * ctx.igst_rate
                 cgst = sgst = 0
             else:
-                cgst = total * CGST_RATE
-                sgst = total * SGST_RATE
+                cgst = total * ctx.cgst_rate
+                sgst = total * ctx.sgst_rate
                 igst = 0
             
             grand_total = total + cgst + sgst + igst
@@ -93,7 +129,7 @@ def process_billing(df):
                 dol_adjusted = True
 
         # ================= TOTAL DAYS CALCULATION (FROM BILLING CYCLE ONLY) =================
-        total_days = (end - start).days + 1
+        total_days = period.total_days
 
         # ================= ELIGIBLE DAYS CALCULATION (FROM DOJ, LDW) =================
         # Eligible Days = days employee is eligible for billing based on DOJ/LDW
@@ -149,11 +185,11 @@ def process_billing(df):
         gst = str(row.get("GST", "")).upper()
 
         if "IGST" in gst:
-            igst = total * IGST_RATE
+            igst = total * ctx.igst_rate
             cgst = sgst = 0
         else:
-            cgst = total * CGST_RATE
-            sgst = total * SGST_RATE
+            cgst = total * ctx.cgst_rate
+            sgst = total * ctx.sgst_rate
             igst = 0
 
         grand_total = total + cgst + sgst + igst
@@ -194,3 +230,363 @@ def process_billing(df):
         annex_rows.append(build_annexure_row(row, totals, gst_values))
 
     return pd.DataFrame(annex_rows), pd.DataFrame(error_rows)
+
+
+# ================= COLUMNAR ENGINE =================
+def _round(values, ndigits=2):
+    """
+    Round an array exactly like Python's round().
+    np.round only differs from round() on values that sit on a
+    half-way point after scaling, so those are redone one by one.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, ndigits)
+    scaled = values * 10 ** ndigits
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near_half.any():
+        idx = np.flatnonzero(near_half)
+        rounded[idx] = [round(v, ndigits) for v in values[idx].tolist()]
+    return rounded
+
+
+def _column(df, name, default=None):
+    """Column as an object array, or a constant when it is missing (like row.get)"""
+    if name in df.columns:
+        return df[name].to_numpy(dtype=object)
+    return np.full(len(df), default, dtype=object)
+
+
+def _integer_rows(df, name):
+    """True for every row whose value in column name is an int (False when it is missing)"""
+    if name not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    values = df[name]
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return np.ones(len(df), dtype=bool)
+    if values.dtype != object:
+        return np.zeros(len(df), dtype=bool)
+    return np.array([isinstance(v, (int, np.integer)) for v in values], dtype=bool)
+
+
+def _as_typed(values, integer):
+    """values as an object array holding ints where integer is True (values unchanged when none is)"""
+    if not integer.any():
+        return values
+    typed = np.asarray(values).astype(object)
+    typed[integer] = np.asarray(values)[integer].astype(np.int64)
+    return typed
+
+
+def _text_column(df, name, default=""):
+    """str(row.get(name, default)) for every row"""
+    return pd.Series(_column(df, name, default), index=df.index).map(str)
+
+
+def _date_column(df, name):
+    """Column as datetime64[D] (NaT where missing)"""
+    if name not in df.columns:
+        return np.full(len(df), np.datetime64("NaT"), dtype="datetime64[D]")
+    return pd.to_datetime(df[name], errors="coerce").to_numpy(dtype="datetime64[D]")
+
+
+# System_Error checks of the columnar engine (see shared.validation).
+# VALIDATION_RULES in config.py can switch these off by name, change
+# them, or add more.
+BUILTIN_VALIDATION_RULES = [
+    {
+        "name": "doj_after_cycle",
+        "when": "~is_differential & (doj > cycle_end)",
+        "message": "DOJ after Billing Cycle",
+        "blocking": True,
+    },
+    {
+        "name": "dol_before_cycle",
+        "when": "~is_differential & (dol < cycle_start)",
+        "message": "DOL before Billing Cycle",
+        "blocking": True,
+    },
+    {
+        "name": "payable_over_billing",
+        "when": "~is_differential & (payable_billing > billing)",
+        "message": "Total Payable Billing greater than Billing",
+    },
+    {
+        "name": "payable_days_over_total",
+        "when": "~is_differential & (final_billable_days > total_days)",
+        "message": "Total Payable Days greater than Total Days",
+    },
+    {
+        "name": "eligible_not_payable",
+        "when": "~is_differential & (final_billable_days != eligible_days)",
+        "message": "Eligible Days ({eligible_days}) not matching Payable Days ({final_billable_days})",
+    },
+]
+
+
+def validation_rules(ctx):
+    """The RuleSet of the built-in rules with ctx.validation_rules applied"""
+    return RuleSet(merge_rules(BUILTIN_VALIDATION_RULES, ctx.validation_rules))
+
+
+def process_billing_columnar(df, ctx):
+    """
+    Columnar version of process_billing_rows: every step is computed
+    over whole columns and the output frames are built in one go.
+    """
+    charge_mapper = ChargeMapper.for_context(ctx)
+
+    n = len(df)
+    if n == 0:
+        return pd.DataFrame(), pd.DataFrame()
+
+    start, end, cycle_days = billing_calendar(ctx.billing_month, ctx.billing_year).lookup(df["Billing Cycle"])
+
+    billing = df["Billing"].to_numpy(dtype=float)
+    holidays = df["No of Holidays"].to_numpy(dtype=float)
+    present = df["Total Present"].to_numpy(dtype=float)
+    adjustment = df["Adjustment of Days"].to_numpy(dtype=float)
+    out_of_pocket = df["Out of Pocket Exp"].to_numpy(dtype=float)
+    arrears = df["Arrears"].to_numpy(dtype=float)
+
+    # Rows whose inputs are integers: the row engine keeps those as int,
+    # and so does every sum of them (see integer below)
+    int_billing = _integer_rows(df, "Billing")
+    int_days = _integer_rows(df, "Total Present") & _integer_rows(df, "No of Holidays")
+    int_adjustment = _integer_rows(df, "Adjustment of Days")
+    int_out_of_pocket = _integer_rows(df, "Out of Pocket Exp")
+    int_arrears = _integer_rows(df, "Arrears")
+
+    # ================= DIFFERENTIAL BILLING CHECK =================
+    is_differential = (
+        _text_column(df, "Employee Type").str.strip().str.lower()
+        .str.contains("diffrential", regex=False).to_numpy()
+    )
+
+    # ================= DOJ / DOL VALIDATION =================
+    doj = _date_column(df, "Date of Joining")
+    dol = _date_column(df, "LDW")
+    has_doj = ~np.isnat(doj)
+    has_dol = ~np.isnat(dol)
+
+    # Every row is computed; rows failing a blocking rule (DOJ after / DOL
+    # before the cycle, ...) are left out of annex_df after the checks
+    regular = ~is_differential
+
+    effective_start = np.where(has_doj & (doj > start), doj, start)
+    effective_end = np.where(has_dol & (dol < end), dol, end)
+
+    # ================= DAYS CALCULATION =================
+    total_days = np.where(regular, cycle_days, 0)
+    eligible_days = np.where(regular, (effective_end - effective_start).astype(np.int64) + 1, 0)
+
+    # ================= ATTENDANCE CALC =================
+    sat, sun = count_weekends_array(effective_start, effective_end, _column(df, "Workweek"))
+    sat = np.where(regular, sat, 0)
+    sun = np.where(regular, sun, 0)
+
+    total_billable_days = np.where(regular, present + sat + sun + holidays, 0.0)
+    final_billable_days = np.where(regular, total_billable_days + adjustment, 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payable_billing = np.where(
+            regular,
+            (final_billable_days / np.where(regular, cycle_days, 1)) * billing,
+            billing
+        )
+
+    # ================= CHARGE CALC =================
+    base_charge = np.zeros(n)
+    fixed_mode = np.zeros(n, dtype=bool)
+    int_charge = np.zeros(n, dtype=bool)
+    if regular.any():
+        charges = charge_mapper.get_charge_columns(df[regular])
+        base_charge[regular] = charges["Charge Value"].to_numpy()
+        fixed_mode[regular] = (charges["Application Mode"].str.upper() == "FIXED").to_numpy()
+        int_charge[regular] = charges["Integer Charge"].to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        proportionate = np.where(billing > 0, (payable_billing / billing) * base_charge, 0.0)
+    final_charge = np.where(regular, np.where(fixed_mode, base_charge, proportionate), 0.0)
+
+    # ================= TOTAL =================
+    total = payable_billing + final_charge + out_of_pocket + arrears
+
+    # ================= GST =================
+    is_igst = (
+        _text_column(df, "GST").str.upper()
+        .str.contains("IGST", regex=False).to_numpy()
+    )
+    igst = np.where(is_igst, total * ctx.igst_rate, 0.0)
+    cgst = np.where(is_igst, 0.0, total * ctx.cgst_rate)
+    sgst = np.where(is_igst, 0.0, total * ctx.sgst_rate)
+    grand_total = total + cgst + sgst + igst
+
+    if ctx.money_mode == "paise":
+        amounts = _paise_amounts(
+            billing, out_of_pocket, arrears, base_charge, final_billable_days, cycle_days,
+            regular, fixed_mode, is_igst, ctx
+        )
+        rupees = {col: to_rupees(paise) for col, paise in amounts.items()}
+        check_amounts = (
+            rupees["Billing"], rupees["Total Payable Billing"], rupees["Charges"],
+            rupees["Total"], rupees["CGST @9%"], rupees["SGST @9%"], rupees["IGST @18%"],
+            rupees["Grand Total"],
+        )
+    else:
+        amounts = {
+            "Billing": _round(billing),
+            "Total Payable Billing": _round(payable_billing),
+            "Charges": _round(final_charge),
+            "Out of Pocket Exp": _round(out_of_pocket),
+            "Arrears": _round(arrears),
+            "Total": _round(total),
+            "CGST @9%": _round(cgst),
+            "SGST @9%": _round(sgst),
+            "IGST @18%": _round(igst),
+            "Grand Total": _round(grand_total),
+        }
+        check_amounts = (billing, payable_billing, final_charge, total, cgst, sgst, igst, grand_total)
+
+    # Rows the row engine holds as int (differential rows, the unused GST
+    # side and fixed integer charges are integer zeros or charges)
+    int_charges = is_differential | (fixed_mode & int_charge) | (~fixed_mode & (billing <= 0))
+    int_payable_billing = is_differential & int_billing
+    integer = {
+        "Billing": int_billing,
+        "Total Working Days": is_differential | int_days,
+        "Total Payable Days": is_differential | (int_days & int_adjustment),
+        "Total Payable Billing": int_payable_billing,
+        "Charges": int_charges,
+        "Out of Pocket Exp": int_out_of_pocket,
+        "Arrears": int_arrears,
+        "Total": int_payable_billing & int_charges & int_out_of_pocket & int_arrears,
+        "CGST @9%": is_igst,
+        "SGST @9%": is_igst,
+        "IGST @18%": ~is_igst,
+    }
+
+    # ================= SYSTEM ERROR CHECKS =================
+    checks = {
+        "is_differential": is_differential,
+        "doj": doj,
+        "dol": dol,
+        "cycle_start": start,
+        "cycle_end": end,
+    }
+    checks.update(zip(
+        ["billing", "payable_billing", "charges", "total", "cgst", "sgst", "igst", "grand_total"],
+        check_amounts
+    ))
+    checks.update({
+        "out_of_pocket": out_of_pocket,
+        "arrears": arrears,
+        "total_days": total_days,
+        "eligible_days": eligible_days,
+        "total_billable_days": total_billable_days,
+        "final_billable_days": final_billable_days,
+    })
+    # Messages show integer rows as the row engine does: "(29)", not "(29.0)"
+    display = {
+        name: _as_typed(checks[name], integer[col])
+        for name, col in [
+            ("billing", "Billing"), ("payable_billing", "Total Payable Billing"), ("charges", "Charges"),
+            ("out_of_pocket", "Out of Pocket Exp"), ("arrears", "Arrears"), ("total", "Total"),
+            ("cgst", "CGST @9%"), ("sgst", "SGST @9%"), ("igst", "IGST @18%"),
+            ("total_billable_days", "Total Working Days"), ("final_billable_days", "Total Payable Days"),
+        ]
+    }
+    result = validation_rules(ctx).evaluate(checks, n, display)
+    billed = ~result.blocked
+
+    error_df = _rows_frame(df, result.failed, {"System Error Reason": result.reasons[result.failed]})
+    error_df.attrs["rule_counts"] = result.counts
+
+    # ================= ANNEX BUILD =================
+    annex = {
+        "Kind Attention Person": _column(df, "Kind Attention Person")[billed],
+        "Company Name": _column(df, "Company Name")[billed],
+        "Employee Code": _column(df, "Employee Code")[billed],
+        "Employee Name": _column(df, "Employee Name")[billed],
+        "Billing Cycle": _column(df, "Billing Cycle")[billed],
+        "Billing": amounts["Billing"][billed],
+        "No of days": total_days[billed],
+        "Eligible Days": eligible_days[billed],
+        "No of Saturdays": sat[billed],
+        "No of Sundays": sun[billed],
+        "No of Holidays": _column(df, "No of Holidays")[billed],
+        "Total Present": _column(df, "Total Present")[billed],
+        "Total Working Days": _round(total_billable_days[billed]),
+        "Absents this Month": _column(df, "Absents this Month")[billed],
+        "Adjustment of Days": _column(df, "Adjustment of Days")[billed],
+        "Total Payable Days": _round(final_billable_days[billed]),
+        "Total Payable Billing": amounts["Total Payable Billing"][billed],
+        "Charges": amounts["Charges"][billed],
+        "Out of Pocket Exp": amounts["Out of Pocket Exp"][billed],
+        "Arrears": amounts["Arrears"][billed],
+        "Total": amounts["Total"][billed],
+        "CGST @9%": amounts["CGST @9%"][billed],
+        "SGST @9%": amounts["SGST @9%"][billed],
+        "IGST @18%": amounts["IGST @18%"][billed],
+        "Grand Total": amounts["Grand Total"][billed],
+        "Remark": _column(df, "Remark", "")[billed],
+    }
+
+    if not billed.any():
+        return pd.DataFrame(), error_df
+
+    # A column whose billed rows are all int comes out as int64 from the
+    # row engine; any float row makes it float64
+    for col, mask in integer.items():
+        if mask[billed].all():
+            annex[col] = annex[col].astype(np.int64)
+
+    return pd.DataFrame(annex).infer_objects(), error_df
+
+
+def _paise_amounts(billing, out_of_pocket, arrears, base_charge, final_billable_days, cycle_days,
+                   regular, fixed_mode, is_igst, ctx):
+    """
+    Amount columns in whole paise (int64) for MONEY_MODE "paise".
+
+    Inputs are converted to paise once; proration (days in hundredths),
+    total and GST are then computed in integers, each result rounded to
+    the nearest paisa, half away from zero.
+    """
+    billing = to_paise(billing)
+    days = to_paise(final_billable_days)
+    period = to_paise(cycle_days)
+    base_charge = to_paise(base_charge)
+
+    payable_billing = np.where(regular, prorate(billing, days, period), billing)
+    proportionate = np.where(billing > 0, prorate(base_charge, days, period), 0)
+    final_charge = np.where(regular, np.where(fixed_mode, base_charge, proportionate), 0)
+
+    total = payable_billing + final_charge + to_paise(out_of_pocket) + to_paise(arrears)
+    igst = np.where(is_igst, apply_rate(total, ctx.igst_rate), 0)
+    cgst = np.where(is_igst, 0, apply_rate(total, ctx.cgst_rate))
+    sgst = np.where(is_igst, 0, apply_rate(total, ctx.sgst_rate))
+
+    return {
+        "Billing": billing,
+        "Total Payable Billing": payable_billing,
+        "Charges": final_charge,
+        "Out of Pocket Exp": to_paise(out_of_pocket),
+        "Arrears": to_paise(arrears),
+        "Total": total,
+        "CGST @9%": cgst,
+        "SGST @9%": sgst,
+        "IGST @18%": igst,
+        "Grand Total": total + cgst + sgst + igst,
+    }
+
+
+def _rows_frame(df, mask, extra_columns):
+    """
+    Selected rows of df plus extra columns, typed the same way as a
+    DataFrame built from a list of row copies.
+    """
+    if not mask.any():
+        return pd.DataFrame()
+    data = {col: df[col].to_numpy(dtype=object)[mask] for col in df.columns}
+    data.update(extra_columns)
+    return pd.DataFrame(data, index=df.index[mask]).infer_objects()
@@ -16,8 +16,8 @@ class ChargeMapper(ChargeMapperBase):
     - Default application mode: proportionate
     """
     
-    def __init__(self, file_path):
+    def __init__(self, file_path, use_cache=True):
         # Override defaults for recurring billing
         self.DEFAULT_CHARGE_TYPE = "percent"
         self.DEFAULT_APPLICATION_MODE = "proportionate"
-        super().__init__(file_path)
+        super().__init__(file_path, use_cache=use_cache)
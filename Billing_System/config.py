@@ -9,6 +9,7 @@ BILLING_YEAR = 2026
 
 INPUT_EMPLOYEE_FILE = os.path.join(PROJECT_ROOT, "Data", "Employee.xlsx")
 INPUT_CHARGES_FILE = os.path.join(PROJECT_ROOT, "Data", "Charges.xlsx")
+INPUT_PO_FILE = os.path.join(PROJECT_ROOT, "Data", "PO_Number.xlsx")
 
 TEMPLATE_FOLDER = os.path.join(PROJECT_ROOT, "Templates")
 ASSETS_FOLDER = os.path.join(PROJECT_ROOT, "Assets")
@@ -20,3 +21,71 @@ SUMMARY_FILE = "Billing_Master_Summary.xlsx"
 CGST_RATE = 0.09
 SGST_RATE = 0.09
 IGST_RATE = 0.18
+
+# Billing engine: "columnar" (vectorized) or "rows" (reference row loop)
+BILLING_ENGINE = "columnar"
+
+# Money arithmetic: "float" (amounts rounded to 2 decimals per row) or
+# "paise" (exact int64 paise; bill, annexure totals and master summary agree
+# to the rupee). "paise" needs the columnar engine.
+MONEY_MODE = "float"
+
+# Extra System_Error checks, on top of the engine's built-in rules
+# (billing_engine.BUILTIN_VALIDATION_RULES). Each rule is a dict:
+#   {"name": "...", "when": "<expression>", "message": "...",
+#    "blocking": False, "enabled": True}
+# "when" is True where a row is in error and may use: is_differential, doj,
+# dol, cycle_start, cycle_end, total_days, eligible_days, total_billable_days,
+# final_billable_days, billing, payable_billing, charges, out_of_pocket,
+# arrears, total, cgst, sgst, igst, grand_total; "message" may show them as
+# {grand_total:.2f} placeholders. "blocking": True leaves the failing rows
+# out of the bills (System_Error only), e.g. "grand_total > 100000". A rule
+# named like a built-in updates it, e.g.
+# {"name": "eligible_not_payable", "enabled": False}.
+# Columnar engine only.
+VALIDATION_RULES = []
+
+# Bill sheet filling: "patch" (copy the template file, rewriting only the
+# filled cells in its sheet XML; keeps shapes openpyxl drops) or "openpyxl"
+# (reference: load the template with openpyxl and re-save it)
+TEMPLATE_FILL = "patch"
+
+# Processes used to build bills (1 = serial, 0 = all CPUs)
+BILL_WORKERS = 1
+
+# Sharded run (see service/shards.py): bill only shard SHARD_INDEX of
+# SHARD_COUNT, splitting groups by "company" or "split_key" (hash), and write
+# a partial summary for the merge step instead of the master summary
+SHARD_COUNT = 1
+SHARD_INDEX = 0
+SHARD_BY = "company"
+
+# Annexure-only bills with at least this many rows are streamed to disk
+STREAMING_ANNEXURE_MIN_ROWS = 5000
+
+# Reuse parsed Data/*.xlsx snapshots from Data/.cache when the file is unchanged
+INPUT_CACHE = True
+
+# Rebuild only bills whose inputs changed since the last run (see run_manifest.json)
+INCREMENTAL_BILLS = False
+
+# Skip bills that an interrupted run already finished (see run_checkpoint.jsonl);
+# also main.py --resume
+RESUME = False
+
+# Write stage and per-bill timings of every run to OUTPUT_FOLDER/RUN_REPORT_FILE
+RUN_REPORT = True
+RUN_REPORT_FILE = "run_report.json"
+
+
+# ================= RUN CONTEXT =================
+def run_context(**overrides):
+    """
+    RunContext holding the settings above. Engines and generators take a
+    context explicitly and fall back to this one when none is given.
+
+    Args:
+        overrides: lower-case settings to change, e.g. billing_month=3
+    """
+    from shared.run_context import RunContext
+    return RunContext.from_config(globals(), **overrides)
@@ -1,12 +1,16 @@
 import os
 import pandas as pd
 from config import *
+from shared.checkpoint import atomic_output
 
 
 # ================= ANNEX SPLIT FILES =================
-def write_outputs(annex_df):
+def write_outputs(annex_df, ctx=None):
 
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    if ctx is None:
+        ctx = run_context()
+
+    os.makedirs(ctx.output_dir, exist_ok=True)
 
     annex_df["Split_Key"] = (
         annex_df["Kind Attention Person"].astype(str).str.replace(" ", "_")
@@ -16,7 +20,7 @@ def write_outputs(annex_df):
 
     for key, group in annex_df.groupby("Split_Key"):
 
-        file_path = os.path.join(OUTPUT_DIR, f"{key}.xlsx")
+        file_path = os.path.join(ctx.output_dir, f"{key}.xlsx")
 
         output_data = group.drop(columns=["Split_Key"])
 
@@ -117,9 +121,12 @@ def write_outputs(annex_df):
 
 
 # ================= MASTER SUMMARY =================
-def write_summary(annex_df):
+def write_summary(annex_df, ctx=None):
+
+    if ctx is None:
+        ctx = run_context()
 
-    summary_path = os.path.join(OUTPUT_DIR, SUMMARY_FILE)
+    summary_path = os.path.join(ctx.output_dir, ctx.summary_file)
 
     with pd.ExcelWriter(summary_path, engine="xlsxwriter") as writer:
 
@@ -167,11 +174,15 @@ def write_summary(annex_df):
 
 
 # ================= SYSTEM ERROR FILE =================
-def write_error_file(error_df):
+def write_error_file(error_df, ctx=None):
 
     if error_df is None or error_df.empty:
         return
 
-    error_path = os.path.join(OUTPUT_FOLDER, "System_Error.xlsx")
+    if ctx is None:
+        ctx = run_context()
+
+    error_path = os.path.join(ctx.output_folder, "System_Error.xlsx")
 
-    error_df.to_excel(error_path, index=False)
\ No newline at end of file
+    with atomic_output(error_path) as tmp_path:
+        error_df.to_excel(tmp_path, index=False)
\ No newline at end of file
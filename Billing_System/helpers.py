@@ -4,6 +4,6 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Re-export from shared helpers
-from shared.helpers import get_billing_dates, count_weekends, clean_numeric
+from shared.helpers import get_billing_dates, count_weekends, count_weekends_array, clean_numeric, run_jobs, iter_jobs
 
-__all__ = ['get_billing_dates', 'count_weekends', 'clean_numeric']
+__all__ = ['get_billing_dates', 'count_weekends', 'count_weekends_array', 'clean_numeric', 'run_jobs', 'iter_jobs']
@@ -1,21 +1,49 @@
+import argparse
+import os
 import pandas as pd
 from config import *
 from helpers import clean_numeric
+from shared.input_cache import read_excel_cached
+from shared.instrumentation import RunReport, StageTimer
 from billing_engine import process_billing
 from excel_writer import write_error_file
 from unified_bill_generator import generate_unified_bills, create_placeholder_images
 
+# Employee sheet columns coerced to numbers (blank / "-" -> 0)
+EMPLOYEE_NUMERIC_COLUMNS = [
+    "Billing",
+    "No of Holidays",
+    "Total Present",
+    "Absents this Month",
+    "Adjustment of Days",
+    "Out of Pocket Exp",
+    "Arrears"
+]
 
 
-def main():
-    print("UNIFIED BILLING SYSTEM")
-    
-    # Create placeholder images if they don't exist
-    create_placeholder_images()
-    
-    df = pd.read_excel(INPUT_EMPLOYEE_FILE)
-    df.columns = df.columns.str.strip()
+def load_employee_data(path=None, report=None, ctx=None):
+    """
+    Read the employee sheet and normalize dates and numeric columns
+
+    path defaults to ctx.input_employee_file (ctx: RunContext, default
+    config.run_context())
+    """
+    if ctx is None:
+        ctx = run_context()
+    if path is None:
+        path = ctx.input_employee_file
+    if report is None:
+        report = StageTimer()
 
+    with report.stage("input read"):
+        df = read_excel_cached(path, use_cache=ctx.input_cache)
+
+    with report.stage("clean numeric", rows=len(df)):
+        return clean_employee_data(df)
+
+
+def clean_employee_data(df):
+    """Parse dates and coerce the numeric columns of the employee sheet"""
     if "Date of Joining" in df.columns:
         df["Date of Joining"] = pd.to_datetime(
             df["Date of Joining"],
@@ -30,42 +58,79 @@ def main():
             dayfirst=True
         ).dt.date
 
-    numeric_cols = [
-        "Billing",
-        "No of Holidays",
-        "Total Present",
-        "Absents this Month",
-        "Adjustment of Days",
-        "Out of Pocket Exp",
-        "Arrears"
-    ]
+    return clean_numeric(df, EMPLOYEE_NUMERIC_COLUMNS)
+
+
+def write_run_report(report, ctx):
+    """Save the stage/bill timings of this run when ctx.run_report is on"""
+    if ctx.run_report:
+        path = report.save(os.path.join(ctx.output_folder, ctx.run_report_file))
+        print(f"Run report saved: {path}")
 
-    df = clean_numeric(df, numeric_cols)
+
+def main(employee_df=None, ctx=None, pool=None):
+    """
+    Run one billing period.
+
+    Args:
+        employee_df: employee sheet already passed through load_employee_data
+                     (e.g. shared by a backfill across periods); read from
+                     ctx.input_employee_file when None
+        ctx: RunContext of the run (period, paths, rates); defaults to
+             config.run_context()
+        pool: job pool shared with another run that builds the bills
+              (see generate_unified_bills)
+    """
+    if ctx is None:
+        ctx = run_context()
+
+    print("UNIFIED BILLING SYSTEM")
+    
+    report = RunReport("Billing_System")
+    
+    # Create placeholder images if they don't exist
+    create_placeholder_images(ctx)
+    
+    if employee_df is None:
+        df = load_employee_data(report=report, ctx=ctx)
+    else:
+        df = employee_df.copy()
 
     print("\nProcessing billing data...")
-    annex_df, error_df = process_billing(df)
+    with report.stage("billing engine", rows=len(df)):
+        annex_df, error_df = process_billing(df, ctx)
 
     print(f"Processed {len(annex_df)} employee records")
     
+    rule_counts = error_df.attrs.get("rule_counts", {})
     if not error_df.empty:
         print(f"Found {len(error_df)} error records")
-        write_error_file(error_df)
-        pd.DataFrame(error_df).to_excel(
-            f"{OUTPUT_FOLDER}/System_Error.xlsx",
-            index=False
-        )
+        for name, count in rule_counts.items():
+            if count:
+                print(f"  {name}: {count}")
+        # Every shard of a sharded run finds the same errors; the first reports them
+        if ctx.shard_index == 0:
+            with report.stage("error report", rows=len(error_df), rules=rule_counts):
+                write_error_file(error_df, ctx)
 
     print("\nGenerating unified bills...")
-    generate_unified_bills(annex_df)
+    generate_unified_bills(annex_df, report=report, ctx=ctx, pool=pool)
+    write_run_report(report, ctx)
 
     print("\n" + "=" * 60)
     print("BILLING COMPLETED SUCCESSFULLY!")
     print("=" * 60)
-    print(f"\nOutput Location: {OUTPUT_FOLDER}/")
-    if not error_df.empty:
-        print(f"Error Report: {OUTPUT_FOLDER}/System_Error.xlsx")
+    print(f"\nOutput Location: {ctx.output_folder}/")
+    if not error_df.empty and ctx.shard_index == 0:
+        print(f"Error Report: {ctx.output_folder}/System_Error.xlsx")
     print()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate the recurring bills of the configured month")
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="skip bills an interrupted run already finished (run_checkpoint.jsonl)",
+    )
+    args = parser.parse_args()
+    main(ctx=run_context(resume=True) if args.resume else None)
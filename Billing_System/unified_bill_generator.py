@@ -1,145 +1,141 @@
 # ================= unified_bill_generator.py =================
 
 import os
-import math
 import warnings
+from functools import partial
 from datetime import date, timedelta
+import numpy as np
 import pandas as pd
 from config import *
-from helpers import get_billing_dates
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
-from openpyxl.drawing.image import Image as OpenpyxlImage
-from num2words import num2words
+from helpers import iter_jobs
+from shared.billing_calendar import billing_calendar
+from shared.template_cache import load_template
+from shared.template_patch import load_template_package, fill_cells
+from shared.annexure_stream import write_streaming_annexure
+from shared.run_manifest import RunManifest, group_fingerprint
+from shared.checkpoint import CheckpointJournal, atomic_output, remove_temp_files
+from shared.instrumentation import RunReport, StageTimer
+from shared.asset_cache import annexure_image, annexure_image_paths, annexure_asset_digests
+from shared.amount_words import numbers_to_words_indian
+from shared.money import MONEY_COLUMNS, PAISE_PER_RUPEE, to_paise, to_rupees, divide_round, round_rupees, ceil_rupees, rupee_total
+from shared.styles import StyleRegistry
+from charge_mapper import ChargeMapper
+from shared.po_index import PoIndex
+from shared.sharding import select_shard, remove_partial_summary, write_partial_summary, read_partial_summaries, merge_summaries
 
 # Suppress openpyxl WMF image format warning
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl.reader.drawings")
 
 
-# ================= CONFIG PATHS =================
-# TEMPLATE_FOLDER and ASSETS_FOLDER are imported from config.py
-OUTPUT_FOLDER = OUTPUT_FOLDER  # From config.py
-
 # ================= PO NUMBER MAPPING =================
-def load_po_number_mapping():
+def load_po_index(po_file=None, ctx=None):
     """
-    Load PO Number data from Excel and create a lookup dictionary
-    keyed by (Kind Attention Person, Company Name)
+    PoIndex of the PO Number file, keyed by (Kind Attention Person,
+    Company Name); empty when the file is missing or unreadable.
+    
+    po_file defaults to ctx.input_po_file (ctx: RunContext, default
+    config.run_context())
     """
-    po_file = "Data/PO_Number.xlsx"
-    po_dict = {}
+    if ctx is None:
+        ctx = run_context()
+    if po_file is None:
+        po_file = ctx.input_po_file
     
-    if os.path.exists(po_file):
-        try:
-            po_df = pd.read_excel(po_file)
-            # Clean column names (remove extra spaces)
-            po_df.columns = po_df.columns.str.strip()
-            
-            # Create lookup dictionary
-            for _, row in po_df.iterrows():
-                kap = str(row.get("Kind Attention Person", "")).strip()
-                company = str(row.get("Company", "")).strip()
-                key = (kap.lower(), company.lower())
-                po_dict[key] = {
-                    "PO Number": row.get("PO Number", ""),
-                    "Validity": row.get("Validity", "")
-                }
-            print(f"Loaded {len(po_dict)} PO Number mappings")
-        except Exception as e:
-            print(f"Warning: Could not load PO Number file: {e}")
-    else:
+    if not os.path.exists(po_file):
         print(f"Warning: PO Number file not found: {po_file}")
+        return PoIndex.empty()
     
-    return po_dict
-
-
-def get_po_details(kap, company, po_dict):
-    """
-    Get PO Number and Validity for a given KAP and Company
-    """
-    key = (str(kap).strip().lower(), str(company).strip().lower())
-    if key in po_dict:
-        return po_dict[key]["PO Number"], po_dict[key]["Validity"]
-    return "", ""
-
-
-# ================= NUMBER TO WORDS =================
-def number_to_words_indian(num):
     try:
-        words = num2words(num, lang="en_IN")
-        return words.title() + " Only"
-    except:
-        return f"{num} Only"
+        po_index = PoIndex.load(po_file, use_cache=ctx.input_cache)
+    except Exception as e:
+        print(f"Warning: Could not load PO Number file: {e}")
+        return PoIndex.empty()
+    
+    print(f"Loaded {len(po_index)} PO Number mappings")
+    return po_index
 
 
 # ================= BILL PERIOD TEXT =================
-def get_billing_period_text(df_group):
-    cycle_text = str(df_group.iloc[0]["Billing Cycle"]).lower()
-
-    if "21" in cycle_text and "20" in cycle_text:
-        start, end = get_billing_dates("21-20", BILLING_MONTH, BILLING_YEAR)
-    elif "25" in cycle_text and "24" in cycle_text:
-        start, end = get_billing_dates("25-24", BILLING_MONTH, BILLING_YEAR)
-    elif "26" in cycle_text and "25" in cycle_text:
-        start, end = get_billing_dates("26-25", BILLING_MONTH, BILLING_YEAR)
-    else:
-        start, end = get_billing_dates("", BILLING_MONTH, BILLING_YEAR)
-
-    return f"{start.strftime('%d %b %Y')} to {end.strftime('%d %b %Y')}"
+def get_billing_period_text(df_group, ctx):
+    cycle = df_group.iloc[0]["Billing Cycle"]
+    return billing_calendar(ctx.billing_month, ctx.billing_year).period(cycle).text
 
 
 # ================= TEMPLATE FILLER =================
-def fill_bill_template(ws, totals, gst_values, billing_period_text):
-    cgst, sgst, igst, grand_total = gst_values
-
+def bill_template_cells(totals, billing_period_text, period_label):
+    """
+    Cells and merged ranges of one group's bill sheet.
+    
+    totals: the group's row of group_totals (amounts already rounded)
+    period_label: the template's A17 text; its part up to ":" is kept
+    
+    Returns:
+        tuple: ({cell: value}, [merged ranges])
+    """
     today = date.today()
     due_date = today + timedelta(days=3)
-
+    
     # Dates
-    ws["G12"] = today.strftime("%d-%m-%Y")
-    ws["G13"] = due_date.strftime("%d-%m-%Y")
-
+    cells = {
+        "G12": today.strftime("%d-%m-%Y"),
+        "G13": due_date.strftime("%d-%m-%Y"),
+    }
+    
     # Billing Period (Merged A17:G20)
-    existing_text = ws["A17"].value or ""
-
+    existing_text = period_label or ""
+    
     if ":" in existing_text:
         base_text = existing_text.split(":")[0] + ":"
     else:
         base_text = existing_text
-
-    final_text = f"{base_text} {billing_period_text}"
-
-    ws.merge_cells("A17:G20")
-    ws["A17"] = final_text
-
+    
+    merges = ["A17:G20", "H17:H20"]
+    cells["A17"] = f"{base_text} {billing_period_text}"
+    
     # Contract Staffing Total (rounded to whole number)
-    ws.merge_cells("H17:H20")
-    ws["H17"] = round(totals["contract_total"])
-
-    # GST - use math.ceil for CGST/SGST (matching CEILING formula in annexure)
-    if igst > 0:
-        ws.merge_cells("H21:H22")
-        igst_rounded = round(igst)
-        ws["H21"] = igst_rounded
-        # Grand Total = contract_total + igst
-        gt_value = round(totals["contract_total"]) + igst_rounded
+    cells["H17"] = totals["Contract Total"]
+    
+    # GST - CGST/SGST rounded up (matching CEILING formula in annexure), IGST rounded
+    if totals["Has IGST"]:
+        merges.append("H21:H22")
+        cells["H21"] = totals["IGST"]
     else:
-        cgst_ceiled = math.ceil(cgst)
-        sgst_ceiled = math.ceil(sgst)
-        ws["H21"] = cgst_ceiled
-        ws["H22"] = sgst_ceiled
-        # Grand Total = contract_total + cgst + sgst
-        gt_value = round(totals["contract_total"]) + cgst_ceiled + sgst_ceiled
+        cells["H21"] = totals["CGST"]
+        cells["H22"] = totals["SGST"]
+    
+    # Grand Total = contract_total + applicable GST
+    merges.append("H23:H25")
+    cells["H23"] = totals["Grand Total"]
+    
+    # Amount in Words
+    cells["B24"] = totals["Amount in Words"]
+    
+    return cells, merges
 
-    # Grand Total
-    ws.merge_cells("H23:H25")
-    ws["H23"] = gt_value
 
-    # Amount in Words
-    ws["B24"] = number_to_words_indian(gt_value)
+def fill_bill_template(ws, totals, billing_period_text):
+    """Fill an openpyxl bill sheet (TEMPLATE_FILL = "openpyxl")"""
+    cells, merges = bill_template_cells(totals, billing_period_text, ws["A17"].value)
+    fill_cells(ws, cells, merges)
 
 
 # ================= FORMAT ANNEXURE SHEET =================
+# Non-numeric columns that should NOT get number formatting
+NON_NUMERIC_COLS = {
+    "Kind Attention Person", "Company Name", "Employee Code",
+    "Employee Name", "Billing Cycle", "Remark", "Working At",
+    "Reporting Person", "Date of Joining"
+}
+
+
+def numeric_column_indices(annex_columns):
+    """1-based indexes of annexure columns shown as whole numbers"""
+    return {
+        col_idx for col_idx, col_name in enumerate(annex_columns, 1)
+        if col_name not in NON_NUMERIC_COLS
+    }
+
+
 def format_annexure_sheet(ws, num_data_rows, num_cols, annex_columns=None):
     """
     Apply formatting to annexure sheet:
@@ -148,61 +144,31 @@ def format_annexure_sheet(ws, num_data_rows, num_cols, annex_columns=None):
     - Bold text
     - All borders
     - Whole number display format for numeric columns (hides decimals)
+    
+    Formats come from shared.styles and are registered once per workbook
     """
     
-    # Non-numeric columns that should NOT get number formatting
-    non_numeric_cols = {
-        "Kind Attention Person", "Company Name", "Employee Code",
-        "Employee Name", "Billing Cycle", "Remark", "Working At",
-        "Reporting Person", "Date of Joining"
-    }
-    
-    # Define styles
-    orange_fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")
-    yellow_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-    bold_font = Font(bold=True, size=10)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    center_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    styles = StyleRegistry(ws)
     
     # Determine which columns are numeric (for whole number display)
-    numeric_col_indices = set()
-    if annex_columns:
-        for col_idx, col_name in enumerate(annex_columns, 1):
-            if col_name not in non_numeric_cols:
-                numeric_col_indices.add(col_idx)
+    numeric_col_indices = numeric_column_indices(annex_columns) if annex_columns else set()
     
     # Format header row (row 1) - Orange + Bold + Increased height
     ws.row_dimensions[1].height = 30  # Increased header row height for print fit
-    for col in range(1, num_cols + 1):
-        cell = ws.cell(row=1, column=col)
-        cell.fill = orange_fill
-        cell.font = bold_font
-        cell.border = thin_border
-        cell.alignment = center_alignment
+    styles.apply_rows(ws, 1, 1, ["annexure_header"] * num_cols)
     
     # Format data rows - Borders + whole number format for numeric columns
-    for row in range(2, num_data_rows + 2):
-        for col in range(1, num_cols + 1):
-            cell = ws.cell(row=row, column=col)
-            cell.border = thin_border
-            if col in numeric_col_indices:
-                cell.number_format = '0'
+    styles.apply_rows(ws, 2, num_data_rows + 1, [
+        "annexure_data_number" if col in numeric_col_indices else "annexure_data"
+        for col in range(1, num_cols + 1)
+    ])
     
     # Format total row (last row) - Yellow + Bold + whole number format
     total_row = num_data_rows + 2
-    for col in range(1, num_cols + 1):
-        cell = ws.cell(row=total_row, column=col)
-        cell.fill = yellow_fill
-        cell.font = bold_font
-        cell.border = thin_border
-        cell.alignment = center_alignment
-        if col in numeric_col_indices:
-            cell.number_format = '0'
+    styles.apply_rows(ws, total_row, total_row, [
+        "annexure_total_number" if col in numeric_col_indices else "annexure_total"
+        for col in range(1, num_cols + 1)
+    ])
     
     # Auto-adjust column widths
     for col in range(1, num_cols + 1):
@@ -210,34 +176,19 @@ def format_annexure_sheet(ws, num_data_rows, num_cols, annex_columns=None):
 
 
 # ================= ADD IMAGES TO ANNEXURE =================
-def add_images_to_annexure(ws, last_row, company_name):
+def add_images_to_annexure(ws, last_row, company_name, ctx=None):
     """
     Add signature and stamp images side by side at bottom of annexure sheet
     - Sign image is selected based on Company Name: sign.png for all except ABNJ (uses sign2.png)
     - Stamp image is selected based on Company Name: Jobuss, Aradhya, or ABNJ
     - Images placed next to each other with increased size
+    - Images are read from ctx.assets_folder (default config.run_context())
     """
     
-    # Determine which sign image to use based on Company Name
-    company_lower = str(company_name).lower() if company_name else ""
+    if ctx is None:
+        ctx = run_context()
     
-    if "abnj" in company_lower:
-        sign_path = os.path.join(ASSETS_FOLDER, "sign2.png")
-    else:
-        sign_path = os.path.join(ASSETS_FOLDER, "sign.png")
-    
-    # Determine which stamp image to use based on Company Name
-    if "jobuss" in company_lower:
-        stamp_filename = "jobuss.png"
-    elif "aradhya" in company_lower:
-        stamp_filename = "aradhya.png"
-    elif "abnj" in company_lower:
-        stamp_filename = "abnj.png"
-    else:
-        # Default to jobuss if no match
-        stamp_filename = "jobuss.png"
-    
-    stamp_path = os.path.join(ASSETS_FOLDER, stamp_filename)
+    sign_path, stamp_path = annexure_image_paths(company_name, ctx.assets_folder)
     
     # Position images 2 rows below the total row
     image_row = last_row + 3
@@ -251,20 +202,17 @@ def add_images_to_annexure(ws, last_row, company_name):
     stamp_height = 125
     
     try:
-        if os.path.exists(sign_path):
-            sign_img = OpenpyxlImage(sign_path)
-            sign_img.width = sign_width
-            sign_img.height = sign_height
+        # Scaled once per process, see shared.asset_cache
+        sign_img = annexure_image(sign_path, sign_width, sign_height)
+        if sign_img is not None:
             # Place signature at column E (5th column)
             ws.add_image(sign_img, f"E{image_row}")
     except Exception as e:
         print(f"Warning: Could not add signature image: {e}")
     
     try:
-        if os.path.exists(stamp_path):
-            stamp_img = OpenpyxlImage(stamp_path)
-            stamp_img.width = stamp_width
-            stamp_img.height = stamp_height
+        stamp_img = annexure_image(stamp_path, stamp_width, stamp_height)
+        if stamp_img is not None:
             # Place stamp next to signature at column H (8th column)
             ws.add_image(stamp_img, f"H{image_row}")
         else:
@@ -274,9 +222,12 @@ def add_images_to_annexure(ws, last_row, company_name):
 
 
 # ================= ADD TOTALS TO ANNEXURE =================
-def add_totals_to_annexure(ws, group_df, start_row, annex_columns):
+def annexure_total_formulas(group_df, start_row, annex_columns):
     """
-    Add total row with formulas for numeric columns, rounded to 0 digits
+    Total row formulas for numeric columns, rounded to 0 digits
+    
+    Returns:
+        tuple: (total_row, {col_idx: formula})
     """
     # Columns that should have totals (numeric columns)
     numeric_columns = [
@@ -289,8 +240,7 @@ def add_totals_to_annexure(ws, group_df, start_row, annex_columns):
     num_rows = len(group_df)
     total_row = start_row + num_rows
     
-    # Write "TOTAL" in first column
-    ws.cell(row=total_row, column=1, value="TOTAL")
+    formulas = {}
     
     # Add formulas for numeric columns, rounded to 0 digits
     # Store column positions for Grand Total calculation
@@ -299,9 +249,9 @@ def add_totals_to_annexure(ws, group_df, start_row, annex_columns):
     sgst_col = None
     igst_col = None
     
-    # First pass: identify column positions for all relevant columns
-    # Also check if IGST has actual data (non-zero values)
-    has_igst_data = False
+    # First pass: identify column positions for all relevant columns.
+    # build_bill keeps the IGST column only for groups billed with IGST
+    has_igst_data = "IGST @18%" in annex_columns
     for col_idx, col_name in enumerate(annex_columns, 1):
         if col_name in numeric_columns:
             if col_name == "Total":
@@ -312,10 +262,6 @@ def add_totals_to_annexure(ws, group_df, start_row, annex_columns):
                 sgst_col = col_idx
             elif col_name == "IGST @18%":
                 igst_col = col_idx
-                # Check if IGST column has any non-zero values in the data
-                if col_name in group_df.columns:
-                    if group_df[col_name].sum() > 0:
-                        has_igst_data = True
     
     # Second pass: create formulas for all numeric columns
     for col_idx, col_name in enumerate(annex_columns, 1):
@@ -355,115 +301,271 @@ def add_totals_to_annexure(ws, group_df, start_row, annex_columns):
             else:
                 formula = f"=ROUND(SUM({col_letter}{start_row}:{col_letter}{total_row - 1}), 0)"
         
+        formulas[col_idx] = formula
+    
+    return total_row, formulas
+
+
+def annexure_paise_totals(totals, annex_columns):
+    """
+    Total row values of the amount columns for MONEY_MODE "paise", taken
+    from the group's exact totals (group_totals) instead of spreadsheet
+    formulas
+    
+    Returns:
+        dict: {col_idx: whole rupees}
+    """
+    values = {
+        "Total": totals["Contract Total"],
+        "CGST @9%": totals["CGST"],
+        "SGST @9%": totals["SGST"],
+        "IGST @18%": totals["IGST"],
+        "Grand Total": totals["Grand Total"],
+    }
+    
+    result = {}
+    for col_idx, col_name in enumerate(annex_columns, 1):
+        if col_name in values:
+            result[col_idx] = values[col_name]
+        elif col_name in ANNEXURE_SUMMARY_COLUMNS:
+            # Exact 2-decimal sum -> whole rupees, half away from zero
+            result[col_idx] = round_rupees(to_paise(totals[ANNEXURE_SUMMARY_COLUMNS[col_name]]))
+    return result
+
+
+def annexure_totals(group_df, start_row, annex_columns, totals=None):
+    """
+    Total row of an annexure: formulas, with the amount columns replaced
+    by exact values when the group's paise totals are given
+    
+    Returns:
+        tuple: (total_row, {col_idx: formula or value})
+    """
+    total_row, formulas = annexure_total_formulas(group_df, start_row, annex_columns)
+    if totals is not None:
+        formulas.update(annexure_paise_totals(totals, annex_columns))
+    return total_row, formulas
+
+
+def add_totals_to_annexure(ws, group_df, start_row, annex_columns, totals=None):
+    """
+    Add total row with formulas for numeric columns, rounded to 0 digits
+    (exact values for the amount columns when paise totals are given)
+    """
+    total_row, formulas = annexure_totals(group_df, start_row, annex_columns, totals)
+    
+    # Write "TOTAL" in first column
+    ws.cell(row=total_row, column=1, value="TOTAL")
+    
+    for col_idx, formula in formulas.items():
         ws.cell(row=total_row, column=col_idx, value=formula)
     
     return total_row
 
 
-# ================= MAIN GENERATOR =================
-def generate_unified_bills(annex_df):
+# ================= GROUP TOTALS =================
+# Master summary amount columns and the annexure column each one sums
+ANNEXURE_SUMMARY_COLUMNS = {
+    "Billing": "Total Billing",
+    "Total Payable Billing": "Total Payable Billing",
+    "Charges": "Total Charges",
+    "Out of Pocket Exp": "Total Out of Pocket",
+    "Arrears": "Total Arrears",
+    "Total": "Total Amount",
+}
+
+# Master summary columns, in sheet order
+SUMMARY_HEADERS = [
+    "Kind Attention Person",
+    "Company Name",
+    "PO Number",
+    "Validity",
+    "No of Employees",
+    "Total Billing",
+    "Total Payable Billing",
+    "Total Charges",
+    "Total Out of Pocket",
+    "Total Arrears",
+    "Total Amount",
+    "CGST",
+    "SGST",
+    "IGST",
+    "Grand Total",
+]
+
+
+def group_totals(annex_df, po_index, ctx):
     """
-    Generate unified bills with:
-    - Bill sheet (if template exists) + Annexure sheet
-    - OR just Annexure sheet (if no template)
-    - Master Summary of all annexures
+    Bill, annexure total and master summary amounts of every Split_Key
+    group, from one groupby over annex_df with the bill's rounding rules
+    applied to the group sums:
+    - amount columns summed to 2 decimals (exact in paise money mode)
+    - Total and IGST rounded, CGST/SGST rounded up (CEILING), IGST used
+      when the group has any, Grand Total = rounded Total + GST
+    
+    Returns:
+        DataFrame indexed by Split_Key with the SUMMARY_HEADERS columns
+        (PO Number and Validity joined from po_index, "" without a PO),
+        "Contract Total" (the bill's whole-rupee Total), "Has IGST",
+        "Amount in Words" (of Grand Total) and "PO Expired" (PO validity
+        ends before the billing period)
+    """
+    paise = ctx.money_mode == "paise"
+    grouped = annex_df.groupby("Split_Key", sort=True)
+    
+    gst_columns = [col for col in ("CGST @9%", "SGST @9%", "IGST @18%") if col in annex_df.columns]
+    sums = grouped[list(ANNEXURE_SUMMARY_COLUMNS) + gst_columns].sum()
+    
+    # Identity of each bill from its first row, in the sorted key order of sums
+    first_rows = grouped.head(1).set_index("Split_Key")
+    totals = first_rows.loc[sums.index, ["Kind Attention Person", "Company Name"]]
+    totals["No of Employees"] = grouped.size()
+    for col in ("CGST @9%", "SGST @9%", "IGST @18%"):
+        if col not in sums.columns:
+            sums[col] = 0
+    
+    if paise:
+        sums = sums.astype(np.int64)
+        for col, header in ANNEXURE_SUMMARY_COLUMNS.items():
+            totals[header] = sums[col] / PAISE_PER_RUPEE
+        has_igst = sums["IGST @18%"].to_numpy() > 0
+        contract_total = divide_round(sums["Total"].to_numpy(), PAISE_PER_RUPEE)
+        igst = divide_round(sums["IGST @18%"].to_numpy(), PAISE_PER_RUPEE)
+        cgst = ceil_rupees(sums["CGST @9%"].to_numpy())
+        sgst = ceil_rupees(sums["SGST @9%"].to_numpy())
+    else:
+        rounded = np.round(sums, 2)
+        for col, header in ANNEXURE_SUMMARY_COLUMNS.items():
+            totals[header] = rounded[col]
+        has_igst = sums["IGST @18%"].to_numpy() > 0
+        contract_total = np.round(rounded["Total"].to_numpy()).astype(np.int64)
+        igst = np.round(rounded["IGST @18%"].to_numpy()).astype(np.int64)
+        cgst = np.ceil(rounded["CGST @9%"].to_numpy()).astype(np.int64)
+        sgst = np.ceil(rounded["SGST @9%"].to_numpy()).astype(np.int64)
+    
+    totals["CGST"] = np.where(has_igst, 0, cgst)
+    totals["SGST"] = np.where(has_igst, 0, sgst)
+    totals["IGST"] = np.where(has_igst, igst, 0)
+    totals["Contract Total"] = contract_total
+    totals["Grand Total"] = contract_total + totals["CGST"] + totals["SGST"] + totals["IGST"]
+    totals["Has IGST"] = has_igst
+    totals["Amount in Words"] = numbers_to_words_indian(totals["Grand Total"].tolist())
+    
+    # PO details of every group in one join; expiry against the group's billing period end
+    if po_index is None:
+        po_index = PoIndex.empty()
+    period_ends = None
+    if "Billing Cycle" in first_rows.columns:
+        calendar = billing_calendar(ctx.billing_month, ctx.billing_year)
+        _, period_ends, _ = calendar.lookup(first_rows.loc[sums.index, "Billing Cycle"])
+    po_details = po_index.join(totals["Kind Attention Person"], totals["Company Name"], period_ends)
+    for col in ("PO Number", "Validity", "PO Expired"):
+        totals[col] = po_details[col].to_numpy()
+    
+    return totals[SUMMARY_HEADERS + ["Contract Total", "Has IGST", "Amount in Words", "PO Expired"]]
+
+
+# ================= SINGLE BILL =================
+def bill_output_path(key, ctx):
+    return os.path.join(ctx.output_folder, f"{key}.xlsx")
+
+
+def build_bill(key, group, template_path=None, timer=None, ctx=None, totals=None):
     """
+    Build and save the workbook for one Split_Key group:
+    - Bill sheet from template_path (if given) + Annexure sheet
+    - OR just Annexure sheet
     
-    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    timer: StageTimer that receives the load/fill/write/format/images/save steps
+    ctx: RunContext of the run (default config.run_context())
+    totals: the group's row of group_totals (computed here when not given)
     
-    # Load PO Number mapping
-    po_dict = load_po_number_mapping()
+    Returns:
+        bool: has_template
+    """
     
-    annex_df["Split_Key"] = (
-        annex_df["Kind Attention Person"].astype(str).str.replace(" ", "_")
-        + "_"
-        + annex_df["Company Name"].astype(str).str.replace(" ", "_")
-    )
+    if timer is None:
+        timer = StageTimer()
+    if ctx is None:
+        ctx = run_context()
+    if totals is None:
+        totals = group_totals(group, None, ctx).loc[key].to_dict()
     
-    # Get available templates
-    template_files = {
-        os.path.splitext(f)[0]: os.path.join(TEMPLATE_FOLDER, f)
-        for f in os.listdir(TEMPLATE_FOLDER)
-        if f.endswith(".xlsx")
-    }
+    output_path = bill_output_path(key, ctx)
+    paise_totals = totals if ctx.money_mode == "paise" else None
     
-    # Store summary data for all annexures
-    all_summaries = []
+    # Remove Split_Key column from output
+    group_clean = group.drop(columns=["Split_Key"])
     
-    for key, group in annex_df.groupby("Split_Key"):
-        
-        output_path = os.path.join(OUTPUT_FOLDER, f"{key}.xlsx")
-        
-        # Remove Split_Key column from output
-        group_clean = group.drop(columns=["Split_Key"])
-        
-        # Remove IGST column if it's not used (all zeros/empty) for this bill
-        # This ensures IGST doesn't appear in annexure when CGST/SGST are used
-        # Also remove CGST/SGST if IGST is used
-        has_igst_data = False
-        has_cgst_data = False
-        has_sgst_data = False
-        
-        if "IGST @18%" in group_clean.columns:
-            if group_clean["IGST @18%"].sum() > 0:
-                has_igst_data = True
-                # Remove CGST/SGST if IGST has data
-                group_clean = group_clean.drop(columns=["CGST @9%", "SGST @9%"], errors='ignore')
-        
-        if "CGST @9%" in group_clean.columns:
-            if group_clean["CGST @9%"].sum() > 0:
-                has_cgst_data = True
-        
-        if "SGST @9%" in group_clean.columns:
-            if group_clean["SGST @9%"].sum() > 0:
-                has_sgst_data = True
-        
-        # If no IGST data, ensure CGST/SGST are used and remove IGST column
-        if not has_igst_data and "IGST @18%" in group_clean.columns:
-            group_clean = group_clean.drop(columns=["IGST @18%"])
-        
-        # Check if template exists
-        has_template = key in template_files
-        
-        if has_template:
-            # Load template and add annexure
-            template_path = template_files[key]
+    # Keep only the GST columns the bill uses: IGST, or CGST/SGST
+    if totals["Has IGST"]:
+        group_clean = group_clean.drop(columns=["CGST @9%", "SGST @9%"], errors='ignore')
+    else:
+        group_clean = group_clean.drop(columns=["IGST @18%"], errors='ignore')
+    
+    # Check if template exists
+    has_template = template_path is not None
+    template = None
+    
+    if has_template:
+        # Load template and add annexure
+        try:
+            billing_period = get_billing_period_text(group, ctx)
             
-            try:
-                # Calculate totals for bill from annexure data (2-decimal precision)
-                # These values match what the annexure total row will show
-                contract_total = group["Total"].sum()
-                cgst = group["CGST @9%"].sum()
-                sgst = group["SGST @9%"].sum()
-                igst = group["IGST @18%"].sum()
-                grand_total = group["Grand Total"].sum()
-                
-                totals = {
-                    "contract_total": contract_total,
-                    "cgst": cgst,
-                    "sgst": sgst,
-                    "igst": igst,
-                    "grand_total": grand_total
-                }
-                
-                gst_values = (cgst, sgst, igst, grand_total)
-                billing_period = get_billing_period_text(group)
-                
+            if ctx.template_fill == "openpyxl":
                 # Load template
-                wb = load_workbook(template_path)
+                with timer.stage("load"):
+                    wb = load_template(template_path)
                 bill_sheet = wb.active
                 
                 # Fill bill template
-                fill_bill_template(bill_sheet, totals, gst_values, billing_period)
+                with timer.stage("fill"):
+                    fill_bill_template(bill_sheet, totals, billing_period)
                 
                 # Add annexure sheet
                 annex_sheet = wb.create_sheet("Annexure")
-                
-            except Exception as e:
-                print(f"Error loading template for {key}: {e}")
-                print(f"Creating annexure-only file instead")
-                has_template = False
-        
+            else:
+                # Patch the template's XML at save time; annexure built on its own
+                with timer.stage("load"):
+                    template = load_template_package(template_path)
+                with timer.stage("fill"):
+                    template_cells = bill_template_cells(totals, billing_period, template.cell_value("A17"))
+                from openpyxl import Workbook
+                wb = Workbook()
+                annex_sheet = wb.active
+                annex_sheet.title = "Annexure"
+            
+        except Exception as e:
+            print(f"Error loading template for {key}: {e}")
+            print(f"Creating annexure-only file instead")
+            has_template = False
+    
+    # Write annexure data
+    # Exclude "Billing Cycle" from annexure output (keep for bill template only)
+    # Also exclude Date of Leaving (not needed in output)
+    columns_to_exclude = ["Billing Cycle", "Split_Key", "Company Name"]
+    annex_columns = [col for col in group_clean.columns if col not in columns_to_exclude]
+    
+    # Get company name from the first row of the group
+    company_name = group_clean.iloc[0].get("Company Name", "") if len(group_clean) > 0 else ""
+    
+    # Amounts are written in rupees; paise columns are converted for display only
+    annex_data = group_clean
+    if paise_totals is not None:
+        annex_data = group_clean.copy()
+        for col in MONEY_COLUMNS:
+            if col in annex_data.columns:
+                annex_data[col] = to_rupees(annex_data[col].to_numpy())
+    
+    if not has_template and len(group_clean) >= ctx.streaming_annexure_min_rows:
+        # Large annexure-only bill: stream rows straight to disk
+        _, total_formulas = annexure_totals(group_clean, 2, annex_columns, paise_totals)
+        with timer.stage("write", streamed=True):
+            write_streaming_annexure(
+                output_path, annex_data, annex_columns, total_formulas,
+                numeric_column_indices(annex_columns), partial(add_images_to_annexure, ctx=ctx), company_name
+            )
+    else:
         if not has_template:
             # Create new workbook with only annexure
             from openpyxl import Workbook
@@ -471,199 +573,385 @@ def generate_unified_bills(annex_df):
             annex_sheet = wb.active
             annex_sheet.title = "Annexure"
         
-        # Write annexure data
-        # Exclude "Billing Cycle" from annexure output (keep for bill template only)
-        # Also exclude Date of Leaving (not needed in output)
-        columns_to_exclude = ["Billing Cycle", "Split_Key", "Company Name"]
-        annex_columns = [col for col in group_clean.columns if col not in columns_to_exclude]
-        
-        # Write headers
-        for col_idx, header in enumerate(annex_columns, 1):
-            annex_sheet.cell(row=1, column=col_idx, value=header)
-        
-        # Write data rows
-        for row_idx, (_, row) in enumerate(group_clean.iterrows(), 2):
-            for col_idx, col_name in enumerate(annex_columns, 1):
-                annex_sheet.cell(row=row_idx, column=col_idx, value=row[col_name])
-        
-        # Add totals row
-        num_data_rows = len(group_clean)
-        total_row = add_totals_to_annexure(annex_sheet, group_clean, 2, annex_columns)
+        with timer.stage("write"):
+            # Write headers
+            for col_idx, header in enumerate(annex_columns, 1):
+                annex_sheet.cell(row=1, column=col_idx, value=header)
+            
+            # Write data rows
+            for row_idx, (_, row) in enumerate(annex_data.iterrows(), 2):
+                for col_idx, col_name in enumerate(annex_columns, 1):
+                    annex_sheet.cell(row=row_idx, column=col_idx, value=row[col_name])
+            
+            # Add totals row
+            num_data_rows = len(group_clean)
+            total_row = add_totals_to_annexure(annex_sheet, group_clean, 2, annex_columns, paise_totals)
         
         # Format annexure sheet
         num_cols = len(annex_columns)
-        format_annexure_sheet(annex_sheet, num_data_rows, num_cols, annex_columns)
-        
-        # Get company name from the first row of the group
-        company_name = group_clean.iloc[0].get("Company Name", "") if len(group_clean) > 0 else ""
+        with timer.stage("format"):
+            format_annexure_sheet(annex_sheet, num_data_rows, num_cols, annex_columns)
         
         # Add images
-        add_images_to_annexure(annex_sheet, total_row, company_name)
+        with timer.stage("images"):
+            add_images_to_annexure(annex_sheet, total_row, company_name, ctx)
         
         # Save workbook
-        wb.save(output_path)
-        
-        # Collect summary data - match annexure total row calculations
-        # Use CEILING for CGST/SGST (matching annexure formula), ROUND for others
-        # Grand Total = Total Amount + applicable GST
-        
-        total_amount = round(group["Total"].sum(), 2)
-        
-        # Calculate GST with CEILING for CGST/SGST (matching annexure total row)
-        igst_sum = round(group["IGST @18%"].sum(), 2) if "IGST @18%" in group.columns else 0
-        cgst_sum = round(group["CGST @9%"].sum(), 2) if "CGST @9%" in group.columns else 0
-        sgst_sum = round(group["SGST @9%"].sum(), 2) if "SGST @9%" in group.columns else 0
-        
-        # Apply CEILING to CGST/SGST (matching annexure total row formula)
-        if igst_sum > 0:
-            igst_final = round(igst_sum)
-            cgst_final = 0
-            sgst_final = 0
-            grand_total = round(total_amount) + igst_final
-        else:
-            igst_final = 0
-            cgst_final = math.ceil(cgst_sum)
-            sgst_final = math.ceil(sgst_sum)
-            grand_total = round(total_amount) + cgst_final + sgst_final
-        
-        summary_data = {
-            "Kind Attention Person": group_clean.iloc[0]["Kind Attention Person"] if len(group_clean) > 0 else "",
-            "Company Name": company_name,
-            "No of Employees": len(group_clean),
-            "Total Billing": round(group_clean["Billing"].sum(), 2),
-            "Total Payable Billing": round(group_clean["Total Payable Billing"].sum(), 2),
-            "Total Charges": round(group_clean["Charges"].sum(), 2),
-            "Total Out of Pocket": round(group_clean["Out of Pocket Exp"].sum(), 2),
-            "Total Arrears": round(group_clean["Arrears"].sum(), 2),
-            "Total Amount": total_amount,
-            "CGST": cgst_final,
-            "SGST": sgst_final,
-            "IGST": igst_final,
-            "Grand Total": grand_total
+        with timer.stage("save"), atomic_output(output_path) as tmp_path:
+            if has_template and template is not None:
+                template.fill(tmp_path, *template_cells, annexure_wb=wb)
+            else:
+                wb.save(tmp_path)
+    
+    return has_template
+
+
+def build_bill_job(job):
+    """
+    Process pool entry point for one (key, group, template_path, ctx, totals) job.
+    
+    Returns:
+        tuple: (key, has_template, error, steps)
+    """
+    key, group, template_path, ctx, totals = job
+    timer = StageTimer()
+    has_template = build_bill(key, group, template_path, timer, ctx, totals)
+    return key, has_template, None, timer.stages
+
+
+def bill_job_failed(job, error):
+    """Result recorded for a bill that raised or whose worker died"""
+    return job[0], False, error, []
+
+
+# ================= MAIN GENERATOR =================
+def charge_rows_for(charges_df, group):
+    """Rows of the charges file that apply to the group's Kind Attention Person(s)"""
+    kaps = group["Kind Attention Person"].astype(str).str.lower().str.strip().unique()
+    return charges_df[charges_df["Kind Attention Person"].isin(kaps)]
+
+
+def bill_settings(ctx):
+    """Run settings that change a bill's contents"""
+    return {
+        "billing_month": ctx.billing_month,
+        "billing_year": ctx.billing_year,
+        "cgst_rate": ctx.cgst_rate,
+        "sgst_rate": ctx.sgst_rate,
+        "igst_rate": ctx.igst_rate,
+        "streaming_annexure_min_rows": ctx.streaming_annexure_min_rows,
+        "money_mode": ctx.money_mode,
+        "template_fill": ctx.template_fill,
+    }
+
+
+def group_settings(group, settings, ctx):
+    """
+    settings (bill_settings) plus the hashes of the sign and stamp images
+    the group's annexure embeds, so replacing one rebuilds its bills
+    """
+    company_name = group.iloc[0].get("Company Name", "") if len(group) > 0 else ""
+    return dict(settings, assets=annexure_asset_digests(company_name, ctx.assets_folder))
+
+
+def generate_unified_bills(annex_df, workers=None, incremental=None, report=None, ctx=None, pool=None,
+                           resume=None):
+    """
+    Generate unified bills with:
+    - Bill sheet (if template exists) + Annexure sheet
+    - OR just Annexure sheet (if no template)
+    - Master Summary of all annexures
+    
+    ctx: RunContext of the run (default config.run_context())
+    
+    workers: processes used to build bills (1 = serial, 0 = all CPUs),
+    default ctx.bill_workers. Summaries keep Split_Key order regardless
+    of completion order.
+    
+    incremental: rebuild only bills whose fingerprint (annexure rows,
+    charge rows, template, rates and billing month) differs from the
+    run manifest; unchanged bills keep their file. The master summary
+    lists every bill from group_totals, so the manifest and checkpoint
+    journal record no summary rows for Billing_System.
+    Default ctx.incremental_bills.
+    
+    resume: skip groups that the checkpoint journal of an interrupted run
+    (run_checkpoint.jsonl) records as finished with the same fingerprint
+    and output file. Default ctx.resume.
+    
+    report: RunReport that receives the bill stages and per-group step timings
+    
+    pool: job pool shared with another run (see shared.helpers.iter_jobs);
+    bills are queued on it instead of a pool of their own
+    
+    With ctx.shard_count > 1 only the groups of shard ctx.shard_index are
+    billed, and their summary rows go to partial_summary.json for the merge
+    step (generate_merged_summary) instead of the master summary.
+    
+    Returns:
+        list: (key, error) for every bill that failed
+    """
+    
+    if ctx is None:
+        ctx = run_context()
+    if workers is None:
+        workers = ctx.bill_workers
+    if incremental is None:
+        incremental = ctx.incremental_bills
+    if resume is None:
+        resume = ctx.resume
+    if report is None:
+        report = RunReport("Billing_System")
+    
+    os.makedirs(ctx.output_folder, exist_ok=True)
+    if resume:
+        remove_temp_files(ctx.output_folder)
+    
+    # Load PO Number mapping
+    with report.stage("po mapping"):
+        po_index = load_po_index(ctx=ctx)
+    
+    annex_df["Split_Key"] = (
+        annex_df["Kind Attention Person"].astype(str).str.replace(" ", "_")
+        + "_"
+        + annex_df["Company Name"].astype(str).str.replace(" ", "_")
+    )
+    
+    # Sharded run: keep only this shard's groups
+    if ctx.shard_count > 1:
+        remove_partial_summary(ctx.output_folder)
+        annex_df = select_shard(annex_df, ctx)
+        print(f"Shard {ctx.shard_index} of {ctx.shard_count} (by {ctx.shard_by}): {annex_df['Split_Key'].nunique()} bill(s)")
+    
+    # Get available templates
+    template_files = {
+        os.path.splitext(f)[0]: os.path.join(ctx.template_folder, f)
+        for f in os.listdir(ctx.template_folder)
+        if f.endswith(".xlsx")
+    }
+    
+    groups = list(annex_df.groupby("Split_Key"))
+    
+    # Bill, annexure and master summary amounts of every group, computed once
+    with report.stage("group totals", groups=len(groups)):
+        totals_df = group_totals(annex_df, po_index, ctx)
+        group_rows = totals_df.to_dict("index")
+    
+    expired = totals_df.index[totals_df["PO Expired"]]
+    if len(expired):
+        print(f"Warning: PO validity ends before the billing period for {len(expired)} bill(s): {', '.join(expired)}")
+    
+    # Fingerprint every group against the manifest of the previous run
+    with report.stage("fingerprint", groups=len(groups)):
+        manifest = RunManifest(ctx.output_folder)
+        manifest.retain(key for key, _ in groups)
+        charges_df = ChargeMapper.for_context(ctx).df
+        settings = bill_settings(ctx)
+        fingerprints = {
+            key: group_fingerprint(
+                group, charge_rows_for(charges_df, group), template_files.get(key), group_settings(group, settings, ctx)
+            )
+            for key, group in groups
         }
-        
-        all_summaries.append(summary_data)
-        
-        status = "with Bill" if has_template else "Annexure only"
-        print(f"Generated {key} ({status})")
+        journal = CheckpointJournal(ctx.output_folder, resume)
+    
+    # Groups an interrupted run already finished keep their bill
+    resumed = [
+        key for key, _ in groups
+        if resume and journal.completed(key, fingerprints[key], bill_output_path(key, ctx))
+    ]
+    for key in resumed:
+        manifest.record(key, fingerprints[key], *journal.summary(key))
+    if resume:
+        print(f"Resuming: {len(resumed)} of {len(groups)} bill(s) already finished")
+    
+    jobs = [
+        (key, group, template_files.get(key), ctx, group_rows[key])
+        for key, group in groups
+        if key not in resumed
+        and not (
+            incremental
+            and manifest.unchanged(key, fingerprints[key], bill_output_path(key, ctx))
+        )
+    ]
+    if incremental:
+        print(f"Rebuilding {len(jobs)} of {len(groups)} bill(s); the rest are unchanged")
     
-    # Generate Master Summary
-    generate_master_summary(all_summaries, po_dict)
+    failures = []
     
-    print(f"\nAll Unified Bills Generated in '{OUTPUT_FOLDER}' folder")
+    with report.stage("bills", bills=len(jobs), workers=workers):
+        # Results arrive as each bill is saved, so the journal keeps up with the files
+        for _, (key, has_template, error, steps) in iter_jobs(
+            build_bill_job, jobs, workers, on_error=bill_job_failed, pool=pool
+        ):
+            report.add_group(key, group_rows[key]["No of Employees"], has_template, steps, error)
+            
+            if error:
+                print(f"Failed {key}: {error}")
+                failures.append((key, error))
+                # Rebuild on the next run whatever happened to the old file
+                manifest.groups.pop(key, None)
+                continue
+            
+            manifest.record(key, fingerprints[key], None, has_template)
+            journal.record(key, fingerprints[key], bill_output_path(key, ctx), None, has_template)
+            
+            status = "with Bill" if has_template else "Annexure only"
+            print(f"Generated {key} ({status})")
+    
+    manifest.save()
+    if not failures:
+        journal.clear()
+    
+    # Every bill that exists, fresh or unchanged, in Split_Key order
+    summary_df = totals_df[totals_df.index.isin(list(manifest.groups))]
+    
+    if ctx.shard_count > 1:
+        # The merge step writes the master summary from every shard's rows
+        with report.stage("partial summary", rows=len(summary_df)):
+            write_partial_summary("Billing_System", summary_df[SUMMARY_HEADERS].to_dict("index"), failures, ctx)
+    else:
+        # Generate Master Summary
+        with report.stage("master summary", rows=len(summary_df)):
+            generate_master_summary(summary_df, ctx)
+    
+    print(f"\nAll Unified Bills Generated in '{ctx.output_folder}' folder")
+    if failures:
+        print(f"{len(failures)} bill(s) failed: {', '.join(key for key, _ in failures)}")
+    
+    return failures
 
 
 # ================= MASTER SUMMARY =================
-def generate_master_summary(summaries, po_dict):
+# Non-numeric columns that should NOT get number formatting
+SUMMARY_NON_NUMERIC_HEADERS = {"Kind Attention Person", "Company Name", "PO Number", "Validity"}
+
+
+def format_master_summary_sheet(ws, headers, num_data_rows):
+    """
+    Apply formatting to the master summary sheet:
+    - Orange bold header row with increased height
+    - Whole number format for numeric columns
+    - Yellow bold GRAND TOTAL row
+    """
+    styles = StyleRegistry(ws)
+    
+    ws.row_dimensions[1].height = 30
+    styles.apply_rows(ws, 1, 1, ["summary_header"] * len(headers))
+    
+    styles.apply_rows(ws, 2, num_data_rows + 1, [
+        None if header in SUMMARY_NON_NUMERIC_HEADERS else "summary_number"
+        for header in headers
+    ])
+    
+    # Label in column 1, totals from column 3 on
+    total_row = num_data_rows + 2
+    total_styles = [
+        None if header in SUMMARY_NON_NUMERIC_HEADERS else "summary_total_number"
+        for header in headers
+    ]
+    total_styles[0] = "summary_total"
+    if len(total_styles) > 1:
+        total_styles[1] = None
+    styles.apply_rows(ws, total_row, total_row, total_styles)
+    
+    # Adjust column widths
+    for col in range(1, len(headers) + 1):
+        ws.column_dimensions[chr(64 + col)].width = 18
+
+
+def generate_master_summary(summary_df, ctx=None):
     """
     Generate a master summary Excel file with all annexure totals
-    Includes PO Number and Validity from PO_Number.xlsx
+    summary_df: group_totals rows of the bills to list (PO Number and
+    Validity already joined from PO_Number.xlsx)
+    Written to ctx.output_folder (default config.run_context())
     """
-    if not summaries:
+    if summary_df.empty:
         return
     
     from openpyxl import Workbook
     
-    summary_path = os.path.join(OUTPUT_FOLDER, "Master_Summary.xlsx")
+    if ctx is None:
+        ctx = run_context()
+    
+    summary_path = os.path.join(ctx.output_folder, "Master_Summary.xlsx")
     
     wb = Workbook()
     ws = wb.active
     ws.title = "Master Summary"
     
-    # Define column order: KAP, Company, PO Number, Validity, then numeric columns
-    # Order: Total Amount -> GST -> Grand Total
-    ordered_headers = [
-        "Kind Attention Person",
-        "Company Name",
-        "PO Number",
-        "Validity",
-        "No of Employees",
-        "Total Billing",
-        "Total Payable Billing",
-        "Total Charges",
-        "Total Out of Pocket",
-        "Total Arrears",
-        "Total Amount",
-    ]
-    
-    # Always include all GST columns: CGST, SGST, and IGST
-    # All summary rows now have all three keys (with 0 for non-applicable)
-    ordered_headers.append("CGST")
-    ordered_headers.append("SGST")
-    ordered_headers.append("IGST")
-    
-    # Add Grand Total at the end
-    ordered_headers.append("Grand Total")
-    
-    headers = ordered_headers
+    # Column order: KAP, Company, PO Number, Validity, then numeric columns
+    # (Total Amount -> GST -> Grand Total)
+    headers = SUMMARY_HEADERS
     
     for col_idx, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_idx, value=header)
-        cell.fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-    
-    ws.row_dimensions[1].height = 30
-    
-    # Non-numeric columns that should NOT get number formatting
-    non_numeric_headers = {"Kind Attention Person", "Company Name", "PO Number", "Validity"}
+        ws.cell(row=1, column=col_idx, value=header)
     
     # Data rows
-    for row_idx, summary in enumerate(summaries, 2):
-        kap = summary.get("Kind Attention Person", "")
-        company = summary.get("Company Name", "")
-        
-        # Get PO Number and Validity
-        po_number, validity = get_po_details(kap, company, po_dict)
-        
-        for col_idx, header in enumerate(headers, 1):
-            if header == "PO Number":
-                cell = ws.cell(row=row_idx, column=col_idx, value=po_number)
-            elif header == "Validity":
-                cell = ws.cell(row=row_idx, column=col_idx, value=validity)
-            else:
-                # Use .get() to handle missing GST columns gracefully
-                cell = ws.cell(row=row_idx, column=col_idx, value=summary.get(header, 0))
-            
-            # Apply whole number format to numeric columns
-            if header not in non_numeric_headers:
-                cell.number_format = '0'
+    for row_idx, row in enumerate(summary_df[headers].itertuples(index=False), 2):
+        for col_idx, value in enumerate(row, 1):
+            ws.cell(row=row_idx, column=col_idx, value=value)
     
     # Total row
-    total_row = len(summaries) + 2
+    total_row = len(summary_df) + 2
     ws.cell(row=total_row, column=1, value="GRAND TOTAL")
-    ws.cell(row=total_row, column=1).font = Font(bold=True)
-    ws.cell(row=total_row, column=1).fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
     
-    # Sum numeric columns (columns 3 onwards, skipping PO Number and Validity)
+    # Sum numeric columns (columns 3 onwards, skipping PO Number and Validity).
+    # In paise money mode the totals are exact values rather than formulas.
+    paise = ctx.money_mode == "paise"
     for col_idx in range(3, len(headers) + 1):
         header = headers[col_idx - 1]
-        if header in non_numeric_headers:
+        if header in SUMMARY_NON_NUMERIC_HEADERS:
+            continue
+        if paise:
+            value = rupee_total(summary_df[header])
+            ws.cell(row=total_row, column=col_idx, value=int(value) if value.is_integer() else value)
             continue
         col_letter = chr(64 + col_idx)
         formula = f"=SUM({col_letter}2:{col_letter}{total_row - 1})"
-        cell = ws.cell(row=total_row, column=col_idx, value=formula)
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-        cell.number_format = '0'
+        ws.cell(row=total_row, column=col_idx, value=formula)
     
-    # Adjust column widths
-    for col in range(1, len(headers) + 1):
-        ws.column_dimensions[chr(64 + col)].width = 18
+    format_master_summary_sheet(ws, headers, len(summary_df))
     
-    wb.save(summary_path)
+    with atomic_output(summary_path) as tmp_path:
+        wb.save(tmp_path)
     print(f"Master Summary generated: {summary_path}")
 
 
+def generate_merged_summary(shard_root, ctx=None):
+    """
+    Master summary of a sharded run, from the partial summaries of all
+    its shards under shard_root (see shared.sharding)
+    Written to ctx.output_folder (default config.run_context())
+    
+    Returns:
+        list: partial summaries in shard order
+    """
+    if ctx is None:
+        ctx = run_context()
+    
+    partials = read_partial_summaries(shard_root, "Billing_System", ctx)
+    summaries = merge_summaries(partials)
+    summary_df = pd.DataFrame.from_dict(summaries, orient="index", columns=SUMMARY_HEADERS)
+    
+    os.makedirs(ctx.output_folder, exist_ok=True)
+    generate_master_summary(summary_df, ctx)
+    return partials
+
+
 # ================= CREATE PLACEHOLDER IMAGES =================
-def create_placeholder_images():
+def create_placeholder_images(ctx=None):
+    if ctx is None:
+        ctx = run_context()
+    
     try:
         from PIL import Image, ImageDraw, ImageFont
         
-        os.makedirs(ASSETS_FOLDER, exist_ok=True)
+        os.makedirs(ctx.assets_folder, exist_ok=True)
         
         # Sign image
-        sign_path = os.path.join(ASSETS_FOLDER, "sign.png")
+        sign_path = os.path.join(ctx.assets_folder, "sign.png")
         if not os.path.exists(sign_path):
             img = Image.new('RGB', (300, 150), color='white')
             draw = ImageDraw.Draw(img)
@@ -680,7 +968,7 @@ def create_placeholder_images():
         ]
         
         for filename, text, color in stamp_types:
-            stamp_path = os.path.join(ASSETS_FOLDER, filename)
+            stamp_path = os.path.join(ctx.assets_folder, filename)
             if not os.path.exists(stamp_path):
                 img = Image.new('RGB', (300, 150), color='white')
                 draw = ImageDraw.Draw(img)
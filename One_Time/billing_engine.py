@@ -2,24 +2,18 @@ import pandas as pd
 from datetime import date
 import calendar
 from config import *
-from shared.helpers import get_billing_dates_pd
+from shared.billing_calendar import billing_calendar
 from charge_mapper import ChargeMapperOneTime
 from annexure_builder import build_annexure_row
 
 
-def get_billing_dates(cycle, month, year):
-    """
-    Get billing start and end dates based on billing cycle.
-    Returns pandas Timestamps for comparison with datetime64 columns.
-    cycle: string like "21-20", "25-24", "26-25" or empty for default month
-    """
-    return get_billing_dates_pd(cycle, month, year)
-
-
-def process_onetime_billing(df, billing_month, billing_year):
+def process_onetime_billing(df, billing_month=None, billing_year=None, ctx=None):
     """
     Process One_Time billing for new joiners in the given month
     
+    ctx: RunContext with the rates and charges file (default:
+    config.run_context()); billing_month/billing_year default to its period
+    
     Key differences from recurring billing:
     - Filter by Date of Joining in the billing month
     - No attendance calculation
@@ -27,7 +21,14 @@ def process_onetime_billing(df, billing_month, billing_year):
     - Include Reporting Person and Date of Joining in output
     """
     
-    charge_mapper = ChargeMapperOneTime(INPUT_CHARGES_FILE)
+    if ctx is None:
+        ctx = run_context()
+    if billing_month is None:
+        billing_month = ctx.billing_month
+    if billing_year is None:
+        billing_year = ctx.billing_year
+    
+    charge_mapper = ChargeMapperOneTime.for_context(ctx)
     
     # Ensure Date of Joining is in datetime format
     if "Date of Joining" in df.columns:
@@ -51,9 +52,11 @@ def process_onetime_billing(df, billing_month, billing_year):
     # Get unique billing cycles from employees
     unique_cycles = df["Billing Cycle"].fillna("").unique()
     
+    periods = billing_calendar(billing_month, billing_year)
     for cycle in unique_cycles:
         cycle_str = str(cycle)
-        start_date, end_date = get_billing_dates(cycle_str, billing_month, billing_year)
+        period = periods.period(cycle_str)
+        start_date, end_date = period.start_ts, period.end_ts
         
         # Filter employees who joined within this billing period
         cycle_new_joiners = df[
@@ -98,11 +101,11 @@ def process_onetime_billing(df, billing_month, billing_year):
             gst = str(row.get("GST", "")).upper() if pd.notna(row.get("GST")) else "CGST/SGST"
             
             if "IGST" in gst:
-                igst = total * IGST_RATE
+                igst = total * ctx.igst_rate
                 cgst = sgst = 0
             else:
-                cgst = total * CGST_RATE
-                sgst = total * SGST_RATE
+                cgst = total * ctx.cgst_rate
+                sgst = total * ctx.sgst_rate
                 igst = 0
             
             grand_total = total + cgst + sgst + igst
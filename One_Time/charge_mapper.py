@@ -12,8 +12,8 @@ class ChargeMapperOneTime(ChargeMapperBase):
     - Default application mode: fixed (not proportionate)
     """
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, use_cache=True):
         # Override defaults for One_Time billing
         self.DEFAULT_CHARGE_TYPE = "fixed"
         self.DEFAULT_APPLICATION_MODE = "fixed"
-        super().__init__(file_path)
+        super().__init__(file_path, use_cache=use_cache)
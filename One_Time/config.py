@@ -28,3 +28,48 @@ SUMMARY_FILE = "One_Time_Master_Summary.xlsx"
 CGST_RATE = 0.09
 SGST_RATE = 0.09
 IGST_RATE = 0.18
+
+# Bill sheet filling: "patch" (copy the template file, rewriting only the
+# filled cells in its sheet XML; keeps shapes openpyxl drops) or "openpyxl"
+# (reference: load the template with openpyxl and re-save it)
+TEMPLATE_FILL = "patch"
+
+# Processes used to build bills (1 = serial, 0 = all CPUs)
+BILL_WORKERS = 1
+
+# Sharded run (see service/shards.py): bill only shard SHARD_INDEX of
+# SHARD_COUNT, splitting groups by "company" or "split_key" (hash), and write
+# a partial summary for the merge step instead of the master summary
+SHARD_COUNT = 1
+SHARD_INDEX = 0
+SHARD_BY = "company"
+
+# Annexure-only bills with at least this many rows are streamed to disk
+STREAMING_ANNEXURE_MIN_ROWS = 5000
+
+# Reuse parsed Data/*.xlsx snapshots from Data/.cache when the file is unchanged
+INPUT_CACHE = True
+
+# Rebuild only bills whose inputs changed since the last run (see run_manifest.json)
+INCREMENTAL_BILLS = False
+
+# Skip bills that an interrupted run already finished (see run_checkpoint.jsonl);
+# also main.py --resume
+RESUME = False
+
+# Write stage and per-bill timings of every run to OUTPUT_FOLDER/RUN_REPORT_FILE
+RUN_REPORT = True
+RUN_REPORT_FILE = "run_report.json"
+
+
+# ================= RUN CONTEXT =================
+def run_context(**overrides):
+    """
+    RunContext holding the settings above. Engines and generators take a
+    context explicitly and fall back to this one when none is given.
+
+    Args:
+        overrides: lower-case settings to change, e.g. billing_month=3
+    """
+    from shared.run_context import RunContext
+    return RunContext.from_config(globals(), **overrides)
@@ -1,3 +1,4 @@
+import argparse
 import pandas as pd
 import os
 import sys
@@ -6,20 +7,44 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import *
+from shared.checkpoint import atomic_output
+from shared.input_cache import read_excel_cached
+from shared.instrumentation import RunReport, StageTimer
+from shared.sharding import write_partial_summary
 from billing_engine import process_onetime_billing
 from unified_bill_generator import generate_unified_bills
 
+# Employee sheet columns coerced to numbers (missing -> 0)
+EMPLOYEE_NUMERIC_COLUMNS = [
+    "Billing",
+    "Out of Pocket Exp",
+    "Arrears"
+]
 
-def main():
-    print("=" * 60)
-    print("ONE_TIME BILLING SYSTEM")
-    print("For New Joiners in Billing Month")
-    print("=" * 60)
+
+def load_employee_data(path=None, report=None, ctx=None):
+    """
+    Read the employee sheet and normalize dates and numeric columns
+
+    path defaults to ctx.input_employee_file (ctx: RunContext, default
+    config.run_context())
+    """
+    if ctx is None:
+        ctx = run_context()
+    if path is None:
+        path = ctx.input_employee_file
+    if report is None:
+        report = StageTimer()
     
-    # Read employee data
-    df = pd.read_excel(INPUT_EMPLOYEE_FILE)
-    df.columns = df.columns.str.strip()
+    with report.stage("input read"):
+        df = read_excel_cached(path, use_cache=ctx.input_cache)
     
+    with report.stage("clean numeric", rows=len(df)):
+        return clean_employee_data(df)
+
+
+def clean_employee_data(df):
+    """Parse dates and coerce the numeric columns of the employee sheet"""
     # Parse Date of Joining as datetime (keep as datetime for filtering)
     if "Date of Joining" in df.columns:
         df["Date of Joining"] = pd.to_datetime(
@@ -31,48 +56,96 @@ def main():
     # Note: LDW is not needed for One_Time billing (new joiners only)
     
     # Fill missing numeric columns
-    numeric_cols = [
-        "Billing",
-        "Out of Pocket Exp",
-        "Arrears"
-    ]
-    
-    for col in numeric_cols:
+    for col in EMPLOYEE_NUMERIC_COLUMNS:
         if col not in df.columns:
             df[col] = 0
         df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
     
-    print(f"\nBilling Month: {BILLING_MONTH}/{BILLING_YEAR}")
+    return df
+
+
+def write_run_report(report, ctx):
+    """Save the stage/bill timings of this run when ctx.run_report is on"""
+    if ctx.run_report:
+        path = report.save(os.path.join(ctx.output_folder, ctx.run_report_file))
+        print(f"Run report saved: {path}")
+
+
+def main(employee_df=None, ctx=None, pool=None):
+    """
+    Run one billing period.
+
+    Args:
+        employee_df: employee sheet already passed through load_employee_data
+                     (e.g. shared by a backfill across periods); read from
+                     ctx.input_employee_file when None
+        ctx: RunContext of the run (period, paths, rates); defaults to
+             config.run_context()
+        pool: job pool shared with another run that builds the bills
+              (see generate_unified_bills)
+    """
+    if ctx is None:
+        ctx = run_context()
+
+    print("=" * 60)
+    print("ONE_TIME BILLING SYSTEM")
+    print("For New Joiners in Billing Month")
+    print("=" * 60)
+    
+    report = RunReport("One_Time")
+    
+    # Read employee data
+    if employee_df is None:
+        df = load_employee_data(report=report, ctx=ctx)
+    else:
+        df = employee_df.copy()
+    
+    print(f"\nBilling Month: {ctx.billing_month}/{ctx.billing_year}")
     
     # Process One_Time billing
     print("\nProcessing new joiners...")
-    annex_df, error_df = process_onetime_billing(df, BILLING_MONTH, BILLING_YEAR)
+    with report.stage("billing engine", rows=len(df)):
+        annex_df, error_df = process_onetime_billing(df, ctx=ctx)
     
     if annex_df.empty:
         print("No valid records found (no charges defined for new joiners)")
+        if ctx.shard_count > 1:
+            write_partial_summary("One_Time", {}, [], ctx)
+        write_run_report(report, ctx)
         return
     
     print(f"Processed {len(annex_df)} new joiner records")
     
     if not error_df.empty:
         print(f"Found {len(error_df)} error records")
-        error_path = os.path.join(OUTPUT_FOLDER, "System_Error.xlsx")
-        os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-        error_df.to_excel(error_path, index=False)
+    # Every shard of a sharded run finds the same errors; the first reports them
+    if not error_df.empty and ctx.shard_index == 0:
+        error_path = os.path.join(ctx.output_folder, "System_Error.xlsx")
+        os.makedirs(ctx.output_folder, exist_ok=True)
+        with report.stage("error report", rows=len(error_df)):
+            with atomic_output(error_path) as tmp_path:
+                error_df.to_excel(tmp_path, index=False)
         print(f"Error report saved: {error_path}")
     
     # Generate bills
     print("\nGenerating One_Time bills...")
-    generate_unified_bills(annex_df)
+    generate_unified_bills(annex_df, report=report, ctx=ctx, pool=pool)
+    write_run_report(report, ctx)
     
     print("\n" + "=" * 60)
     print("ONE_TIME BILLING COMPLETED SUCCESSFULLY!")
     print("=" * 60)
-    print(f"\nOutput Location: {OUTPUT_FOLDER}/")
-    if not error_df.empty:
-        print(f"Error Report: {OUTPUT_FOLDER}/System_Error.xlsx")
+    print(f"\nOutput Location: {ctx.output_folder}/")
+    if not error_df.empty and ctx.shard_index == 0:
+        print(f"Error Report: {ctx.output_folder}/System_Error.xlsx")
     print()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate the One_Time bills of the configured month")
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="skip bills an interrupted run already finished (run_checkpoint.jsonl)",
+    )
+    args = parser.parse_args()
+    main(ctx=run_context(resume=True) if args.resume else None)
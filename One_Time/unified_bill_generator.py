@@ -4,35 +4,31 @@
 import os
 import warnings
 from datetime import date, timedelta
+from functools import partial
 import pandas as pd
 from config import *
-from openpyxl import load_workbook, Workbook
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
-from openpyxl.drawing.image import Image as OpenpyxlImage
-from num2words import num2words
+from shared.helpers import iter_jobs
+from shared.template_cache import load_template
+from shared.template_patch import load_template_package, fill_cells
+from shared.annexure_stream import write_streaming_annexure
+from shared.run_manifest import RunManifest, group_fingerprint
+from shared.checkpoint import CheckpointJournal, atomic_output, remove_temp_files
+from shared.sharding import select_shard, remove_partial_summary, write_partial_summary, read_partial_summaries, merge_summaries
+from shared.instrumentation import RunReport, StageTimer
+from shared.asset_cache import annexure_image, annexure_image_paths, annexure_asset_digests
+from shared.amount_words import number_to_words_indian
+from shared.styles import StyleRegistry
+from charge_mapper import ChargeMapperOneTime
+from openpyxl import Workbook
 
 # Suppress openpyxl WMF image format warning
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl.reader.drawings")
 
 
-# ================= CONFIG PATHS =================
-# TEMPLATE_FOLDER and ASSETS_FOLDER are imported from config.py
-OUTPUT_FOLDER = OUTPUT_FOLDER  # From config.py
-
-
-# ================= NUMBER TO WORDS =================
-def number_to_words_indian(num):
-    try:
-        words = num2words(num, lang="en_IN")
-        return words.title() + " Only"
-    except:
-        return f"{num} Only"
-
-
 # ================= FILL BILL TEMPLATE =================
-def fill_bill_template(ws, group_df):
+def bill_template_cells(group_df):
     """
-    Fill the bill template with One_Time billing data:
+    Cells and merged ranges of the bill template with One_Time billing data:
     - Bill Date: G12
     - Due Date: G13
     - Sum of Charges: H17:H20 (merged)
@@ -40,6 +36,9 @@ def fill_bill_template(ws, group_df):
     - SGST: H22
     - Total (Grand Total): H23:H25 (merged)
     - Rupees(In words): B24
+    
+    Returns:
+        tuple: ({cell: value}, [merged ranges])
     """
     # Get totals from the group dataframe
     total_charges = round(group_df["Charges"].sum())
@@ -52,27 +51,36 @@ def fill_bill_template(ws, group_df):
     due_date = today + timedelta(days=3)
     
     # Dates
-    ws["G12"] = today.strftime("%d-%m-%Y")
-    ws["G13"] = due_date.strftime("%d-%m-%Y")
+    cells = {
+        "G12": today.strftime("%d-%m-%Y"),
+        "G13": due_date.strftime("%d-%m-%Y"),
+    }
     
     # Sum of Charges (merged H17:H20)
-    ws.merge_cells("H17:H20")
-    ws["H17"] = total_charges
+    merges = ["H17:H20"]
+    cells["H17"] = total_charges
     
     # GST
     if igst > 0:
-        ws.merge_cells("H21:H22")
-        ws["H21"] = igst
+        merges.append("H21:H22")
+        cells["H21"] = igst
     else:
-        ws["H21"] = cgst
-        ws["H22"] = sgst
+        cells["H21"] = cgst
+        cells["H22"] = sgst
     
     # Grand Total (merged H23:H25)
-    ws.merge_cells("H23:H25")
-    ws["H23"] = grand_total
+    merges.append("H23:H25")
+    cells["H23"] = grand_total
     
     # Amount in Words
-    ws["B24"] = number_to_words_indian(grand_total)
+    cells["B24"] = number_to_words_indian(grand_total)
+    
+    return cells, merges
+
+
+def fill_bill_template(ws, group_df):
+    """Fill an openpyxl bill sheet (TEMPLATE_FILL = "openpyxl")"""
+    fill_cells(ws, *bill_template_cells(group_df))
 
 
 # ================= FORMAT ANNEXURE SHEET =================
@@ -83,43 +91,22 @@ def format_annexure_sheet(ws, num_data_rows, num_cols):
     - Yellow total row
     - Bold text
     - All borders
+    
+    Formats come from shared.styles and are registered once per workbook
     """
     
-    # Define styles
-    orange_fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")
-    yellow_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-    bold_font = Font(bold=True, size=10)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    center_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    styles = StyleRegistry(ws)
     
     # Format header row (row 1) - Orange + Bold + Increased height
     ws.row_dimensions[1].height = 30
-    for col in range(1, num_cols + 1):
-        cell = ws.cell(row=1, column=col)
-        cell.fill = orange_fill
-        cell.font = bold_font
-        cell.border = thin_border
-        cell.alignment = center_alignment
+    styles.apply_rows(ws, 1, 1, ["annexure_header"] * num_cols)
     
     # Format data rows - Borders only
-    for row in range(2, num_data_rows + 2):
-        for col in range(1, num_cols + 1):
-            cell = ws.cell(row=row, column=col)
-            cell.border = thin_border
+    styles.apply_rows(ws, 2, num_data_rows + 1, ["annexure_data"] * num_cols)
     
     # Format total row (last row) - Yellow + Bold
     total_row = num_data_rows + 2
-    for col in range(1, num_cols + 1):
-        cell = ws.cell(row=total_row, column=col)
-        cell.fill = yellow_fill
-        cell.font = bold_font
-        cell.border = thin_border
-        cell.alignment = center_alignment
+    styles.apply_rows(ws, total_row, total_row, ["annexure_total"] * num_cols)
     
     # Auto-adjust column widths
     for col in range(1, num_cols + 1):
@@ -127,33 +114,17 @@ def format_annexure_sheet(ws, num_data_rows, num_cols):
 
 
 # ================= ADD IMAGES TO ANNEXURE =================
-def add_images_to_annexure(ws, last_row, company_name):
+def add_images_to_annexure(ws, last_row, company_name, ctx=None):
     """
     Add signature and stamp images side by side at bottom of annexure sheet
     - Sign image is selected based on Company Name: sign.png for all except ABNJ (uses sign2.png)
     - Stamp image is selected based on Company Name: Jobuss, Aradhya, or ABNJ
+    - Images are read from ctx.assets_folder (default config.run_context())
     """
-    # Determine which sign image to use based on Company Name
-    company_lower = str(company_name).lower() if company_name else ""
-    
-    if "abnj" in company_lower:
-        sign_path = os.path.join(ASSETS_FOLDER, "sign2.png")
-    else:
-        sign_path = os.path.join(ASSETS_FOLDER, "sign.png")
-    
-    # Determine which stamp image to use based on Company Name
-    company_lower = str(company_name).lower() if company_name else ""
-    
-    if "jobuss" in company_lower:
-        stamp_filename = "jobuss.png"
-    elif "aradhya" in company_lower:
-        stamp_filename = "aradhya.png"
-    elif "abnj" in company_lower:
-        stamp_filename = "abnj.png"
-    else:
-        stamp_filename = "jobuss.png"
+    if ctx is None:
+        ctx = run_context()
     
-    stamp_path = os.path.join(ASSETS_FOLDER, stamp_filename)
+    sign_path, stamp_path = annexure_image_paths(company_name, ctx.assets_folder)
     
     # Position images 2 rows below the total row
     image_row = last_row + 3
@@ -167,19 +138,16 @@ def add_images_to_annexure(ws, last_row, company_name):
     stamp_height = 125
     
     try:
-        if os.path.exists(sign_path):
-            sign_img = OpenpyxlImage(sign_path)
-            sign_img.width = sign_width
-            sign_img.height = sign_height
+        # Scaled once per process, see shared.asset_cache
+        sign_img = annexure_image(sign_path, sign_width, sign_height)
+        if sign_img is not None:
             ws.add_image(sign_img, f"E{image_row}")
     except Exception as e:
         print(f"Warning: Could not add signature image: {e}")
     
     try:
-        if os.path.exists(stamp_path):
-            stamp_img = OpenpyxlImage(stamp_path)
-            stamp_img.width = stamp_width
-            stamp_img.height = stamp_height
+        stamp_img = annexure_image(stamp_path, stamp_width, stamp_height)
+        if stamp_img is not None:
             ws.add_image(stamp_img, f"H{image_row}")
         else:
             print(f"Stamp image not found: {stamp_path}")
@@ -188,9 +156,12 @@ def add_images_to_annexure(ws, last_row, company_name):
 
 
 # ================= ADD TOTALS TO ANNEXURE =================
-def add_totals_to_annexure(ws, group_df, start_row, annex_columns):
+def annexure_total_formulas(group_df, start_row, annex_columns):
     """
-    Add total row with formulas for numeric columns
+    Total row formulas for numeric columns, rounded to 0 digits
+    
+    Returns:
+        tuple: (total_row, {col_idx: formula})
     """
     # Columns that should have totals (numeric columns)
     numeric_columns = [
@@ -200,8 +171,7 @@ def add_totals_to_annexure(ws, group_df, start_row, annex_columns):
     num_rows = len(group_df)
     total_row = start_row + num_rows
     
-    # Write "TOTAL" in first column
-    ws.cell(row=total_row, column=1, value="TOTAL")
+    formulas = {}
     
     # First pass: identify column positions for all relevant columns
     # Also check if IGST has actual data (non-zero values)
@@ -259,199 +229,474 @@ def add_totals_to_annexure(ws, group_df, start_row, annex_columns):
             else:
                 formula = f"=ROUND(SUM({col_letter}{start_row}:{col_letter}{total_row - 1}), 0)"
         
+        formulas[col_idx] = formula
+    
+    return total_row, formulas
+
+
+def add_totals_to_annexure(ws, group_df, start_row, annex_columns):
+    """
+    Add total row with formulas for numeric columns
+    """
+    total_row, formulas = annexure_total_formulas(group_df, start_row, annex_columns)
+    
+    # Write "TOTAL" in first column
+    ws.cell(row=total_row, column=1, value="TOTAL")
+    
+    for col_idx, formula in formulas.items():
         ws.cell(row=total_row, column=col_idx, value=formula)
     
     return total_row
 
 
-# ================= MAIN GENERATOR =================
-def generate_unified_bills(annex_df):
+# ================= SINGLE BILL =================
+def bill_output_path(key, ctx):
+    return os.path.join(ctx.output_folder, f"{key}_OneTime.xlsx")
+
+
+def build_bill(key, group, template_path=None, timer=None, ctx=None):
     """
-    Generate unified bills with:
-    - Bill sheet (if template exists) + Annexure sheet
-    - OR just Annexure sheet (if no template)
-    - Master Summary of all annexures
+    Build and save the One_Time workbook for one Split_Key group:
+    - Bill sheet from template_path (if given) + Annexure sheet
+    - OR just Annexure sheet
+    
+    timer: StageTimer that receives the load/fill/write/format/images/save steps
+    ctx: RunContext of the run (default config.run_context())
+    
+    Returns:
+        tuple: (summary_data, has_template)
     """
     
-    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    if timer is None:
+        timer = StageTimer()
+    if ctx is None:
+        ctx = run_context()
     
-    annex_df["Split_Key"] = (
-        annex_df["Kind Attention Person"].astype(str).str.replace(" ", "_")
-        + "_"
-        + annex_df["Company Name"].astype(str).str.replace(" ", "_")
-    )
+    output_path = bill_output_path(key, ctx)
     
-    # Get available templates
-    template_files = {
-        os.path.splitext(f)[0]: os.path.join(TEMPLATE_FOLDER, f)
-        for f in os.listdir(TEMPLATE_FOLDER)
-        if f.endswith(".xlsx")
-    }
     
-    # Store summary data for all annexures
-    all_summaries = []
+    # Remove Split_Key column from output
+    group_clean = group.drop(columns=["Split_Key"])
     
-    for key, group in annex_df.groupby("Split_Key"):
-        
-        output_path = os.path.join(OUTPUT_FOLDER, f"{key}_OneTime.xlsx")
-        
-        # Remove Split_Key column from output
-        group_clean = group.drop(columns=["Split_Key"])
-        
-        # Remove IGST column if it's not used (all zeros/empty) for this bill
-        # This ensures IGST doesn't appear in annexure when CGST/SGST are used
-        if "IGST @18%" in group_clean.columns:
-            if group_clean["IGST @18%"].sum() == 0:
-                group_clean = group_clean.drop(columns=["IGST @18%"])
-        
-        # Check if template exists
-        has_template = key in template_files
-        
-        if has_template:
-            # Load template and add annexure
-            template_path = template_files[key]
-            
-            try:
-                wb = load_workbook(template_path)
+    # Remove IGST column if it's not used (all zeros/empty) for this bill
+    # This ensures IGST doesn't appear in annexure when CGST/SGST are used
+    if "IGST @18%" in group_clean.columns:
+        if group_clean["IGST @18%"].sum() == 0:
+            group_clean = group_clean.drop(columns=["IGST @18%"])
+    
+    # Check if template exists
+    has_template = template_path is not None
+    template = None
+    
+    if has_template:
+        # Load template and add annexure
+        try:
+            if ctx.template_fill == "openpyxl":
+                with timer.stage("load"):
+                    wb = load_template(template_path)
                 # Get the first sheet (bill sheet) and fill it with data
                 bill_sheet = wb.active
-                fill_bill_template(bill_sheet, group_clean)
+                with timer.stage("fill"):
+                    fill_bill_template(bill_sheet, group_clean)
                 
                 # Create annexure sheet
                 annex_sheet = wb.create_sheet("Annexure")
-            except Exception as e:
-                print(f"Error loading template for {key}: {e}")
-                print(f"Creating annexure-only file instead")
-                has_template = False
-        
+            else:
+                # Patch the template's XML at save time; annexure built on its own
+                with timer.stage("load"):
+                    template = load_template_package(template_path)
+                with timer.stage("fill"):
+                    template_cells = bill_template_cells(group_clean)
+                wb = Workbook()
+                annex_sheet = wb.active
+                annex_sheet.title = "Annexure"
+        except Exception as e:
+            print(f"Error loading template for {key}: {e}")
+            print(f"Creating annexure-only file instead")
+            has_template = False
+    
+    # Write annexure data
+    # Exclude Company Name from detailed output (keep for reference)
+    columns_to_exclude = ["Split_Key", "Company Name"]
+    annex_columns = [col for col in group_clean.columns if col not in columns_to_exclude]
+    
+    # Get company name from the first row of the group
+    company_name = group_clean.iloc[0].get("Company Name", "") if len(group_clean) > 0 else ""
+    
+    if not has_template and len(group_clean) >= ctx.streaming_annexure_min_rows:
+        # Large annexure-only bill: stream rows straight to disk
+        _, total_formulas = annexure_total_formulas(group_clean, 2, annex_columns)
+        with timer.stage("write", streamed=True):
+            write_streaming_annexure(
+                output_path, group_clean, annex_columns, total_formulas,
+                set(), partial(add_images_to_annexure, ctx=ctx), company_name
+            )
+    else:
         if not has_template:
             # Create new workbook with only annexure
             wb = Workbook()
             annex_sheet = wb.active
             annex_sheet.title = "Annexure"
         
-        # Write annexure data
-        # Exclude Company Name from detailed output (keep for reference)
-        columns_to_exclude = ["Split_Key", "Company Name"]
-        annex_columns = [col for col in group_clean.columns if col not in columns_to_exclude]
-        
-        # Write headers
-        for col_idx, header in enumerate(annex_columns, 1):
-            annex_sheet.cell(row=1, column=col_idx, value=header)
-        
-        # Write data rows
-        for row_idx, (_, row) in enumerate(group_clean.iterrows(), 2):
-            for col_idx, col_name in enumerate(annex_columns, 1):
-                annex_sheet.cell(row=row_idx, column=col_idx, value=row[col_name])
-        
-        # Add totals row
-        num_data_rows = len(group_clean)
-        total_row = add_totals_to_annexure(annex_sheet, group_clean, 2, annex_columns)
+        with timer.stage("write"):
+            # Write headers
+            for col_idx, header in enumerate(annex_columns, 1):
+                annex_sheet.cell(row=1, column=col_idx, value=header)
+            
+            # Write data rows
+            for row_idx, (_, row) in enumerate(group_clean.iterrows(), 2):
+                for col_idx, col_name in enumerate(annex_columns, 1):
+                    annex_sheet.cell(row=row_idx, column=col_idx, value=row[col_name])
+            
+            # Add totals row
+            num_data_rows = len(group_clean)
+            total_row = add_totals_to_annexure(annex_sheet, group_clean, 2, annex_columns)
         
         # Format annexure sheet
         num_cols = len(annex_columns)
-        format_annexure_sheet(annex_sheet, num_data_rows, num_cols)
-        
-        # Get company name from the first row of the group
-        company_name = group_clean.iloc[0].get("Company Name", "") if len(group_clean) > 0 else ""
+        with timer.stage("format"):
+            format_annexure_sheet(annex_sheet, num_data_rows, num_cols)
         
         # Add images
-        add_images_to_annexure(annex_sheet, total_row, company_name)
+        with timer.stage("images"):
+            add_images_to_annexure(annex_sheet, total_row, company_name, ctx)
         
         # Save workbook
-        wb.save(output_path)
-        
-        # Collect summary data - dynamically handle GST columns
-        summary_data = {
-            "Kind Attention Person": group_clean.iloc[0]["Kind Attention Person"] if len(group_clean) > 0 else "",
-            "Working At": group_clean.iloc[0]["Working At"] if len(group_clean) > 0 else "",
-            "Company Name": company_name,
-            "No of Employees": len(group_clean),
-            "Total Charges": round(group_clean["Charges"].sum()),
-            "Total Amount": round(group_clean["Total"].sum()),
-            "Grand Total": round(group_clean["Grand Total"].sum())
+        with timer.stage("save"), atomic_output(output_path) as tmp_path:
+            if has_template and template is not None:
+                template.fill(tmp_path, *template_cells, annexure_wb=wb)
+            else:
+                wb.save(tmp_path)
+    
+    # Collect summary data - dynamically handle GST columns
+    summary_data = {
+        "Kind Attention Person": group_clean.iloc[0]["Kind Attention Person"] if len(group_clean) > 0 else "",
+        "Working At": group_clean.iloc[0]["Working At"] if len(group_clean) > 0 else "",
+        "Company Name": company_name,
+        "No of Employees": len(group_clean),
+        "Total Charges": round(group_clean["Charges"].sum()),
+        "Total Amount": round(group_clean["Total"].sum()),
+        "Grand Total": round(group_clean["Grand Total"].sum())
+    }
+    
+    # Add only the applicable GST columns
+    if "IGST @18%" in group_clean.columns:
+        summary_data["IGST"] = round(group_clean["IGST @18%"].sum())
+    else:
+        if "CGST @9%" in group_clean.columns:
+            summary_data["CGST"] = round(group_clean["CGST @9%"].sum())
+        if "SGST @9%" in group_clean.columns:
+            summary_data["SGST"] = round(group_clean["SGST @9%"].sum())
+    
+    return summary_data, has_template
+
+
+def build_bill_job(job):
+    """
+    Process pool entry point for one (key, group, template_path, ctx) job.
+    
+    Returns:
+        tuple: (key, summary_data, has_template, error, steps)
+    """
+    key, group, template_path, ctx = job
+    timer = StageTimer()
+    summary_data, has_template = build_bill(key, group, template_path, timer, ctx)
+    return key, summary_data, has_template, None, timer.stages
+
+
+def bill_job_failed(job, error):
+    """Result recorded for a bill that raised or whose worker died"""
+    return job[0], None, False, error, []
+
+
+# ================= MAIN GENERATOR =================
+def charge_rows_for(charges_df, group):
+    """Rows of the charges file that apply to the group's Kind Attention Person(s)"""
+    kaps = group["Kind Attention Person"].astype(str).str.lower().str.strip().unique()
+    return charges_df[charges_df["Kind Attention Person"].isin(kaps)]
+
+
+def bill_settings(ctx):
+    """Run settings that change a bill's contents"""
+    return {
+        "billing_month": ctx.billing_month,
+        "billing_year": ctx.billing_year,
+        "cgst_rate": ctx.cgst_rate,
+        "sgst_rate": ctx.sgst_rate,
+        "igst_rate": ctx.igst_rate,
+        "streaming_annexure_min_rows": ctx.streaming_annexure_min_rows,
+        "template_fill": ctx.template_fill,
+    }
+
+
+def group_settings(group, settings, ctx):
+    """
+    settings (bill_settings) plus the hashes of the sign and stamp images
+    the group's annexure embeds, so replacing one rebuilds its bills
+    """
+    company_name = group.iloc[0].get("Company Name", "") if len(group) > 0 else ""
+    return dict(settings, assets=annexure_asset_digests(company_name, ctx.assets_folder))
+
+
+def generate_unified_bills(annex_df, workers=None, incremental=None, report=None, ctx=None, pool=None,
+                           resume=None):
+    """
+    Generate unified bills with:
+    - Bill sheet (if template exists) + Annexure sheet
+    - OR just Annexure sheet (if no template)
+    - Master Summary of all annexures
+    
+    ctx: RunContext of the run (default config.run_context())
+    
+    workers: processes used to build bills (1 = serial, 0 = all CPUs),
+    default ctx.bill_workers. Summaries keep Split_Key order regardless
+    of completion order.
+    
+    incremental: rebuild only bills whose fingerprint (annexure rows,
+    charge rows, template, rates and billing month) differs from the
+    run manifest; unchanged bills reuse their recorded summary row.
+    Default ctx.incremental_bills.
+    
+    resume: skip groups that the checkpoint journal of an interrupted run
+    (run_checkpoint.jsonl) records as finished with the same fingerprint
+    and output file. Default ctx.resume.
+    
+    report: RunReport that receives the bill stages and per-group step timings
+    
+    pool: job pool shared with another run (see shared.helpers.iter_jobs);
+    bills are queued on it instead of a pool of their own
+    
+    With ctx.shard_count > 1 only the groups of shard ctx.shard_index are
+    billed, and their summary rows go to partial_summary.json for the merge
+    step (generate_merged_summary) instead of the master summary.
+    
+    Returns:
+        list: (key, error) for every bill that failed
+    """
+    
+    if ctx is None:
+        ctx = run_context()
+    if workers is None:
+        workers = ctx.bill_workers
+    if incremental is None:
+        incremental = ctx.incremental_bills
+    if resume is None:
+        resume = ctx.resume
+    if report is None:
+        report = RunReport("One_Time")
+    
+    os.makedirs(ctx.output_folder, exist_ok=True)
+    if resume:
+        remove_temp_files(ctx.output_folder)
+    
+    annex_df["Split_Key"] = (
+        annex_df["Kind Attention Person"].astype(str).str.replace(" ", "_")
+        + "_"
+        + annex_df["Company Name"].astype(str).str.replace(" ", "_")
+    )
+    
+    # Sharded run: keep only this shard's groups
+    if ctx.shard_count > 1:
+        remove_partial_summary(ctx.output_folder)
+        annex_df = select_shard(annex_df, ctx)
+        print(f"Shard {ctx.shard_index} of {ctx.shard_count} (by {ctx.shard_by}): {annex_df['Split_Key'].nunique()} bill(s)")
+    
+    # Get available templates
+    template_files = {
+        os.path.splitext(f)[0]: os.path.join(ctx.template_folder, f)
+        for f in os.listdir(ctx.template_folder)
+        if f.endswith(".xlsx")
+    }
+    
+    groups = list(annex_df.groupby("Split_Key"))
+    
+    # Fingerprint every group against the manifest of the previous run
+    with report.stage("fingerprint", groups=len(groups)):
+        manifest = RunManifest(ctx.output_folder)
+        manifest.retain(key for key, _ in groups)
+        charges_df = ChargeMapperOneTime.for_context(ctx).df
+        settings = bill_settings(ctx)
+        fingerprints = {
+            key: group_fingerprint(
+                group, charge_rows_for(charges_df, group), template_files.get(key), group_settings(group, settings, ctx)
+            )
+            for key, group in groups
         }
-        
-        # Add only the applicable GST columns
-        if "IGST @18%" in group_clean.columns:
-            summary_data["IGST"] = round(group_clean["IGST @18%"].sum())
-        else:
-            if "CGST @9%" in group_clean.columns:
-                summary_data["CGST"] = round(group_clean["CGST @9%"].sum())
-            if "SGST @9%" in group_clean.columns:
-                summary_data["SGST"] = round(group_clean["SGST @9%"].sum())
-        
-        all_summaries.append(summary_data)
-        
-        status = "with Bill" if has_template else "Annexure only"
-        print(f"Generated {key} ({status})")
+        journal = CheckpointJournal(ctx.output_folder, resume)
     
-    # Generate Master Summary
-    generate_master_summary(all_summaries)
+    # Groups an interrupted run already finished keep their bill
+    resumed = [
+        key for key, _ in groups
+        if resume and journal.completed(key, fingerprints[key], bill_output_path(key, ctx))
+    ]
+    for key in resumed:
+        manifest.record(key, fingerprints[key], *journal.summary(key))
+    if resume:
+        print(f"Resuming: {len(resumed)} of {len(groups)} bill(s) already finished")
+    
+    jobs = [
+        (key, group, template_files.get(key), ctx)
+        for key, group in groups
+        if key not in resumed
+        and not (
+            incremental
+            and manifest.unchanged(key, fingerprints[key], bill_output_path(key, ctx))
+        )
+    ]
+    if incremental:
+        print(f"Rebuilding {len(jobs)} of {len(groups)} bill(s); the rest are unchanged")
+    
+    failures = []
+    group_rows = {key: len(group) for key, group in groups}
+    
+    with report.stage("bills", bills=len(jobs), workers=workers):
+        # Results arrive as each bill is saved, so the journal keeps up with the files
+        for _, (key, summary_data, has_template, error, steps) in iter_jobs(
+            build_bill_job, jobs, workers, on_error=bill_job_failed, pool=pool
+        ):
+            report.add_group(key, group_rows[key], has_template, steps, error)
+            
+            if error:
+                print(f"Failed {key}: {error}")
+                failures.append((key, error))
+                # Rebuild on the next run whatever happened to the old file
+                manifest.groups.pop(key, None)
+                continue
+            
+            manifest.record(key, fingerprints[key], summary_data, has_template)
+            journal.record(key, fingerprints[key], bill_output_path(key, ctx), summary_data, has_template)
+            
+            status = "with Bill" if has_template else "Annexure only"
+            print(f"Generated {key} ({status})")
+    
+    manifest.save()
+    if not failures:
+        journal.clear()
+    
+    # Summary data for all annexures, fresh or recorded, in Split_Key order
+    all_summaries = {
+        key: manifest.summary(key)[0]
+        for key, _ in groups
+        if key in manifest.groups
+    }
     
-    print(f"\nAll One_Time Bills Generated in '{OUTPUT_FOLDER}' folder")
+    if ctx.shard_count > 1:
+        # The merge step writes the master summary from every shard's rows
+        with report.stage("partial summary", rows=len(all_summaries)):
+            write_partial_summary("One_Time", all_summaries, failures, ctx)
+    else:
+        # Generate Master Summary
+        with report.stage("master summary", rows=len(all_summaries)):
+            generate_master_summary(list(all_summaries.values()), ctx)
+    
+    print(f"\nAll One_Time Bills Generated in '{ctx.output_folder}' folder")
+    if failures:
+        print(f"{len(failures)} bill(s) failed: {', '.join(key for key, _ in failures)}")
+    
+    return failures
 
 
 # ================= MASTER SUMMARY =================
-def generate_master_summary(summaries):
+def format_master_summary_sheet(ws, headers, num_data_rows):
+    """
+    Apply formatting to the master summary sheet:
+    - Orange bold header row with increased height
+    - Yellow bold GRAND TOTAL row (label and column 3 onwards)
+    """
+    styles = StyleRegistry(ws)
+    
+    ws.row_dimensions[1].height = 30
+    styles.apply_rows(ws, 1, 1, ["summary_header"] * len(headers))
+    
+    total_row = num_data_rows + 2
+    total_styles = ["summary_total"] * len(headers)
+    if len(total_styles) > 1:
+        total_styles[1] = None
+    styles.apply_rows(ws, total_row, total_row, total_styles)
+    
+    # Adjust column widths
+    for col in range(1, len(headers) + 1):
+        ws.column_dimensions[chr(64 + col)].width = 18
+
+
+def generate_master_summary(summaries, ctx=None):
     """
     Generate a master summary Excel file with all annexure totals
+    Written to ctx.output_folder (default config.run_context())
     """
     if not summaries:
         return
     
-    summary_path = os.path.join(OUTPUT_FOLDER, SUMMARY_FILE)
+    if ctx is None:
+        ctx = run_context()
+    
+    summary_path = os.path.join(ctx.output_folder, ctx.summary_file)
     
     wb = Workbook()
     ws = wb.active
     ws.title = "Master Summary"
     
-    # Headers
-    headers = list(summaries[0].keys())
+    # Headers - every key seen, in first-seen order, since groups billed
+    # with IGST and with CGST/SGST carry different GST keys
+    headers = list(dict.fromkeys(header for summary in summaries for header in summary))
     for col_idx, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_idx, value=header)
-        cell.fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-    
-    ws.row_dimensions[1].height = 30
+        ws.cell(row=1, column=col_idx, value=header)
     
     # Data rows
     for row_idx, summary in enumerate(summaries, 2):
         for col_idx, header in enumerate(headers, 1):
-            ws.cell(row=row_idx, column=col_idx, value=summary[header])
+            # Use .get() to handle missing GST columns gracefully
+            ws.cell(row=row_idx, column=col_idx, value=summary.get(header, 0))
     
     # Total row
     total_row = len(summaries) + 2
     ws.cell(row=total_row, column=1, value="GRAND TOTAL")
-    ws.cell(row=total_row, column=1).font = Font(bold=True)
-    ws.cell(row=total_row, column=1).fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
     
     # Sum numeric columns (columns 3 onwards)
     for col_idx in range(3, len(headers) + 1):
         col_letter = chr(64 + col_idx)
         formula = f"=SUM({col_letter}2:{col_letter}{total_row - 1})"
-        cell = ws.cell(row=total_row, column=col_idx, value=formula)
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+        ws.cell(row=total_row, column=col_idx, value=formula)
     
-    # Adjust column widths
-    for col in range(1, len(headers) + 1):
-        ws.column_dimensions[chr(64 + col)].width = 18
+    format_master_summary_sheet(ws, headers, len(summaries))
     
-    wb.save(summary_path)
+    with atomic_output(summary_path) as tmp_path:
+        wb.save(tmp_path)
     print(f"Master Summary generated: {summary_path}")
 
 
+def generate_merged_summary(shard_root, ctx=None):
+    """
+    Master summary of a sharded run, from the partial summaries of all
+    its shards under shard_root (see shared.sharding)
+    Written to ctx.output_folder (default config.run_context())
+    
+    Returns:
+        list: partial summaries in shard order
+    """
+    if ctx is None:
+        ctx = run_context()
+    
+    partials = read_partial_summaries(shard_root, "One_Time", ctx)
+    summaries = merge_summaries(partials)
+    
+    os.makedirs(ctx.output_folder, exist_ok=True)
+    generate_master_summary(list(summaries.values()), ctx)
+    return partials
+
+
 # ================= CREATE PLACEHOLDER IMAGES =================
-def create_placeholder_images():
+def create_placeholder_images(ctx=None):
+    if ctx is None:
+        ctx = run_context()
+    
     try:
         from PIL import Image, ImageDraw, ImageFont
         
-        os.makedirs(ASSETS_FOLDER, exist_ok=True)
+        os.makedirs(ctx.assets_folder, exist_ok=True)
         
         # Sign image
-        sign_path = os.path.join(ASSETS_FOLDER, "sign.png")
+        sign_path = os.path.join(ctx.assets_folder, "sign.png")
         if not os.path.exists(sign_path):
             img = Image.new('RGB', (300, 150), color='white')
             draw = ImageDraw.Draw(img)
@@ -468,7 +713,7 @@ def create_placeholder_images():
         ]
         
         for filename, text, color in stamp_types:
-            stamp_path = os.path.join(ASSETS_FOLDER, filename)
+            stamp_path = os.path.join(ctx.assets_folder, filename)
             if not os.path.exists(stamp_path):
                 img = Image.new('RGB', (300, 150), color='white')
                 draw = ImageDraw.Draw(img)
@@ -0,0 +1,229 @@
+"""
+Formatting Benchmark
+====================
+Times the annexure and master-summary formatting stages of Billing_System
+per thousand cells:
+
+    cell_by_cell: the previous implementation, kept here as the reference.
+                  It builds Font/PatternFill/Border/Alignment objects and
+                  assigns them attribute by attribute to every cell.
+    registry:     format_annexure_sheet / format_master_summary_sheet, which
+                  apply formats registered once per workbook (shared.styles)
+
+Both produce identically styled sheets, which the benchmark checks on the
+smallest size before timing.
+
+Usage (from the repository root):
+    python benchmarks/bench_formatting.py
+    python benchmarks/bench_formatting.py --rows 1000 10000 --output bench_formatting.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from openpyxl import Workbook
+from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from service.programs import load_program
+
+
+DEFAULT_ROWS = [100, 1_000, 10_000]
+
+# Columns of a Billing_System annexure sheet
+ANNEX_COLUMNS = [
+    "Kind Attention Person", "Employee Code", "Employee Name", "Billing", "No of days",
+    "Eligible Days", "No of Saturdays", "No of Sundays", "No of Holidays", "Total Present",
+    "Total Working Days", "Absents this Month", "Adjustment of Days", "Total Payable Days",
+    "Total Payable Billing", "Charges", "Out of Pocket Exp", "Arrears", "Total",
+    "CGST @9%", "SGST @9%", "Grand Total", "Remark",
+]
+
+# Columns of the Billing_System master summary
+SUMMARY_HEADERS = [
+    "Kind Attention Person", "Company Name", "PO Number", "Validity", "No of Employees",
+    "Total Billing", "Total Payable Billing", "Total Charges", "Total Out of Pocket",
+    "Total Arrears", "Total Amount", "CGST", "SGST", "IGST", "Grand Total",
+]
+
+
+# ================= REFERENCE (CELL BY CELL) =================
+def format_annexure_cell_by_cell(ws, num_data_rows, num_cols, numeric_col_indices):
+    orange_fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")
+    yellow_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+    bold_font = Font(bold=True, size=10)
+    thin_border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+    center_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+
+    ws.row_dimensions[1].height = 30
+    for col in range(1, num_cols + 1):
+        cell = ws.cell(row=1, column=col)
+        cell.fill = orange_fill
+        cell.font = bold_font
+        cell.border = thin_border
+        cell.alignment = center_alignment
+
+    for row in range(2, num_data_rows + 2):
+        for col in range(1, num_cols + 1):
+            cell = ws.cell(row=row, column=col)
+            cell.border = thin_border
+            if col in numeric_col_indices:
+                cell.number_format = '0'
+
+    total_row = num_data_rows + 2
+    for col in range(1, num_cols + 1):
+        cell = ws.cell(row=total_row, column=col)
+        cell.fill = yellow_fill
+        cell.font = bold_font
+        cell.border = thin_border
+        cell.alignment = center_alignment
+        if col in numeric_col_indices:
+            cell.number_format = '0'
+
+    for col in range(1, num_cols + 1):
+        ws.column_dimensions[chr(64 + col)].width = 18
+
+
+def format_summary_cell_by_cell(ws, headers, num_data_rows, non_numeric_headers):
+    for col_idx in range(1, len(headers) + 1):
+        cell = ws.cell(row=1, column=col_idx)
+        cell.fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+    ws.row_dimensions[1].height = 30
+
+    for row_idx in range(2, num_data_rows + 2):
+        for col_idx, header in enumerate(headers, 1):
+            if header not in non_numeric_headers:
+                ws.cell(row=row_idx, column=col_idx).number_format = '0'
+
+    total_row = num_data_rows + 2
+    ws.cell(row=total_row, column=1).font = Font(bold=True)
+    ws.cell(row=total_row, column=1).fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+    for col_idx in range(3, len(headers) + 1):
+        if headers[col_idx - 1] in non_numeric_headers:
+            continue
+        cell = ws.cell(row=total_row, column=col_idx)
+        cell.font = Font(bold=True)
+        cell.fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+        cell.number_format = '0'
+
+    for col in range(1, len(headers) + 1):
+        ws.column_dimensions[chr(64 + col)].width = 18
+
+
+# ================= BENCHMARK =================
+def filled_sheet(headers, num_data_rows):
+    """New worksheet with a header, num_data_rows of numbers and a total row"""
+    wb = Workbook()
+    ws = wb.active
+    ws.append(headers)
+    for row in range(num_data_rows):
+        ws.append([row * 1.5 + col for col in range(len(headers))])
+    ws.append(["TOTAL"] + [f"=SUM(B2:B{num_data_rows + 1})"] * (len(headers) - 1))
+    return ws
+
+
+def cell_styles(ws):
+    return [
+        repr((cell.font, cell.fill, cell.border, cell.alignment, cell.number_format))
+        for row in ws.iter_rows()
+        for cell in row
+    ]
+
+
+def stages(generator):
+    """(stage, headers, {variant: format(ws, num_data_rows)})"""
+    numeric_cols = generator.numeric_column_indices(ANNEX_COLUMNS)
+    non_numeric = generator.SUMMARY_NON_NUMERIC_HEADERS
+    return [
+        ("annexure", ANNEX_COLUMNS, {
+            "cell_by_cell": lambda ws, n: format_annexure_cell_by_cell(ws, n, len(ANNEX_COLUMNS), numeric_cols),
+            "registry": lambda ws, n: generator.format_annexure_sheet(ws, n, len(ANNEX_COLUMNS), ANNEX_COLUMNS),
+        }),
+        ("master summary", SUMMARY_HEADERS, {
+            "cell_by_cell": lambda ws, n: format_summary_cell_by_cell(ws, SUMMARY_HEADERS, n, non_numeric),
+            "registry": lambda ws, n: generator.format_master_summary_sheet(ws, SUMMARY_HEADERS, n),
+        }),
+    ]
+
+
+def time_format(format_sheet, headers, num_data_rows, repeat):
+    """Best of `repeat` runs on freshly filled sheets, in seconds"""
+    best = None
+    for _ in range(repeat):
+        ws = filled_sheet(headers, num_data_rows)
+        start = time.perf_counter()
+        format_sheet(ws, num_data_rows)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Annexure / master summary formatting benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS,
+                        help="data rows per sheet (default: 100 1k 10k)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, best is kept")
+    parser.add_argument("--output", default=None, help="optional JSON results file")
+    args = parser.parse_args()
+
+    generator = load_program("recurring").modules["unified_bill_generator"]
+    results = []
+
+    for stage, headers, variants in stages(generator):
+        # Both variants must style every cell the same way
+        check_rows = min(args.rows)
+        styled = {}
+        for variant, format_sheet in variants.items():
+            ws = filled_sheet(headers, check_rows)
+            format_sheet(ws, check_rows)
+            styled[variant] = cell_styles(ws)
+        if styled["cell_by_cell"] != styled["registry"]:
+            raise SystemExit(f"{stage}: registry formatting differs from the cell-by-cell reference")
+
+        for num_data_rows in args.rows:
+            cells = (num_data_rows + 2) * len(headers)
+            seconds = {
+                variant: time_format(format_sheet, headers, num_data_rows, args.repeat)
+                for variant, format_sheet in variants.items()
+            }
+            row = {
+                "stage": stage,
+                "rows": num_data_rows,
+                "cells": cells,
+                "cell_by_cell_ms_per_1k_cells": round(seconds["cell_by_cell"] * 1e6 / cells, 3),
+                "registry_ms_per_1k_cells": round(seconds["registry"] * 1e6 / cells, 3),
+                "speedup": round(seconds["cell_by_cell"] / seconds["registry"], 2),
+            }
+            results.append(row)
+            print(
+                f"  {stage:<15} {num_data_rows:>7} rows {cells:>9} cells   "
+                f"cell by cell {row['cell_by_cell_ms_per_1k_cells']:>8.3f} ms/1k cells   "
+                f"registry {row['registry_ms_per_1k_cells']:>8.3f} ms/1k cells   "
+                f"x{row['speedup']:.2f}"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "repeat": args.repeat,
+                "results": results,
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark one Billing_System or One_Time run
+============================================
+Runs the billing stages of one program against a synthetic data set and
+writes per-stage timings to a JSON file. run_benchmarks.py starts this in
+a fresh process per program and size, since both programs use the same
+module names (config, billing_engine, ...) and peak RSS is per process.
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def load_program(program, workdir, billing_month, billing_year):
+    """
+    Import a program's modules with its config pointed at workdir:
+    inputs from workdir/Data, bills to workdir/<program>_Bills, no templates,
+    billing month of the synthetic data.
+    """
+    program_dir = os.path.join(REPO_ROOT, program)
+    sys.path.insert(0, REPO_ROOT)
+    sys.path.insert(0, program_dir)
+
+    # Every module does `from config import *`, so config has to be
+    # patched before anything else is imported
+    import config
+    data_dir = os.path.join(workdir, "Data")
+    config.INPUT_EMPLOYEE_FILE = os.path.join(data_dir, "Employee.xlsx")
+    config.INPUT_CHARGES_FILE = os.path.join(
+        data_dir, "Charges_OneTime.xlsx" if program == "One_Time" else "Charges.xlsx"
+    )
+    config.INPUT_PO_FILE = os.path.join(data_dir, "PO_Number.xlsx")
+    config.TEMPLATE_FOLDER = os.path.join(workdir, "Templates")
+    config.OUTPUT_FOLDER = os.path.join(workdir, f"{program}_Bills")
+    config.INCREMENTAL_BILLS = False
+    config.BILLING_MONTH = billing_month
+    config.BILLING_YEAR = billing_year
+    os.makedirs(config.TEMPLATE_FOLDER, exist_ok=True)
+
+    import main
+    import billing_engine
+    import unified_bill_generator
+    return config, main, billing_engine, unified_bill_generator
+
+
+class StageTimer:
+    """Collects one result row per timed stage"""
+
+    def __init__(self, program, employees):
+        self.program = program
+        self.employees = employees
+        self.results = []
+
+    def run(self, stage, rows, func, *args, **kwargs):
+        start = time.perf_counter()
+        value = func(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        self.results.append({
+            "program": self.program,
+            "employees": self.employees,
+            "stage": stage,
+            "rows": rows,
+            "seconds": round(seconds, 4),
+            "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None,
+            "peak_rss_mb": peak_rss_mb(),
+        })
+        return value
+
+
+def run(program, workdir, employees, workers, billing_month, billing_year):
+    config, main, billing_engine, generator = load_program(program, workdir, billing_month, billing_year)
+    timer = StageTimer(program, employees)
+
+    df = main.load_employee_data(config.INPUT_EMPLOYEE_FILE)
+
+    if program == "One_Time":
+        annex_df, _ = timer.run(
+            "process_onetime_billing", len(df),
+            billing_engine.process_onetime_billing, df, config.BILLING_MONTH, config.BILLING_YEAR
+        )
+    else:
+        annex_df, _ = timer.run("process_billing", len(df), billing_engine.process_billing, df)
+
+    if annex_df.empty:
+        return timer.results
+
+    # Time the master summary on its own: capture its arguments during
+    # generate_unified_bills and call it afterwards
+    write_master_summary = generator.generate_master_summary
+    captured = {}
+    generator.generate_master_summary = lambda *args: captured.setdefault("args", args)
+
+    timer.run("generate_unified_bills", len(annex_df), generator.generate_unified_bills, annex_df, workers=workers)
+
+    summaries = captured["args"][0]
+    timer.run("generate_master_summary", len(summaries), write_master_summary, *captured["args"])
+
+    return timer.results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--program", choices=["Billing_System", "One_Time"], required=True)
+    parser.add_argument("--workdir", required=True, help="directory holding Data/ for this size")
+    parser.add_argument("--employees", type=int, required=True)
+    parser.add_argument("--workers", type=int, default=1, help="bill workers (0 = all CPUs)")
+    parser.add_argument("--billing-month", type=int, required=True)
+    parser.add_argument("--billing-year", type=int, required=True)
+    parser.add_argument("--result", required=True, help="JSON file to write the stage results to")
+    args = parser.parse_args()
+
+    results = run(
+        args.program, os.path.abspath(args.workdir), args.employees, args.workers,
+        args.billing_month, args.billing_year
+    )
+
+    with open(args.result, "w", encoding="utf-8") as f:
+        json.dump(results, f)
+
+
+if __name__ == "__main__":
+    main()
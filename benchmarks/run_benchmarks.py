@@ -0,0 +1,134 @@
+"""
+Billing Benchmark Suite
+=======================
+Generates synthetic data sets and times the billing stages of both
+programs on them:
+
+    Billing_System: process_billing, generate_unified_bills, generate_master_summary
+    One_Time:       process_onetime_billing, generate_unified_bills, generate_master_summary
+
+Every stage is reported with rows/sec and the process's peak RSS in a JSON
+file, so runs can be compared to catch regressions.
+
+Usage (from the repository root):
+    python benchmarks/run_benchmarks.py --sizes 1000 10000
+    python benchmarks/run_benchmarks.py --output bench_results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_data import write_dataset
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+PROGRAMS = ["Billing_System", "One_Time"]
+
+# Billing month the synthetic data is generated and billed for
+BILLING_MONTH = 2
+BILLING_YEAR = 2026
+
+
+def run_program(program, workdir, employees, workers):
+    """Run bench_program.py for one program in a fresh process"""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        result_path = f.name
+    try:
+        log_path = os.path.join(workdir, f"{program}.log")
+        with open(log_path, "w", encoding="utf-8") as log:
+            completed = subprocess.run(
+                [
+                    sys.executable, os.path.join(BENCH_DIR, "bench_program.py"),
+                    "--program", program,
+                    "--workdir", workdir,
+                    "--employees", str(employees),
+                    "--workers", str(workers),
+                    "--billing-month", str(BILLING_MONTH),
+                    "--billing-year", str(BILLING_YEAR),
+                    "--result", result_path,
+                ],
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+        if completed.returncode != 0:
+            raise RuntimeError(f"{program} benchmark failed for {employees} employees, see {log_path}")
+        with open(result_path, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.remove(result_path)
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "openpyxl": openpyxl.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Billing benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="employee counts to benchmark (default: 1k 10k 100k 1M)")
+    parser.add_argument("--programs", nargs="+", choices=PROGRAMS, default=PROGRAMS)
+    parser.add_argument("--workers", type=int, default=1, help="bill workers (0 = all CPUs)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=None,
+                        help="where data sets and bills are written (default: a temporary directory)")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file")
+    args = parser.parse_args()
+
+    root = args.workdir or tempfile.mkdtemp(prefix="billing_bench_")
+    results = []
+
+    for employees in args.sizes:
+        workdir = os.path.abspath(os.path.join(root, f"employees_{employees}"))
+
+        start = time.perf_counter()
+        write_dataset(os.path.join(workdir, "Data"), employees, BILLING_MONTH, BILLING_YEAR, args.seed)
+        print(f"Generated {employees} employees in {time.perf_counter() - start:.1f}s ({workdir})")
+
+        for program in args.programs:
+            for row in run_program(program, workdir, employees, args.workers):
+                results.append(row)
+                print(
+                    f"  {program:<15} {row['stage']:<25} {row['rows']:>9} rows "
+                    f"{row['seconds']:>9.2f}s {row['rows_per_sec'] or 0:>12.0f} rows/s "
+                    f"{row['peak_rss_mb']:>8.1f} MB"
+                )
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "billing_month": BILLING_MONTH,
+        "billing_year": BILLING_YEAR,
+        "workers": args.workers,
+        "seed": args.seed,
+        "environment": environment(),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
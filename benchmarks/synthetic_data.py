@@ -0,0 +1,217 @@
+"""
+Synthetic Billing Data
+======================
+Generates Employee.xlsx, Charges.xlsx, Charges_OneTime.xlsx and
+PO_Number.xlsx shaped like the real Data/ files, at any size, for
+benchmarking. Mixes of billing cycles, workweeks, DOJ/LDW, IGST and
+differential rows follow the real data, spread over many
+Kind Attention Person / Company groups.
+"""
+
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+
+COMPANIES = ["Jobuss", "Aradhya", "ABNJ"]
+COMPANY_WEIGHTS = [0.85, 0.10, 0.05]
+
+BILLING_CYCLES = ["21st to 20th", "1st to 31st", "26th to 25th", "25th to 24th", None]
+BILLING_CYCLE_WEIGHTS = [0.54, 0.36, 0.06, 0.02, 0.02]
+
+WORKWEEKS = ["5 day", "6 day", None]
+WORKWEEK_WEIGHTS = [0.80, 0.18, 0.02]
+
+EMPLOYEE_TYPES = ["Existing", "New Joiner", "Leaving", "Diffrential"]
+EMPLOYEE_TYPE_WEIGHTS = [0.86, 0.06, 0.05, 0.03]
+
+GST_TYPES = ["CGST/SGST", "IGST", None]
+GST_WEIGHTS = [0.93, 0.05, 0.02]
+
+POSITIONS = ["Executive", "Manager", None]
+POSITION_WEIGHTS = [0.60, 0.10, 0.30]
+
+
+def kap_count(employees):
+    """Number of Kind Attention Persons for a data set of this size"""
+    return int(min(2000, max(10, employees // 200)))
+
+
+def kap_names(count):
+    return [f"KAP {i:04d}" for i in range(count)]
+
+
+def _choice(rng, values, weights, size):
+    return np.array(values, dtype=object)[rng.choice(len(values), size=size, p=weights)]
+
+
+def _dates(rng, first, last, size):
+    """Uniform random dates between first and last (inclusive)"""
+    span = (last - first).days + 1
+    offsets = rng.integers(0, span, size=size)
+    return np.datetime64(first) + offsets.astype("timedelta64[D]")
+
+
+def _with_dashes(rng, values, fraction):
+    """Blank some cells out with '-' the way the attendance sheet does"""
+    values = values.astype(object)
+    values[rng.random(len(values)) < fraction] = "-"
+    return values
+
+
+def generate_employees(employees, billing_month, billing_year, seed=0):
+    """
+    Employee sheet with the same columns as Data/Employee.xlsx.
+
+    Args:
+        employees: number of rows
+        billing_month / billing_year: month the data is billed for
+        seed: random seed, so a size always produces the same data
+
+    Returns:
+        DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    n = employees
+
+    kaps = np.array(kap_names(kap_count(n)), dtype=object)
+    month_start = date(billing_year, billing_month, 1)
+    window_start = month_start - timedelta(days=45)
+    window_end = month_start + timedelta(days=40)
+
+    employee_type = _choice(rng, EMPLOYEE_TYPES, EMPLOYEE_TYPE_WEIGHTS, n)
+    new_joiner = employee_type == "New Joiner"
+    leaving = employee_type == "Leaving"
+
+    # Existing staff joined years ago; new joiners around the billing month,
+    # some after their cycle ends (error rows)
+    doj = _dates(rng, date(2015, 1, 1), month_start - timedelta(days=60), n)
+    doj[new_joiner] = _dates(rng, window_start, window_end, int(new_joiner.sum()))
+    # The sheet mixes dd/mm/yyyy text with real dates
+    doj_text = pd.Series(doj).dt.strftime("%d/%m/%Y").to_numpy(dtype=object)
+    as_timestamp = rng.random(n) < 0.2
+    doj_text[as_timestamp] = pd.to_datetime(doj[as_timestamp]).to_numpy(dtype=object)
+
+    # Leavers leave around the billing month, some before their cycle starts
+    ldw = np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+    ldw[leaving] = _dates(rng, window_start, window_end, int(leaving.sum()))
+
+    billing = rng.integers(15, 200, size=n) * 500.0
+    diff = np.zeros(n, dtype=np.int64)
+    differential = employee_type == "Diffrential"
+    diff[differential] = rng.integers(-20, 60, size=int(differential.sum())) * 500
+
+    total_present = rng.integers(15, 27, size=n).astype(float)
+    out_of_pocket = np.where(rng.random(n) < 0.08, rng.integers(100, 9000, size=n), np.nan)
+    arrears = np.where(rng.random(n) < 0.03, rng.integers(500, 20000, size=n), np.nan)
+
+    remark = np.full(n, None, dtype=object)
+    remark[new_joiner] = "New Joiner"
+    remark[leaving] = "LDW " + pd.Series(ldw[leaving]).dt.strftime("%d-%m-%Y").to_numpy(dtype=object)
+
+    return pd.DataFrame({
+        "Kind Attention Person": kaps[rng.integers(0, len(kaps), size=n)],
+        "Employee Name": [f"EMPLOYEE {i}" for i in range(n)],
+        "Employee Code": [f"JB-{10000 + i}" for i in range(n)],
+        "Company Name": _choice(rng, COMPANIES, COMPANY_WEIGHTS, n),
+        "Date of Joining": doj_text,
+        "LDW": ldw,
+        "Employee Type": employee_type,
+        "Working At": _choice(rng, ["Reliance Industries Ltd", "Godrej Properties", "Tata Steel"], [0.6, 0.3, 0.1], n),
+        "Position": _choice(rng, POSITIONS, POSITION_WEIGHTS, n),
+        "Reporting Person": None,
+        "Billing": billing,
+        "Salary": billing,
+        "Diff": diff,
+        "Billing Cycle": _choice(rng, BILLING_CYCLES, BILLING_CYCLE_WEIGHTS, n),
+        "Workweek": _choice(rng, WORKWEEKS, WORKWEEK_WEIGHTS, n),
+        "No of Holidays": _with_dashes(rng, rng.integers(0, 4, size=n), 0.01),
+        "Total Present": total_present,
+        "Absents this Month": _with_dashes(rng, rng.integers(0, 3, size=n), 0.05),
+        "Adjustment of Days": _with_dashes(rng, rng.integers(0, 4, size=n), 0.05),
+        "Out of Pocket Exp": out_of_pocket,
+        "Arrears": arrears,
+        "GST": _choice(rng, GST_TYPES, GST_WEIGHTS, n),
+        "Remark": remark,
+    })
+
+
+def generate_charges(kaps, seed=0):
+    """
+    Recurring charges: one row per KAP and position, mostly fixed amounts,
+    with some proportionate and percentage charges
+    """
+    rng = np.random.default_rng(seed + 1)
+    rows = []
+    for kap in kaps:
+        kind = rng.random()
+        if kind < 0.6:
+            mode = "fixed" if rng.random() < 0.6 else "proportionate"
+            rows.append([kap, "Manager", "fixed", int(rng.integers(1, 21)) * 500, mode])
+            rows.append([kap, "Executive", "fixed", int(rng.integers(1, 11)) * 250, mode])
+        elif kind < 0.9:
+            mode = "fixed" if rng.random() < 0.5 else "proportionate"
+            rows.append([kap, None, "fixed", int(rng.integers(0, 11)) * 500, mode])
+        else:
+            rows.append([kap, None, "percentage", int(rng.integers(5, 16)), "proportionate"])
+    return pd.DataFrame(
+        rows,
+        columns=["Kind Attention Person", "Position", "Charge Type", "Charge Value", "Application Mode"]
+    )
+
+
+def generate_onetime_charges(kaps, seed=0):
+    """One-time recruitment charges for about a third of the KAPs"""
+    rng = np.random.default_rng(seed + 2)
+    rows = []
+    for kap in kaps:
+        kind = rng.random()
+        if kind < 0.2:
+            rows.append([kap, "Manager", "fixed", 30000, "fixed"])
+            rows.append([kap, "Executive", "fixed", 15000, "fixed"])
+        elif kind < 0.35:
+            rows.append([kap, None, "percentage", int(rng.integers(5, 11)) * 10, "fixed"])
+    return pd.DataFrame(
+        rows,
+        columns=["Kind Attention Person", "Position", "Charge Type", "Charge Value", "Application Mode"]
+    )
+
+
+def generate_po_numbers(kaps, seed=0):
+    """PO Number rows for about half of the KAP/Company pairs"""
+    rng = np.random.default_rng(seed + 3)
+    rows = [
+        [kap, company, 550000000 + i, "From: 01.08.2025 To: 31.01.2026"]
+        for i, (kap, company) in enumerate((kap, company) for kap in kaps for company in COMPANIES)
+        if rng.random() < 0.5
+    ]
+    return pd.DataFrame(rows, columns=["Kind Attention Person", "Company", "PO Number ", "Validity"])
+
+
+def write_dataset(data_dir, employees, billing_month, billing_year, seed=0):
+    """
+    Write Employee.xlsx, Charges.xlsx, Charges_OneTime.xlsx and
+    PO_Number.xlsx for a data set of the given size into data_dir.
+
+    Returns:
+        dict: file name -> path
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    kaps = kap_names(kap_count(employees))
+
+    frames = {
+        "Employee.xlsx": generate_employees(employees, billing_month, billing_year, seed),
+        "Charges.xlsx": generate_charges(kaps, seed),
+        "Charges_OneTime.xlsx": generate_onetime_charges(kaps, seed),
+        "PO_Number.xlsx": generate_po_numbers(kaps, seed),
+    }
+
+    paths = {}
+    for name, df in frames.items():
+        path = os.path.join(data_dir, name)
+        with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+            df.to_excel(writer, index=False)
+        paths[name] = path
+    return paths
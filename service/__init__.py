@@ -0,0 +1,15 @@
+"""
+Billing Service
+===============
+Long-running HTTP service for Billing_System and One_Time runs, with
+warm worker processes and a bounded job queue.
+
+    python -m service.app
+"""
+
+__all__ = [
+    "app",
+    "jobs",
+    "programs",
+    "settings"
+]
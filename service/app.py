@@ -0,0 +1,133 @@
+"""
+Billing Service HTTP API
+========================
+    POST /jobs                        {"mode": "recurring" | "one-time", "month": 2, "year": 2026}
+    GET  /jobs                        all jobs
+    GET  /jobs/<id>                   job status and output files
+    GET  /jobs/<id>/log               captured program output
+    GET  /jobs/<id>/files/<name>      one output file
+    GET  /jobs/<id>/download          all output files as a zip
+    GET  /health                      queue and worker status
+
+Run with `python -m service.app` from the repository root.
+"""
+
+import io
+import os
+import zipfile
+
+from flask import Flask, jsonify, request, send_file, send_from_directory
+
+from service.jobs import JobManager, QueueFull
+from service.settings import (
+    SERVICE_HOST,
+    SERVICE_JOBS_DIR,
+    SERVICE_MAX_QUEUE,
+    SERVICE_PORT,
+    SERVICE_WORKERS,
+)
+
+
+def create_app(manager=None):
+    """
+    Build the Flask app.
+
+    Args:
+        manager: JobManager to use; defaults to one built from service.settings
+    """
+    if manager is None:
+        manager = JobManager(SERVICE_JOBS_DIR, workers=SERVICE_WORKERS, max_queue=SERVICE_MAX_QUEUE)
+
+    app = Flask(__name__)
+    app.config["JOB_MANAGER"] = manager
+
+    def error(message, status):
+        return jsonify({"error": message}), status
+
+    def find_job(job_id):
+        job = manager.get(job_id)
+        if job is None:
+            return None, error(f"No job {job_id}", 404)
+        return job, None
+
+    @app.get("/health")
+    def health():
+        return jsonify({
+            "status": "ok",
+            "workers": manager.workers,
+            "max_queue": manager.max_queue,
+            "pending": manager.pending(),
+        })
+
+    @app.post("/jobs")
+    def submit_job():
+        payload = request.get_json(silent=True) or {}
+        try:
+            job = manager.submit(payload.get("mode"), payload.get("month"), payload.get("year"))
+        except ValueError as e:
+            return error(str(e), 400)
+        except QueueFull as e:
+            response, status = error(str(e), 429)
+            response.headers["Retry-After"] = "30"
+            return response, status
+
+        response = jsonify(job.to_dict())
+        response.headers["Location"] = f"/jobs/{job.id}"
+        return response, 202
+
+    @app.get("/jobs")
+    def list_jobs():
+        return jsonify([job.to_dict() for job in manager.list()])
+
+    @app.get("/jobs/<job_id>")
+    def job_status(job_id):
+        job, failure = find_job(job_id)
+        if failure:
+            return failure
+        return jsonify(job.to_dict())
+
+    @app.get("/jobs/<job_id>/log")
+    def job_log(job_id):
+        job, failure = find_job(job_id)
+        if failure:
+            return failure
+        return job.result.get("log", ""), 200, {"Content-Type": "text/plain; charset=utf-8"}
+
+    @app.get("/jobs/<job_id>/files/<path:name>")
+    def job_file(job_id, name):
+        job, failure = find_job(job_id)
+        if failure:
+            return failure
+        if name not in job.result.get("files", []):
+            return error(f"No file {name} in job {job_id}", 404)
+        return send_from_directory(job.output_dir, name, as_attachment=True)
+
+    @app.get("/jobs/<job_id>/download")
+    def job_download(job_id):
+        job, failure = find_job(job_id)
+        if failure:
+            return failure
+        if job.status != "done":
+            return error(f"Job {job_id} is {job.to_dict()['status']}", 409)
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name in job.result["files"]:
+                archive.write(os.path.join(job.output_dir, name), name)
+        buffer.seek(0)
+        return send_file(
+            buffer,
+            mimetype="application/zip",
+            as_attachment=True,
+            download_name=f"{job.mode}_{job.year}_{job.month:02d}_{job.id}.zip",
+        )
+
+    return app
+
+
+if __name__ == "__main__":
+    app = create_app()
+    try:
+        app.run(host=SERVICE_HOST, port=SERVICE_PORT, threaded=True)
+    finally:
+        app.config["JOB_MANAGER"].shutdown()
@@ -0,0 +1,206 @@
+"""
+Multi-Month Backfill
+====================
+Re-bills a range of months in one run. The employee sheet is read and
+cleaned once, and every worker loads the charges, PO mapping and
+templates once. Each month then runs the billing engine and writes its
+bills and master summary to its own folder:
+
+    <output>/<YYYY-MM>/
+
+Usage (from the repository root):
+    python -m service.backfill recurring 2025-04 2026-03
+    python -m service.backfill one-time 2026-01 2026-03 --workers 1 --output Rebill
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from io import StringIO
+
+from service.jobs import get_program, run_job, validate_job
+from service.settings import BACKFILL_DIR, BACKFILL_WORKERS
+
+
+# ================= PERIODS =================
+def parse_period(text):
+    """
+    Parse a "YYYY-MM" billing period.
+
+    Returns:
+        tuple: (year, month)
+
+    Raises:
+        ValueError: when text is not a valid period
+    """
+    try:
+        year, month = (int(part) for part in text.split("-"))
+    except (AttributeError, ValueError):
+        raise ValueError(f"Billing period must look like YYYY-MM, got {text!r}")
+    validate_job("recurring", month, year)
+    return year, month
+
+
+def billing_periods(start, end):
+    """
+    Every (year, month) from start to end inclusive.
+
+    Args:
+        start, end: (year, month) tuples
+    """
+    if end < start:
+        raise ValueError(f"Backfill end {end[0]}-{end[1]:02d} is before start {start[0]}-{start[1]:02d}")
+
+    year, month = start
+    periods = []
+    while (year, month) <= end:
+        periods.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return periods
+
+
+def period_folder(output_root, year, month):
+    return os.path.join(output_root, f"{year}-{month:02d}")
+
+
+# ================= INPUTS =================
+def load_shared_inputs(mode):
+    """
+    Read and clean the employee sheet once for every period of a backfill.
+
+    Returns:
+        pd.DataFrame: output of the program's load_employee_data
+    """
+    program = get_program(mode)
+    with redirect_stdout(StringIO()):
+        return program.main.load_employee_data(ctx=program.context())
+
+
+# ================= WORKER SIDE =================
+# Employee sheet handed to this worker by the backfill
+_employee_df = None
+
+
+def warm_backfill_worker(mode, employee_df):
+    """Process pool initializer: keep the shared inputs and warm the program"""
+    global _employee_df
+    _employee_df = employee_df
+    get_program(mode).warm()
+
+
+def run_period(mode, year, month, output_dir):
+    """Bill one period with the employee sheet this worker was given"""
+    started = time.perf_counter()
+    result = run_job(mode, month, year, output_dir, employee_df=_employee_df)
+    result["seconds"] = round(time.perf_counter() - started, 2)
+    return result
+
+
+# ================= BACKFILL =================
+def run_backfill(mode, start, end, output_root=None, workers=BACKFILL_WORKERS):
+    """
+    Bill every month from start to end.
+
+    Args:
+        mode: "recurring" or "one-time"
+        start, end: (year, month) tuples, inclusive
+        output_root: folder receiving one YYYY-MM subfolder per period
+                     (default BACKFILL_DIR/<mode>)
+        workers: periods billed at once (1 = serial in-process, 0 = all CPUs)
+
+    Returns:
+        list: one dict per period with year, month, output_dir, status,
+              files, seconds and error, in period order
+    """
+    periods = billing_periods(start, end)
+    output_root = os.path.abspath(output_root or os.path.join(BACKFILL_DIR, mode))
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(periods)))
+
+    print(f"Backfill {mode}: {len(periods)} period(s), {workers} worker(s)")
+    print(f"Output: {output_root}")
+
+    employee_df = load_shared_inputs(mode)
+    print(f"Employee sheet loaded once: {len(employee_df)} rows")
+
+    def outcome(year, month, result=None, error=None):
+        return {
+            "year": year,
+            "month": month,
+            "output_dir": period_folder(output_root, year, month),
+            "status": "done" if error is None else "failed",
+            "files": len(result["files"]) if result else 0,
+            "seconds": result["seconds"] if result else None,
+            "error": error,
+        }
+
+    results = {}
+    if workers == 1:
+        warm_backfill_worker(mode, employee_df)
+        for year, month in periods:
+            try:
+                result = run_period(mode, year, month, period_folder(output_root, year, month))
+                results[year, month] = outcome(year, month, result=result)
+            except Exception as e:
+                results[year, month] = outcome(year, month, error=f"{type(e).__name__}: {e}")
+            print_period(results[year, month])
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=warm_backfill_worker,
+            initargs=(mode, employee_df),
+        ) as executor:
+            futures = {
+                executor.submit(run_period, mode, year, month, period_folder(output_root, year, month)): (year, month)
+                for year, month in periods
+            }
+            for future in as_completed(futures):
+                year, month = futures[future]
+                error = future.exception()
+                if error is None:
+                    results[year, month] = outcome(year, month, result=future.result())
+                else:
+                    results[year, month] = outcome(year, month, error=f"{type(error).__name__}: {error}")
+                print_period(results[year, month])
+
+    return [results[period] for period in periods]
+
+
+def print_period(result):
+    if result["error"] is None:
+        print(f"  {result['year']}-{result['month']:02d}  {result['files']:>4} files  {result['seconds']:>8.2f}s  OK")
+    else:
+        print(f"  {result['year']}-{result['month']:02d}  FAILED: {result['error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bill a range of months in one run")
+    parser.add_argument("mode", choices=["recurring", "one-time"])
+    parser.add_argument("start", help="first period, YYYY-MM")
+    parser.add_argument("end", help="last period, YYYY-MM")
+    parser.add_argument("--output", help="output root (default Backfill/<mode>)")
+    parser.add_argument(
+        "--workers", type=int, default=BACKFILL_WORKERS,
+        help="periods billed at once (1 = serial, 0 = all CPUs)",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        start, end = parse_period(args.start), parse_period(args.end)
+        started = time.perf_counter()
+        results = run_backfill(args.mode, start, end, output_root=args.output, workers=args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+
+    failed = [r for r in results if r["error"] is not None]
+    print(f"\nBackfill finished in {time.perf_counter() - started:.2f}s: "
+          f"{len(results) - len(failed)} done, {len(failed)} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
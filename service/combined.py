@@ -0,0 +1,185 @@
+"""
+Combined Recurring + One-Time Run
+=================================
+Bills one period with both programs in a single run. The employee sheet
+is read once and its dates and numbers are parsed once; each program then
+gets its own copy in the shape its load_employee_data returns. Both
+programs run at the same time and queue their bills on one pool of warm
+worker processes, so one program's bills are built while the other is
+still in its billing engine or writing its master summary.
+
+Bills go to each program's usual output folder (OUTPUT_FOLDER in its
+config.py), exactly as running both main.py scripts would.
+
+Usage (from the repository root):
+    python -m service.combined
+    python -m service.combined --month 3 --year 2026 --workers 2
+    python -m service.combined --resume
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from service.jobs import get_program, validate_job, warm_worker
+from service.programs import PROGRAMS
+from service.settings import COMBINED_WORKERS
+from shared.helpers import clean_numeric
+from shared.input_cache import read_excel_cached
+
+
+# Employee sheet date columns, parsed day-first
+EMPLOYEE_DATE_COLUMNS = ["Date of Joining", "LDW"]
+
+
+# ================= INPUTS =================
+def normalize_employee_data(df, numeric_cols):
+    """
+    Parse the date columns and coerce the numeric columns of the employee
+    sheet once for every program.
+
+    Dates stay datetimes here; each program's clean_employee_data turns
+    them into what it works with (e.g. Billing_System uses plain dates).
+    """
+    for col in EMPLOYEE_DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce", dayfirst=True)
+    return clean_numeric(df, numeric_cols)
+
+
+def load_combined_inputs(programs, contexts):
+    """
+    Read and normalize the employee sheet once for all programs.
+
+    Args:
+        programs: {mode: Program}
+        contexts: {mode: RunContext}
+
+    Returns:
+        dict: {mode: DataFrame as returned by that program's load_employee_data}
+    """
+    numeric_cols = list(dict.fromkeys(
+        col for program in programs.values() for col in program.main.EMPLOYEE_NUMERIC_COLUMNS
+    ))
+
+    # Programs normally share Data/Employee.xlsx; read each distinct file once
+    normalized = {}
+    frames = {}
+    for mode, program in programs.items():
+        ctx = contexts[mode]
+        path = os.path.abspath(ctx.input_employee_file)
+        if path not in normalized:
+            df = read_excel_cached(path, use_cache=ctx.input_cache)
+            normalized[path] = normalize_employee_data(df, numeric_cols)
+        # Already parsed, so this only adapts the frame to the program
+        frames[mode] = program.main.clean_employee_data(normalized[path].copy())
+    return frames
+
+
+# ================= SHARED JOB POOL =================
+def run_program_job(mode, module, name, job):
+    """Worker side: run one program's job function, looked up by name"""
+    return getattr(get_program(mode).modules[module], name)(job)
+
+
+class ProgramPool:
+    """
+    One program's view of the shared worker pool (see
+    shared.helpers.run_jobs). Job functions travel by mode, module and
+    name, because both programs' modules have the same names.
+    """
+
+    def __init__(self, executor, mode):
+        self.executor = executor
+        self.mode = mode
+
+    def submit(self, func, job):
+        return self.executor.submit(run_program_job, self.mode, func.__module__, func.__name__, job)
+
+
+# ================= COMBINED RUN =================
+def run_combined(month=None, year=None, workers=COMBINED_WORKERS, resume=False):
+    """
+    Bill one period with both programs.
+
+    Args:
+        month, year: billing period (default each program's config)
+        workers: worker processes building bills (0 = all CPUs)
+        resume: skip bills an interrupted run already finished
+
+    Returns:
+        dict: {mode: error message, or None when the program finished}
+    """
+    overrides = {}
+    if month is not None:
+        overrides["billing_month"] = month
+    if year is not None:
+        overrides["billing_year"] = year
+    if resume:
+        overrides["resume"] = True
+
+    programs = {mode: get_program(mode) for mode in PROGRAMS}
+    contexts = {mode: program.context(**overrides) for mode, program in programs.items()}
+    workers = max(1, workers or os.cpu_count() or 1)
+
+    print(f"Combined run: {', '.join(programs)} with {workers} bill worker(s)")
+
+    started = time.perf_counter()
+    frames = load_combined_inputs(programs, contexts)
+    print(f"Employee sheet read and normalized once in {time.perf_counter() - started:.2f}s")
+
+    errors = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_worker) as executor:
+        with ThreadPoolExecutor(max_workers=len(programs)) as runs:
+            futures = {
+                mode: runs.submit(
+                    program.main.main, frames[mode], contexts[mode], ProgramPool(executor, mode)
+                )
+                for mode, program in programs.items()
+            }
+            for mode, future in futures.items():
+                error = future.exception()
+                errors[mode] = None if error is None else f"{type(error).__name__}: {error}"
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bill one period with Billing_System and One_Time together")
+    parser.add_argument("--month", type=int, help="billing month (default from config)")
+    parser.add_argument("--year", type=int, help="billing year (default from config)")
+    parser.add_argument(
+        "--workers", type=int, default=COMBINED_WORKERS,
+        help="worker processes building bills (0 = all CPUs)",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="skip bills an interrupted run already finished (run_checkpoint.jsonl)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.month is not None or args.year is not None:
+        program = get_program("recurring")
+        try:
+            validate_job(
+                "recurring",
+                args.month if args.month is not None else program.config.BILLING_MONTH,
+                args.year if args.year is not None else program.config.BILLING_YEAR,
+            )
+        except ValueError as e:
+            parser.error(str(e))
+
+    started = time.perf_counter()
+    errors = run_combined(args.month, args.year, workers=args.workers, resume=args.resume)
+
+    print(f"\nCombined run finished in {time.perf_counter() - started:.2f}s")
+    for mode, error in errors.items():
+        print(f"  {mode:<10} {'OK' if error is None else 'FAILED: ' + error}")
+    return 1 if any(errors.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+Billing Job Queue
+=================
+Runs billing jobs (mode, month, year) on a pool of warm worker processes.
+
+Each worker imports both programs once, loads the charge mappers, PO
+mapping, inputs and templates up front, and keeps them for every job it
+runs. A job's month, year and output folder reach the program as a
+RunContext; the programs' module-level config is never changed.
+"""
+
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+
+from service.programs import PROGRAMS, REPO_ROOT, load_program
+
+
+class QueueFull(Exception):
+    """Raised when the job queue has no free slot"""
+
+
+# ================= WORKER SIDE =================
+# Programs loaded in this process, by mode
+_programs = {}
+
+
+def get_program(mode):
+    if mode not in _programs:
+        _programs[mode] = load_program(mode)
+    return _programs[mode]
+
+
+def warm_worker():
+    """Process pool initializer: load and warm both programs"""
+    os.chdir(REPO_ROOT)
+    for mode in PROGRAMS:
+        get_program(mode).warm()
+
+
+def run_job(mode, month, year, output_dir, employee_df=None):
+    """
+    Run one billing job in this process.
+
+    Args:
+        employee_df: pre-parsed employee sheet to bill instead of reading
+                     INPUT_EMPLOYEE_FILE (see main.main)
+
+    Returns:
+        dict: started, finished, files (relative to output_dir), log
+    """
+    program = get_program(mode)
+    os.makedirs(output_dir, exist_ok=True)
+
+    started = datetime.now()
+    log = StringIO()
+    ctx = program.context(
+        billing_month=month,
+        billing_year=year,
+        output_folder=output_dir,
+        output_dir=output_dir,
+        incremental_bills=False,
+        bill_workers=1,
+    )
+    with redirect_stdout(log):
+        program.main.main(employee_df, ctx)
+
+    files = sorted(
+        os.path.relpath(os.path.join(folder, name), output_dir)
+        for folder, _, names in os.walk(output_dir)
+        for name in names
+    )
+    return {
+        "started": started.isoformat(timespec="seconds"),
+        "finished": datetime.now().isoformat(timespec="seconds"),
+        "files": files,
+        "log": log.getvalue(),
+    }
+
+
+# ================= SERVICE SIDE =================
+class Job:
+    """One submitted billing job and its outcome"""
+
+    def __init__(self, mode, month, year, output_dir):
+        self.id = uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.month = month
+        self.year = year
+        self.output_dir = output_dir
+        self.status = "queued"
+        self.submitted = datetime.now().isoformat(timespec="seconds")
+        self.result = {}
+        self.error = None
+        self.future = None
+
+    def to_dict(self):
+        status = self.status
+        if status == "queued" and self.future is not None and self.future.running():
+            status = "running"
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "month": self.month,
+            "year": self.year,
+            "status": status,
+            "submitted": self.submitted,
+            "started": self.result.get("started"),
+            "finished": self.result.get("finished"),
+            "files": self.result.get("files", []),
+            "error": self.error,
+        }
+
+
+def validate_job(mode, month, year):
+    """
+    Check job parameters.
+
+    Returns:
+        tuple: (mode, month, year) with month/year as ints
+
+    Raises:
+        ValueError: on an unknown mode or an out-of-range month/year
+    """
+    if mode not in PROGRAMS:
+        raise ValueError(f"mode must be one of: {', '.join(PROGRAMS)}")
+    try:
+        month = int(month)
+        year = int(year)
+    except (TypeError, ValueError):
+        raise ValueError("month and year must be integers")
+    if not 1 <= month <= 12:
+        raise ValueError("month must be between 1 and 12")
+    if not 2000 <= year <= 2100:
+        raise ValueError("year must be between 2000 and 2100")
+    return mode, month, year
+
+
+class JobManager:
+    """
+    Bounded queue of billing jobs.
+
+    workers: worker processes (0 runs each job inline in the submitting
+             thread, which is what tests use)
+    max_queue: jobs that may be queued or running at once; submit()
+               raises QueueFull beyond that
+    """
+
+    def __init__(self, jobs_dir, workers=2, max_queue=8):
+        self.jobs_dir = jobs_dir
+        self.workers = workers
+        self.max_queue = max_queue
+        self.jobs = {}
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._lock = threading.Lock()
+        self._executor = self._new_executor() if workers > 0 else None
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=warm_worker)
+
+    def _replace_broken(self, executor):
+        """Swap in a fresh pool once a worker died; later failures of the same pool are ignored"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = self._new_executor()
+        executor.shutdown(wait=False)
+
+    def submit(self, mode, month, year):
+        mode, month, year = validate_job(mode, month, year)
+
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull(f"{self.max_queue} jobs are already queued or running")
+
+        job = Job(mode, month, year, None)
+        job.output_dir = os.path.join(self.jobs_dir, job.id)
+        with self._lock:
+            self.jobs[job.id] = job
+
+        if self._executor is None:
+            job.status = "running"
+            try:
+                self._record(job, result=run_job(mode, month, year, job.output_dir))
+            except Exception as e:
+                self._record(job, error=f"{type(e).__name__}: {e}", log=traceback.format_exc())
+        else:
+            executor = self._executor
+            try:
+                future = executor.submit(run_job, mode, month, year, job.output_dir)
+            except Exception as e:
+                # Broken pool (a worker died) or one shut down: the job fails, its slot is freed
+                if isinstance(e, BrokenProcessPool):
+                    self._replace_broken(executor)
+                self._record(job, error=f"{type(e).__name__}: {e}")
+                return job
+            job.future = future
+            future.add_done_callback(lambda future: self._finished(job, future, executor))
+        return job
+
+    def _finished(self, job, future, executor=None):
+        error = future.exception()
+        if error is None:
+            self._record(job, result=future.result())
+        else:
+            if isinstance(error, BrokenProcessPool):
+                self._replace_broken(executor)
+            self._record(job, error=f"{type(error).__name__}: {error}")
+
+    def _record(self, job, result=None, error=None, log=None):
+        if error is None:
+            job.result = result
+            job.status = "done"
+        else:
+            job.result = {"log": log} if log else {}
+            job.error = error
+            job.status = "failed"
+        self._slots.release()
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self.jobs.values())
+
+    def pending(self):
+        return sum(1 for job in self.list() if job.status == "queued" or job.status == "running")
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
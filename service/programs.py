@@ -0,0 +1,116 @@
+"""
+Billing Programs Inside One Process
+===================================
+Billing_System and One_Time are written as scripts: each puts its own
+folder on sys.path and imports flat modules (config, billing_engine,
+unified_bill_generator, ...) whose names collide between the two.
+
+load_program() imports one program's modules and keeps them aside
+under its own Program object, so both can live in the same process.
+Jobs pass their settings (billing month, output folder, ...) as a
+RunContext from Program.context(), so nothing module-level changes
+while a job runs.
+"""
+
+import importlib
+import os
+import sys
+from contextlib import redirect_stdout
+from io import StringIO
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Flat modules of the two programs, in import order
+PROGRAM_MODULES = [
+    "config",
+    "helpers",
+    "charge_mapper",
+    "annexure_builder",
+    "billing_engine",
+    "excel_writer",
+    "unified_bill_generator",
+    "main",
+]
+
+# Job mode -> (program folder, charge mapper class)
+PROGRAMS = {
+    "recurring": ("Billing_System", "ChargeMapper"),
+    "one-time": ("One_Time", "ChargeMapperOneTime"),
+}
+
+
+class Program:
+    """One program's modules, importable side by side with the other's"""
+
+    def __init__(self, mode, folder, mapper_class, modules):
+        self.mode = mode
+        self.folder = folder
+        self.mapper_class = mapper_class
+        self.modules = modules
+
+    @property
+    def config(self):
+        return self.modules["config"]
+
+    @property
+    def main(self):
+        return self.modules["main"]
+
+    def context(self, **overrides):
+        """RunContext from this program's config.py with overrides applied"""
+        return self.config.run_context(**overrides)
+
+    def warm(self):
+        """
+        Load everything a run reads so the first job is as fast as the
+        rest: charge mapper, employee/PO inputs and every bill template.
+        """
+        from shared.input_cache import read_excel_cached
+        from shared.template_cache import template_cache
+
+        ctx = self.context()
+        with redirect_stdout(StringIO()):
+            mapper = getattr(self.modules["charge_mapper"], self.mapper_class)
+            mapper.for_context(ctx)
+
+            read_excel_cached(ctx.input_employee_file, use_cache=ctx.input_cache)
+
+            generator = self.modules["unified_bill_generator"]
+            if hasattr(generator, "load_po_index"):
+                generator.load_po_index(ctx=ctx)
+
+            if os.path.isdir(ctx.template_folder):
+                for name in os.listdir(ctx.template_folder):
+                    if name.endswith(".xlsx"):
+                        template_cache.digest(os.path.join(ctx.template_folder, name))
+
+
+def load_program(mode):
+    """
+    Import the program for a job mode without leaving its modules in
+    sys.modules, so the other program can be imported next.
+    """
+    if mode not in PROGRAMS:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {', '.join(PROGRAMS)}")
+
+    folder, mapper_class = PROGRAMS[mode]
+    program_dir = os.path.join(REPO_ROOT, folder)
+
+    if REPO_ROOT not in sys.path:
+        sys.path.append(REPO_ROOT)
+
+    saved_modules = {name: sys.modules.pop(name) for name in PROGRAM_MODULES if name in sys.modules}
+    sys.path.insert(0, program_dir)
+    try:
+        modules = {}
+        for name in PROGRAM_MODULES:
+            if os.path.exists(os.path.join(program_dir, f"{name}.py")):
+                modules[name] = importlib.import_module(name)
+    finally:
+        sys.path.remove(program_dir)
+        for name in PROGRAM_MODULES:
+            sys.modules.pop(name, None)
+        sys.modules.update(saved_modules)
+
+    return Program(mode, folder, mapper_class, modules)
@@ -0,0 +1,27 @@
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each job's bills are written to SERVICE_JOBS_DIR/<job id>/
+SERVICE_JOBS_DIR = os.path.join(PROJECT_ROOT, "Service_Jobs")
+
+# Worker processes running jobs (0 = run jobs inline, for tests)
+SERVICE_WORKERS = 2
+
+# Jobs that may be queued or running at once; more are rejected with 429
+SERVICE_MAX_QUEUE = 8
+
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 5000
+
+# Backfill runs write to BACKFILL_DIR/<mode>/<YYYY-MM>/ unless --output is given
+BACKFILL_DIR = os.path.join(PROJECT_ROOT, "Backfill")
+
+# Periods billed at once by a backfill (1 = serial in-process, 0 = all CPUs)
+BACKFILL_WORKERS = 0
+
+# Worker processes building the bills of a combined recurring + one-time run (0 = all CPUs)
+COMBINED_WORKERS = 0
+
+# Sharded runs share SHARDS_DIR/<mode>/ (one shard-<i>-of-<n> folder per shard) unless --root is given
+SHARDS_DIR = os.path.join(PROJECT_ROOT, "Shards")
@@ -0,0 +1,230 @@
+"""
+Sharded Runs
+============
+Splits one billing period across processes or machines that share a
+directory (see shared.sharding). Each shard bills its own groups into
+
+    <root>/shard-<index>-of-<count>/
+
+with a partial_summary.json; the merge step then writes the master
+summary (and the System_Error report of shard 0) to <root>.
+
+Usage (from the repository root):
+    python -m service.shards run recurring --shards 4 --shard 0
+    python -m service.shards merge recurring
+    python -m service.shards local recurring --shards 4 --by split_key
+
+"run" bills one shard (one per node), "merge" runs once every shard has
+finished, and "local" runs all shards as separate processes on this
+machine and merges them.
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from service.jobs import get_program, validate_job
+from service.programs import REPO_ROOT
+from service.settings import SHARDS_DIR
+from shared.checkpoint import atomic_output
+from shared.sharding import PARTIAL_SUMMARY_FILE, SHARD_BY, shard_folder
+
+
+def shard_root(mode, root=None):
+    """Shared directory of a sharded run (default SHARDS_DIR/<mode>)"""
+    return os.path.abspath(root or os.path.join(SHARDS_DIR, mode))
+
+
+def period_overrides(month=None, year=None):
+    overrides = {}
+    if month is not None:
+        overrides["billing_month"] = month
+    if year is not None:
+        overrides["billing_year"] = year
+    return overrides
+
+
+# ================= RUN ONE SHARD =================
+def run_shard(mode, index, count, root=None, by="company", month=None, year=None, workers=1, resume=False):
+    """
+    Bill one shard of a period into its folder under root.
+
+    Returns:
+        str: the shard's output folder
+    """
+    program = get_program(mode)
+    output_dir = shard_folder(shard_root(mode, root), index, count)
+    ctx = program.context(
+        output_folder=output_dir,
+        output_dir=output_dir,
+        shard_count=count,
+        shard_index=index,
+        shard_by=by,
+        bill_workers=workers,
+        resume=resume,
+        **period_overrides(month, year),
+    )
+    program.main.main(ctx=ctx)
+    return output_dir
+
+
+# ================= MERGE =================
+def merge_shards(mode, root=None, output_dir=None, month=None, year=None):
+    """
+    Write the master summary of a sharded run from its partial summaries.
+
+    Args:
+        output_dir: folder receiving the master summary and System_Error
+                    report (default root)
+
+    Returns:
+        list: partial summaries in shard order
+    """
+    program = get_program(mode)
+    root = shard_root(mode, root)
+    output_dir = os.path.abspath(output_dir or root)
+    ctx = program.context(output_folder=output_dir, output_dir=output_dir, **period_overrides(month, year))
+
+    partials = program.modules["unified_bill_generator"].generate_merged_summary(root, ctx)
+
+    # Every shard finds the same errors; shard 0 wrote them
+    error_file = os.path.join(shard_folder(root, 0, partials[0]["shard_count"]), "System_Error.xlsx")
+    if os.path.exists(error_file):
+        with atomic_output(os.path.join(output_dir, "System_Error.xlsx")) as tmp_path:
+            shutil.copyfile(error_file, tmp_path)
+    return partials
+
+
+def print_partials(partials):
+    failed = 0
+    for partial in partials:
+        failures = partial["failures"]
+        failed += len(failures)
+        status = "OK" if not failures else f"{len(failures)} FAILED: {', '.join(key for key, _ in failures)}"
+        print(f"  shard {partial['shard_index']}  {len(partial['summaries']):>4} bill(s)  {status}")
+    return failed
+
+
+# ================= LOCAL RUN =================
+def run_local(mode, count, root=None, by="company", month=None, year=None):
+    """
+    Run every shard as its own process on this machine, then merge.
+
+    Returns:
+        int: 0 when every shard and the merge succeeded, else 1
+    """
+    root = shard_root(mode, root)
+    print(f"Sharded {mode} run: {count} shard(s) by {by}")
+    print(f"Output: {root}")
+
+    # Partial summaries of an earlier run under this root would be merged too
+    for path in glob.glob(os.path.join(root, "*", PARTIAL_SUMMARY_FILE)):
+        os.remove(path)
+
+    processes = []
+    for index in range(count):
+        output_dir = shard_folder(root, index, count)
+        os.makedirs(output_dir, exist_ok=True)
+        command = [
+            sys.executable, "-m", "service.shards", "run", mode,
+            "--shards", str(count), "--shard", str(index), "--by", by, "--root", root,
+        ]
+        if month is not None:
+            command += ["--month", str(month)]
+        if year is not None:
+            command += ["--year", str(year)]
+        log = open(os.path.join(output_dir, "shard.log"), "w", encoding="utf-8")
+        processes.append((index, log, subprocess.Popen(command, cwd=REPO_ROOT, stdout=log, stderr=subprocess.STDOUT)))
+
+    failed = []
+    for index, log, process in processes:
+        if process.wait() != 0:
+            failed.append(index)
+        log.close()
+    if failed:
+        print(f"Shard(s) {', '.join(map(str, failed))} failed; see shard.log in their folders")
+        return 1
+
+    try:
+        partials = merge_shards(mode, root, month=month, year=year)
+    except ValueError as e:
+        print(f"Merge failed: {e}")
+        return 1
+    return 1 if print_partials(partials) else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bill one period in shards and merge their summaries")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(command):
+        command.add_argument("mode", choices=["recurring", "one-time"])
+        command.add_argument("--root", help="shared directory of the run (default Shards/<mode>)")
+        command.add_argument("--month", type=int, help="billing month (default from config)")
+        command.add_argument("--year", type=int, help="billing year (default from config)")
+
+    run = commands.add_parser("run", help="bill one shard")
+    add_common(run)
+    run.add_argument("--shards", type=int, required=True, help="number of shards")
+    run.add_argument("--shard", type=int, required=True, help="shard to bill, 0 .. shards - 1")
+    run.add_argument("--by", choices=SHARD_BY, default="company", help="how groups are split (default company)")
+    run.add_argument("--workers", type=int, default=1, help="processes building this shard's bills (0 = all CPUs)")
+    run.add_argument(
+        "--resume", action="store_true",
+        help="skip bills an interrupted run of this shard already finished",
+    )
+
+    merge = commands.add_parser("merge", help="write the master summary from every shard's partial summary")
+    add_common(merge)
+    merge.add_argument("--output", help="folder for the master summary (default the root)")
+
+    local = commands.add_parser("local", help="run every shard as a separate process here, then merge")
+    add_common(local)
+    local.add_argument("--shards", type=int, required=True, help="number of shards")
+    local.add_argument("--by", choices=SHARD_BY, default="company", help="how groups are split (default company)")
+
+    args = parser.parse_args(argv)
+
+    program = get_program(args.mode)
+    try:
+        validate_job(
+            args.mode,
+            args.month if args.month is not None else program.config.BILLING_MONTH,
+            args.year if args.year is not None else program.config.BILLING_YEAR,
+        )
+        if args.command != "merge" and not 0 < args.shards:
+            raise ValueError("--shards must be at least 1")
+        if args.command == "run" and not 0 <= args.shard < args.shards:
+            raise ValueError(f"--shard must be between 0 and {args.shards - 1}")
+    except ValueError as e:
+        parser.error(str(e))
+
+    started = time.perf_counter()
+    if args.command == "run":
+        run_shard(
+            args.mode, args.shard, args.shards, args.root, args.by,
+            args.month, args.year, workers=args.workers, resume=args.resume,
+        )
+        return 0
+
+    if args.command == "merge":
+        try:
+            partials = merge_shards(args.mode, args.root, args.output, args.month, args.year)
+        except ValueError as e:
+            print(f"Merge failed: {e}")
+            return 1
+        failed = print_partials(partials)
+        print(f"\nMerged {len(partials)} shard(s) in {time.perf_counter() - started:.2f}s")
+        return 1 if failed else 0
+
+    status = run_local(args.mode, args.shards, args.root, args.by, args.month, args.year)
+    print(f"\nSharded run finished in {time.perf_counter() - started:.2f}s")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,5 +9,21 @@ __version__ = "1.0.0"
 __all__ = [
     "helpers",
     "config_base",
-    "charge_mapper_base"
+    "charge_mapper_base",
+    "template_cache",
+    "annexure_stream",
+    "input_cache",
+    "run_manifest",
+    "instrumentation",
+    "run_context",
+    "asset_cache",
+    "styles",
+    "billing_calendar",
+    "amount_words",
+    "money",
+    "validation",
+    "checkpoint",
+    "template_patch",
+    "po_index",
+    "sharding"
 ]
@@ -0,0 +1,125 @@
+"""
+Shared Amount in Words
+======================
+"Amount in words" line of a bill, in the Indian numbering system
+(thousand, lakh, crore), e.g.
+
+    1234567 -> "Twelve Lakh, Thirty-Four Thousand, Five Hundred And Sixty-Seven Only"
+
+Whole amounts are rendered here and cached. Anything else (fractions,
+text, amounts of 100 crore and above) goes to num2words(lang="en_IN"),
+which is imported on first use only; the output is the same
+num2words(...).title() + " Only" text either way.
+Used by both Billing_System and One_Time
+"""
+
+import math
+import numbers
+from functools import lru_cache
+
+
+ONES = [
+    "Zero", "One", "Two", "Three", "Four", "Five", "Six", "Seven", "Eight", "Nine",
+    "Ten", "Eleven", "Twelve", "Thirteen", "Fourteen", "Fifteen", "Sixteen",
+    "Seventeen", "Eighteen", "Nineteen",
+]
+TENS = ["", "", "Twenty", "Thirty", "Forty", "Fifty", "Sixty", "Seventy", "Eighty", "Ninety"]
+
+# Largest amount num2words en_IN renders (it has no name above crore)
+MAX_AMOUNT = 10 ** 10 - 1
+
+# (scale, name, size of the group below the next scale)
+SCALES = [
+    (10 ** 7, "Crore", 1000),
+    (10 ** 5, "Lakh", 100),
+    (10 ** 3, "Thousand", 100),
+]
+
+
+def _below_hundred(n):
+    if n < 20:
+        return ONES[n]
+    tens, ones = divmod(n, 10)
+    return TENS[tens] + ("-" + ONES[ones] if ones else "")
+
+
+def _below_thousand(n):
+    hundreds, rest = divmod(n, 100)
+    if not hundreds:
+        return _below_hundred(n)
+    text = ONES[hundreds] + " Hundred"
+    return text + " And " + _below_hundred(rest) if rest else text
+
+
+def integer_words(n):
+    """
+    Title-cased words of a whole number with abs(n) <= MAX_AMOUNT.
+
+    Groups are joined with ", " and a last group under a hundred with
+    " And ", as num2words does: "One Lakh And Five", "One Lakh, Five Hundred".
+    """
+    if n < 0:
+        return "Minus " + integer_words(-n)
+    if n < 1000:
+        return _below_thousand(n)
+
+    parts = []
+    for scale, name, size in SCALES:
+        group = n // scale % size
+        if group:
+            parts.append(f"{_below_thousand(group)} {name}")
+    rest = n % 1000
+    text = ", ".join(parts)
+    if not rest:
+        return text
+    return text + (" And " if rest < 100 else ", ") + _below_thousand(rest)
+
+
+def _whole_amount(num):
+    """num as an int when it is a whole number this module renders, else None"""
+    if isinstance(num, numbers.Integral):
+        n = int(num)
+    elif isinstance(num, numbers.Real) and not isinstance(num, numbers.Rational):
+        # float / numpy floats; Fractions and Decimals keep num2words' handling
+        if not math.isfinite(num) or not float(num).is_integer():
+            return None
+        n = int(num)
+    else:
+        return None
+    return n if abs(n) <= MAX_AMOUNT else None
+
+
+def _num2words_text(num):
+    from num2words import num2words
+
+    try:
+        return num2words(num, lang="en_IN").title() + " Only"
+    except Exception:
+        return f"{num} Only"
+
+
+@lru_cache(maxsize=65536, typed=True)
+def _cached_words(num):
+    n = _whole_amount(num)
+    if n is None:
+        return _num2words_text(num)
+    return integer_words(n) + " Only"
+
+
+def number_to_words_indian(num):
+    """
+    Amount in words for a bill, e.g. 11800 -> "Eleven Thousand, Eight Hundred Only".
+
+    Values num2words cannot render come back as f"{num} Only".
+    """
+    try:
+        return _cached_words(num)
+    except TypeError:
+        # Unhashable values skip the cache
+        n = _whole_amount(num)
+        return _num2words_text(num) if n is None else integer_words(n) + " Only"
+
+
+def numbers_to_words_indian(nums):
+    """number_to_words_indian for every amount in an iterable, as a list"""
+    return [number_to_words_indian(num) for num in nums]
@@ -0,0 +1,89 @@
+"""
+Shared Streaming Annexure Writer
+================================
+Writes annexure-only workbooks row by row with openpyxl write-only mode,
+so memory stays flat no matter how many employees a client group has.
+Used by both Billing_System and One_Time for large groups
+"""
+
+from openpyxl import Workbook
+from openpyxl.cell import Cell
+from openpyxl.utils import get_column_letter
+
+from shared.checkpoint import atomic_output
+from shared.styles import StyleRegistry
+
+
+def _styled_cell(ws, value, style_array):
+    cell = Cell(ws, row=1, column=1, value=value, style_array=style_array)
+    # Binding a date value gives the cell a date number format; a format
+    # that sets its own number format wins, as it does in format_annexure_sheet()
+    if style_array.numFmtId and cell._style.numFmtId != style_array.numFmtId:
+        cell._style.numFmtId = style_array.numFmtId
+    return cell
+
+
+def write_streaming_annexure(output_path, group_df, annex_columns, total_formulas,
+                             number_format_cols, add_images, company_name):
+    """
+    Write an annexure-only workbook without holding the sheet in memory.
+
+    Args:
+        output_path: xlsx file to write
+        group_df: annexure rows for one Split_Key group
+        annex_columns: columns to write, in order
+        total_formulas: {col_idx: formula or value} for the total row
+        number_format_cols: 1-based column indexes shown as whole numbers
+        add_images: add_images_to_annexure(ws, last_row, company_name)
+        company_name: passed to add_images
+
+    Returns:
+        int: the total row number
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Annexure")
+
+    num_cols = len(annex_columns)
+
+    # Column widths and header height have to be set before any row
+    for col in range(1, num_cols + 1):
+        ws.column_dimensions[get_column_letter(col)].width = 18
+    ws.row_dimensions[1].height = 30
+
+    # Same formats as format_annexure_sheet(), registered once and shared
+    # by every cell of their kind
+    styles = StyleRegistry(ws)
+    header_style = styles.style_array("annexure_header")
+    data_style = styles.style_array("annexure_data")
+    data_number_style = styles.style_array("annexure_data_number")
+    total_style = styles.style_array("annexure_total")
+    total_number_style = styles.style_array("annexure_total_number")
+
+    data_styles = [
+        data_number_style if col in number_format_cols else data_style
+        for col in range(1, num_cols + 1)
+    ]
+    total_styles = [
+        total_number_style if col in number_format_cols else total_style
+        for col in range(1, num_cols + 1)
+    ]
+
+    # Header
+    ws.append([_styled_cell(ws, header, header_style) for header in annex_columns])
+
+    # Data rows
+    for values in group_df[annex_columns].itertuples(index=False, name=None):
+        ws.append([_styled_cell(ws, value, style) for value, style in zip(values, data_styles)])
+
+    # Total row
+    total_row = len(group_df) + 2
+    total_values = [total_formulas.get(col) for col in range(1, num_cols + 1)]
+    if 1 not in total_formulas:
+        total_values[0] = "TOTAL"
+    ws.append([_styled_cell(ws, value, style) for value, style in zip(total_values, total_styles)])
+
+    add_images(ws, total_row, company_name)
+
+    with atomic_output(output_path) as tmp_path:
+        wb.save(tmp_path)
+    return total_row
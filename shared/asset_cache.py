@@ -0,0 +1,153 @@
+"""
+Shared Annexure Asset Cache
+===========================
+Signature and stamp images placed under every annexure, scaled once to
+the size they are shown at and kept in memory as encoded PNG bytes.
+Bills embed these small copies instead of the full-size files in
+Assets/, which keeps output files small and saves re-reading the PNGs.
+annexure_asset_digests() hashes the images a company's bills embed, so
+bill fingerprints change when a signature or stamp is replaced.
+Used by both Billing_System and One_Time
+"""
+
+import io
+import os
+import threading
+
+from openpyxl.drawing.image import Image as OpenpyxlImage
+
+from shared.template_cache import file_digest
+
+
+def scale_image(path, width, height):
+    """
+    PNG bytes of the image at path scaled to width x height pixels.
+    Images already within that size are returned as they are on disk.
+    Pillow is imported on first use only.
+    """
+    from PIL import Image
+
+    with Image.open(path) as img:
+        if img.width <= width and img.height <= height:
+            with open(path, "rb") as f:
+                return f.read()
+
+        if img.mode not in ("RGB", "RGBA", "L", "LA"):
+            img = img.convert("RGBA")
+        scaled = img.resize((width, height), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    scaled.save(buffer, format="png", optimize=True)
+    return buffer.getvalue()
+
+
+class AssetCache:
+    """
+    Scaled image bytes keyed by (path, width, height). An entry is redone
+    only when the file's mtime/size change, so edits to Assets/ are picked
+    up by long-running processes.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def image_bytes(self, path, width, height):
+        """Scaled PNG bytes, or None when the file does not exist"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = (os.path.abspath(path), width, height)
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        data = scale_image(path, width, height)
+        with self._lock:
+            self._entries[key] = (signature, data)
+        return data
+
+    def digest(self, path):
+        """SHA-256 of the image at path, or None when the file does not exist"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = os.path.abspath(path)
+
+        with self._lock:
+            entry = self._digests.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        digest = file_digest(path)
+        with self._lock:
+            self._digests[key] = (signature, digest)
+        return digest
+
+    def image(self, path, width, height):
+        """
+        New openpyxl image for one worksheet, shown at width x height.
+
+        Returns:
+            OpenpyxlImage, or None when the file does not exist
+        """
+        data = self.image_bytes(path, width, height)
+        if data is None:
+            return None
+        img = OpenpyxlImage(io.BytesIO(data))
+        img.width = width
+        img.height = height
+        return img
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+
+
+# Process-wide cache used by the bill generators
+asset_cache = AssetCache()
+
+
+def annexure_image(path, width, height):
+    """Shortcut for asset_cache.image()"""
+    return asset_cache.image(path, width, height)
+
+
+def annexure_image_paths(company_name, assets_folder):
+    """
+    Sign and stamp images under a company's annexures:
+    - sign2.png for ABNJ, sign.png for every other company
+    - stamp jobuss.png, aradhya.png or abnj.png by Company Name (jobuss.png
+      when none matches)
+
+    Returns:
+        tuple: (sign_path, stamp_path)
+    """
+    company_lower = str(company_name).lower() if company_name else ""
+
+    sign_filename = "sign2.png" if "abnj" in company_lower else "sign.png"
+
+    if "jobuss" in company_lower:
+        stamp_filename = "jobuss.png"
+    elif "aradhya" in company_lower:
+        stamp_filename = "aradhya.png"
+    elif "abnj" in company_lower:
+        stamp_filename = "abnj.png"
+    else:
+        stamp_filename = "jobuss.png"
+
+    return os.path.join(assets_folder, sign_filename), os.path.join(assets_folder, stamp_filename)
+
+
+def annexure_asset_digests(company_name, assets_folder):
+    """Content hashes of a company's sign and stamp images (None when missing), for bill fingerprints"""
+    sign_path, stamp_path = annexure_image_paths(company_name, assets_folder)
+    return {"sign": asset_cache.digest(sign_path), "stamp": asset_cache.digest(stamp_path)}
@@ -0,0 +1,132 @@
+"""
+Shared Billing Calendar
+=======================
+Start/end dates of every billing cycle for one billing month, worked out
+once and looked up by the billing engines and bill generators instead of
+re-parsing cycle strings per employee or per bill.
+
+A cycle string ("21-20", "21st to 20th", "26-25", "", ...) is normalized
+to one of the CYCLE_CODES; anything unrecognised bills the calendar month.
+Used by both Billing_System and One_Time
+"""
+
+import calendar
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+# Cycle code -> (start day in the previous month, end day in the billing month).
+# "" is the calendar month.
+CYCLE_CODES = {
+    "21-20": (21, 20),
+    "25-24": (25, 24),
+    "26-25": (26, 25),
+    "": None,
+}
+
+
+def normalize_cycle(cycle):
+    """
+    Cycle code of a Billing Cycle value.
+
+    Checked in CYCLE_CODES order, so "25-24" wins over "26-25" when both
+    numbers 25 and 24 appear.
+    """
+    text = str(cycle).lower()
+    for code, days in CYCLE_CODES.items():
+        if days is None or all(str(day) in text for day in days):
+            return code
+    return ""
+
+
+def cycle_dates(code, month, year):
+    """
+    Start and end date of a normalized cycle in the given billing month.
+
+    Returns:
+        tuple: (start_date, end_date) as date objects
+    """
+    days = CYCLE_CODES[code]
+    if days is None:
+        return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+    start_day, end_day = days
+    start = date(year if month != 1 else year - 1, month - 1 if month != 1 else 12, start_day)
+    end = date(year, month, end_day)
+    return start, end
+
+
+class BillingPeriod:
+    """
+    One cycle of a billing month, in every form the programs compare with:
+
+    start, end:           date
+    start_ts, end_ts:     pd.Timestamp (against datetime64 columns)
+    start_np, end_np:     np.datetime64[D] (columnar engine)
+    total_days:           days in the cycle, both ends included
+    text:                 "21 Feb 2026 to 20 Mar 2026" for bills
+    """
+
+    __slots__ = (
+        "code", "start", "end", "start_ts", "end_ts", "start_np", "end_np", "total_days", "text"
+    )
+
+    def __init__(self, code, start, end):
+        self.code = code
+        self.start = start
+        self.end = end
+        self.start_ts = pd.Timestamp(start)
+        self.end_ts = pd.Timestamp(end)
+        self.start_np = np.datetime64(start, "D")
+        self.end_np = np.datetime64(end, "D")
+        self.total_days = (end - start).days + 1
+        self.text = f"{start.strftime('%d %b %Y')} to {end.strftime('%d %b %Y')}"
+
+    def __repr__(self):
+        return f"BillingPeriod({self.code!r}, {self.start}, {self.end})"
+
+
+class BillingCalendar:
+    """Every cycle's BillingPeriod for one billing month"""
+
+    def __init__(self, month, year):
+        self.month = month
+        self.year = year
+        self.periods = {
+            code: BillingPeriod(code, *cycle_dates(code, month, year))
+            for code in CYCLE_CODES
+        }
+        # Billing Cycle text as found in the data -> code
+        self._codes = {}
+
+    def period(self, cycle):
+        """BillingPeriod of a Billing Cycle value"""
+        text = str(cycle)
+        code = self._codes.get(text)
+        if code is None:
+            code = self._codes[text] = normalize_cycle(text)
+        return self.periods[code]
+
+    def lookup(self, cycles):
+        """
+        Per-row cycle dates for a column of Billing Cycle values.
+
+        Returns:
+            tuple: (starts, ends) as datetime64[D] arrays and total_days
+                   as an int64 array
+        """
+        codes, uniques = pd.factorize(cycles, use_na_sentinel=False)
+        periods = [self.period(cycle) for cycle in uniques]
+        starts = np.array([p.start_np for p in periods], dtype="datetime64[D]")
+        ends = np.array([p.end_np for p in periods], dtype="datetime64[D]")
+        total_days = np.array([p.total_days for p in periods], dtype=np.int64)
+        return starts[codes], ends[codes], total_days[codes]
+
+
+@lru_cache(maxsize=None)
+def billing_calendar(month, year):
+    """The BillingCalendar of a billing month, built once per process"""
+    return BillingCalendar(month, year)
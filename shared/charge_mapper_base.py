@@ -4,8 +4,14 @@ Shared Charge Mapper Base Class
 Base class for charge mapping used by both Billing_System and One_Time
 """
 
+import os
+import threading
+
+import numpy as np
 import pandas as pd
 
+from shared.input_cache import read_excel_cached
+
 
 class ChargeMapperBase:
     """
@@ -17,10 +23,40 @@ class ChargeMapperBase:
     DEFAULT_CHARGE_TYPE = "percent"
     DEFAULT_APPLICATION_MODE = "proportionate"
     
-    def __init__(self, file_path):
-        self.df = pd.read_excel(file_path)
-        self.df.columns = self.df.columns.str.strip()
+    # Mappers shared within a process, see load()
+    _loaded = {}
+    _loaded_lock = threading.Lock()
+    
+    @classmethod
+    def load(cls, file_path, use_cache=True):
+        """
+        Mapper for file_path shared by every caller in this process.
+        
+        It is built on first use and rebuilt only when the file's
+        mtime/size change, so long-running processes keep it warm.
+        Mappers are read-only after construction.
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = (cls, path, use_cache)
+        
+        with ChargeMapperBase._loaded_lock:
+            entry = ChargeMapperBase._loaded.get(key)
+            if entry is None or entry[0] != signature:
+                entry = (signature, cls(file_path, use_cache=use_cache))
+                ChargeMapperBase._loaded[key] = entry
+            return entry[1]
+    
+    @classmethod
+    def for_context(cls, ctx):
+        """Shared mapper for the charges file and cache setting of a RunContext"""
+        return cls.load(ctx.input_charges_file, use_cache=ctx.input_cache)
+    
+    def __init__(self, file_path, use_cache=True):
+        self.df = read_excel_cached(file_path, use_cache=use_cache)
         self._normalize_columns()
+        self._build_index()
     
     def _normalize_columns(self):
         """Normalize text columns for matching"""
@@ -72,6 +108,50 @@ class ChargeMapperBase:
             .str.strip()
         )
     
+    def _build_index(self):
+        """
+        Index charge rows once so lookups don't scan the whole table:
+        - KAP -> first row and number of rows for that KAP
+        - (KAP, Position) -> first matching row
+        Also pre-parses the per-row values used by the bulk lookup.
+        """
+        kaps = self.df["Kind Attention Person"].tolist()
+        positions = self.df["Position"].tolist()
+        
+        self._kap_first_row = {}
+        self._kap_row_count = {}
+        self._position_row = {}
+        for idx, (kap, position) in enumerate(zip(kaps, positions)):
+            self._kap_first_row.setdefault(kap, idx)
+            self._kap_row_count[kap] = self._kap_row_count.get(kap, 0) + 1
+            self._position_row.setdefault((kap, position), idx)
+        
+        self._rows = self.df.to_dict("records")
+        
+        parsed = [self._parse_charge_value(row.get("Charge Value", 0)) for row in self._rows]
+        self._charge_values = np.array(parsed, dtype=float)
+        self._integer_values = np.array([isinstance(value, int) for value in parsed], dtype=bool)
+        self._percent_rows = np.array(["percent" in str(row["Charge Type"]).lower() for row in self._rows], dtype=bool)
+        self._fixed_rows = np.array(["fixed" in str(row["Application Mode"]).lower() for row in self._rows], dtype=bool)
+        
+        self._position_index = pd.DataFrame(
+            [(kap, position, idx) for (kap, position), idx in self._position_row.items()],
+            columns=["kap", "position", "row"]
+        )
+    
+    def _find_row(self, kap, position):
+        """
+        Charge row for a normalized KAP/position, or -1 if the KAP has none.
+        A KAP with a single entry always uses it; otherwise the first row
+        matching the position, falling back to the KAP's first row.
+        """
+        first = self._kap_first_row.get(kap)
+        if first is None:
+            return -1
+        if self._kap_row_count[kap] == 1:
+            return first
+        return self._position_row.get((kap, position), first)
+    
     def _parse_charge_value(self, raw):
         """Parse charge value from string/number"""
         if pd.isna(raw):
@@ -101,25 +181,117 @@ class ChargeMapperBase:
         kap = str(kap).lower().strip()
         position = str(position).lower().strip()
         
-        kap_rows = self.df[self.df["Kind Attention Person"] == kap]
+        row_idx = self._find_row(kap, position)
         
-        if kap_rows.empty:
+        if row_idx < 0:
             return 0, self.DEFAULT_APPLICATION_MODE
         
-        # Single Entry for KAP
-        if len(kap_rows) == 1:
-            row = kap_rows.iloc[0]
+        return self._calculate_charge(self._rows[row_idx], billing)
+    
+    def _custom_charges(self):
+        """True when a subclass overrides get_charge_details or _calculate_charge"""
+        cls = type(self)
+        return (
+            cls.get_charge_details is not ChargeMapperBase.get_charge_details
+            or cls._calculate_charge is not ChargeMapperBase._calculate_charge
+        )
+    
+    def get_charge_columns(self, employees):
+        """
+        Bulk version of get_charge_details for a whole employee frame.
         
-        # Multiple Entries → Match Position
-        else:
-            match = kap_rows[kap_rows["Position"] == position]
+        Uses the "Kind Attention Person", "Position" and "Billing" columns
+        and resolves every employee's charge row with one join, then
+        computes charges with the default _calculate_charge rules. A
+        subclass overriding get_charge_details or _calculate_charge gets
+        its own method called for every employee instead, so both billing
+        engines charge alike.
+        
+        Args:
+            employees: DataFrame of employees
             
-            if match.empty:
-                row = kap_rows.iloc[0]  # fallback
-            else:
-                row = match.iloc[0]
+        Returns:
+            DataFrame aligned with employees.index:
+            - Charge Row: position of the charge row used (-1 if none)
+            - Charge Value: base charge
+            - Application Mode: "FIXED" / "PROPORTIONATE" (default mode
+              when the KAP has no entry)
+            - Integer Charge: True where get_charge_details returns an int
+        """
+        n = len(employees)
+        
+        kap = employees["Kind Attention Person"].map(str).str.lower().str.strip()
+        if "Position" in employees.columns:
+            position = employees["Position"].fillna("").map(str).str.lower().str.strip()
+        else:
+            position = pd.Series("", index=employees.index)
+        billing = employees["Billing"].to_numpy(dtype=float)
         
-        return self._calculate_charge(row, billing)
+        keys = pd.DataFrame({"kap": kap.to_numpy(), "position": position.to_numpy()})
+        matched = keys.merge(self._position_index, on=["kap", "position"], how="left")["row"]
+        
+        first_row = kap.map(self._kap_first_row).to_numpy(dtype=float)
+        row_count = kap.map(self._kap_row_count).fillna(0).to_numpy()
+        
+        rows = np.where(
+            (row_count > 1) & matched.notna().to_numpy(),
+            matched.to_numpy(dtype=float),
+            first_row
+        )
+        rows = np.nan_to_num(rows, nan=-1).astype(np.int64)
+        found = rows >= 0
+        safe_rows = np.where(found, rows, 0)
+        
+        if self._custom_charges():
+            positions = employees["Position"] if "Position" in employees.columns else [None] * n
+            details = [
+                self.get_charge_details(*args)
+                for args in zip(employees["Kind Attention Person"], positions, employees["Billing"])
+            ]
+            values = [value for value, _ in details]
+            return pd.DataFrame(
+                {
+                    "Charge Row": rows,
+                    "Charge Value": np.array(values, dtype=float),
+                    "Application Mode": np.array([mode for _, mode in details], dtype=object),
+                    "Integer Charge": np.array([isinstance(value, (int, np.integer)) for value in values], dtype=bool),
+                },
+                index=employees.index
+            )
+        
+        charge_value = np.zeros(n)
+        mode = np.full(n, self.DEFAULT_APPLICATION_MODE, dtype=object)
+        if len(self._rows):
+            value = self._charge_values[safe_rows]
+            base = np.where(self._percent_rows[safe_rows], billing * (value / 100), value)
+            charge_value = np.where(found, base, 0.0)
+            mode = np.where(
+                found,
+                np.where(self._fixed_rows[safe_rows], "FIXED", "PROPORTIONATE"),
+                mode
+            )
+        
+        return pd.DataFrame(
+            {
+                "Charge Row": rows,
+                "Charge Value": charge_value,
+                "Application Mode": mode,
+                "Integer Charge": self.integer_charges(rows),
+            },
+            index=employees.index
+        )
+    
+    def integer_charges(self, charge_rows):
+        """
+        True where get_charge_details would return an integer charge:
+        no entry for the KAP, or a non-percent row with no usable value.
+        """
+        charge_rows = np.asarray(charge_rows)
+        found = charge_rows >= 0
+        safe_rows = np.where(found, charge_rows, 0)
+        if not len(self._rows):
+            return ~found
+        return ~found | (self._integer_values[safe_rows] & ~self._percent_rows[safe_rows])
     
     def _calculate_charge(self, row, billing):
         """
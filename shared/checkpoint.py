@@ -0,0 +1,148 @@
+"""
+Shared Checkpoint Journal
+=========================
+Crash-safe bookkeeping for bill generation:
+
+    atomic_output       write a file under a temporary name and rename it
+                        into place, so a crash or a concurrent reader never
+                        sees a half-written xlsx
+    CheckpointJournal   run_checkpoint.jsonl in the output folder: one line
+                        per finished bill (Split_Key, fingerprint, output
+                        hash, One_Time's summary row), flushed to disk as
+                        soon as the bill is saved
+
+A resumed run (RESUME = True or main.py --resume) skips every group whose
+journal line still matches its fingerprint and output file. The journal
+is removed once a run finishes without failures.
+Used by both Billing_System and One_Time
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+from shared.run_manifest import _json_value
+from shared.template_cache import file_digest
+
+
+CHECKPOINT_FILE = "run_checkpoint.jsonl"
+
+# Temporary files start with this, e.g. ".~Adish_Talim_Jobuss.xlsx.k2j4.xlsx"
+TEMP_PREFIX = ".~"
+
+
+@contextmanager
+def atomic_output(path):
+    """
+    Yield a temporary path next to path; when the block finishes the file
+    written there replaces path in one rename. If the block raises, the
+    temporary file is removed and path is left as it was.
+
+    The temporary name keeps path's extension, so writers that pick a
+    format from it (pandas.to_excel) work unchanged.
+    """
+    folder, name = os.path.split(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=folder, prefix=f"{TEMP_PREFIX}{name}.", suffix=os.path.splitext(name)[1]
+    )
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def remove_temp_files(folder):
+    """
+    Delete temporary files a killed run left behind in folder.
+
+    Returns:
+        int: files removed
+    """
+    removed = 0
+    if not os.path.isdir(folder):
+        return removed
+    for name in os.listdir(folder):
+        if name.startswith(TEMP_PREFIX):
+            try:
+                os.remove(os.path.join(folder, name))
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+class CheckpointJournal:
+    """
+    Bills finished by the current (or, when resuming, the interrupted)
+    run of an output folder.
+
+    Without resume the journal starts empty. With resume the previous
+    journal is read back; a torn last line from a crash is dropped and
+    the file is rewritten with the complete entries before new ones are
+    appended.
+    """
+
+    def __init__(self, output_folder, resume=False):
+        self.path = os.path.join(output_folder, CHECKPOINT_FILE)
+        self.entries = {}
+
+        if resume and os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry
+                    except (ValueError, KeyError, TypeError):
+                        continue
+
+        # Start the file afresh (or compacted), so later appends begin on a new line
+        with atomic_output(self.path) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry, default=_json_value) + "\n")
+
+    def completed(self, key, fingerprint, output_path):
+        """True when key was finished from this fingerprint and its file is intact"""
+        entry = self.entries.get(key)
+        return (
+            entry is not None
+            and entry["fingerprint"] == fingerprint
+            and os.path.exists(output_path)
+            and file_digest(output_path) == entry["sha256"]
+        )
+
+    def summary(self, key):
+        """(summary_data, has_template) recorded for key; summary_data None when none was recorded"""
+        entry = self.entries[key]
+        return entry.get("summary"), entry["has_template"]
+
+    def record(self, key, fingerprint, output_path, summary_data, has_template):
+        """
+        Append a finished bill and flush it to disk before returning.
+        summary_data None records no summary row (Billing_System).
+        """
+        entry = {
+            "key": key,
+            "fingerprint": fingerprint,
+            "sha256": file_digest(output_path),
+            "has_template": has_template,
+        }
+        if summary_data is not None:
+            entry["summary"] = summary_data
+        self.entries[key] = entry
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, default=_json_value) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        """Forget the journal once every bill of the run is done"""
+        self.entries = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
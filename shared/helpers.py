@@ -4,9 +4,12 @@ Shared Helper Functions
 Common utilities used by both Billing_System and One_Time
 """
 
+import os
+import numpy as np
 import pandas as pd
-from datetime import date, timedelta
-import calendar
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from shared.billing_calendar import billing_calendar
 
 
 def clean_numeric(df, cols):
@@ -35,26 +38,8 @@ def get_billing_dates(cycle, month, year):
     Returns:
         tuple: (start_date, end_date) as date objects
     """
-    text = str(cycle).lower()
-
-    if "21" in text and "20" in text:
-        start = date(year if month != 1 else year - 1, month - 1 if month != 1 else 12, 21)
-        end = date(year, month, 20)
-
-    elif "25" in text and "24" in text:
-        start = date(year if month != 1 else year - 1, month - 1 if month != 1 else 12, 25)
-        end = date(year, month, 24)
-
-    elif "26" in text and "25" in text:
-        start = date(year if month != 1 else year - 1, month - 1 if month != 1 else 12, 26)
-        end = date(year, month, 25)
-
-    else:
-        # Default: use first to last day of the month
-        start = date(year, month, 1)
-        end = date(year, month, calendar.monthrange(year, month)[1])
-
-    return start, end
+    period = billing_calendar(month, year).period(cycle)
+    return period.start, period.end
 
 
 def get_billing_dates_pd(cycle, month, year):
@@ -70,8 +55,20 @@ def get_billing_dates_pd(cycle, month, year):
     Returns:
         tuple: (start_date, end_date) as pd.Timestamp objects
     """
-    start, end = get_billing_dates(cycle, month, year)
-    return pd.Timestamp(start), pd.Timestamp(end)
+    period = billing_calendar(month, year).period(cycle)
+    return period.start_ts, period.end_ts
+
+
+@lru_cache(maxsize=None)
+def counts_saturday(workweek):
+    """True when the workweek string is a five-day week ("5" or "five")"""
+    workweek_str = str(workweek).lower()
+    return "5" in workweek_str or "five" in workweek_str
+
+
+def _count_weekday(start, days, weekday):
+    """Number of days with the given weekday among `days` days from start"""
+    return days // 7 + (1 if (weekday - start.weekday()) % 7 < days % 7 else 0)
 
 
 def count_weekends(start, end, workweek):
@@ -86,17 +83,111 @@ def count_weekends(start, end, workweek):
     Returns:
         tuple: (saturday_count, sunday_count)
     """
-    sat = 0
-    sun = 0
-    cur = start
-    workweek_str = str(workweek).lower()
+    days = (end - start).days + 1
+    if days <= 0:
+        return 0, 0
+
+    sun = _count_weekday(start, days, 6)
+    sat = _count_weekday(start, days, 5) if counts_saturday(workweek) else 0
+
+    return sat, sun
+
+
+def count_weekends_array(starts, ends, workweeks):
+    """
+    Vectorized count_weekends for a whole batch of date ranges.
+    
+    Args:
+        starts: array-like of start dates (date, Timestamp or datetime64)
+        ends: array-like of end dates
+        workweeks: array-like of workweek strings, or a single string
+    
+    Returns:
+        tuple: (saturday_counts, sunday_counts) as int64 arrays.
+        Empty or missing ranges count as 0.
+    """
+    starts = np.asarray(pd.to_datetime(pd.Series(starts)), dtype="datetime64[D]")
+    ends = np.asarray(pd.to_datetime(pd.Series(ends)), dtype="datetime64[D]")
+
+    valid = ~np.isnat(starts) & ~np.isnat(ends) & (starts <= ends)
+    stop = np.where(valid, ends + np.timedelta64(1, "D"), np.datetime64("1970-01-02"))
+    first = np.where(valid, starts, np.datetime64("1970-01-01"))
+
+    sat = np.busday_count(first, stop, weekmask="0000010")
+    sun = np.busday_count(first, stop, weekmask="0000001")
 
-    while cur <= end:
-        if cur.weekday() == 5:
-            if "5" in workweek_str or "five" in workweek_str:
-                sat += 1
-        if cur.weekday() == 6:
-            sun += 1
-        cur += timedelta(days=1)
+    # Parse each distinct workweek string once
+    workweeks = pd.Series(np.broadcast_to(np.asarray(workweeks, dtype=object), starts.shape))
+    codes, uniques = pd.factorize(workweeks, use_na_sentinel=False)
+    five_day = np.array([counts_saturday(w) for w in uniques], dtype=bool)[codes]
 
+    sat = np.where(valid & five_day, sat, 0).astype(np.int64)
+    sun = np.where(valid, sun, 0).astype(np.int64)
     return sat, sun
+
+
+def iter_jobs(func, jobs, workers=1, on_error=None, pool=None):
+    """
+    Run func over jobs, serially or on a process pool, yielding each
+    result as soon as its job finishes: in job order when serial, in
+    completion order on a pool. Lets callers record finished work (e.g. a
+    checkpoint journal) while the rest is still running.
+    
+    Args: as run_jobs
+    
+    Yields:
+        tuple: (index of the job in jobs, result)
+    """
+    def failed(job, e):
+        if on_error is None:
+            raise e
+        return on_error(job, f"{type(e).__name__}: {e}")
+    
+    def collect(futures):
+        index = {future: idx for idx, future in enumerate(futures)}
+        for future in as_completed(futures):
+            idx = index[future]
+            try:
+                yield idx, future.result()
+            except Exception as e:
+                yield idx, failed(jobs[idx], e)
+    
+    if pool is not None:
+        yield from collect([pool.submit(func, job) for job in jobs])
+        return
+    
+    if workers == 1 or len(jobs) < 2:
+        for idx, job in enumerate(jobs):
+            try:
+                yield idx, func(job)
+            except Exception as e:
+                yield idx, failed(job, e)
+        return
+    
+    max_workers = min(workers or os.cpu_count() or 1, len(jobs))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from collect([executor.submit(func, job) for job in jobs])
+
+
+def run_jobs(func, jobs, workers=1, on_error=None, pool=None):
+    """
+    Run func over jobs, serially or on a process pool.
+    
+    Args:
+        func: picklable function taking one job and returning its result
+        jobs: list of job arguments
+        workers: number of processes (1 = serial, 0/None = all CPUs)
+        on_error: called as on_error(job, message) when a job raises or
+            its worker process dies; its return value stands in for the
+            result. Without it the exception propagates.
+        pool: object with submit(func, job) -> Future, shared with other
+            runs (e.g. the combined recurring + one-time run). Jobs are
+            queued on it instead of a pool of their own; workers is ignored.
+    
+    Returns:
+        list: results in the same order as jobs
+    """
+    results = [None] * len(jobs)
+    for idx, result in iter_jobs(func, jobs, workers, on_error, pool):
+        results[idx] = result
+    return results
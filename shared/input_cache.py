@@ -0,0 +1,105 @@
+"""
+Shared Input Cache
+==================
+Keeps parsed Data/*.xlsx inputs as binary DataFrame snapshots next to the
+source file, so repeat runs (and the other program) skip XLSX parsing.
+Used by both Billing_System and One_Time
+"""
+
+import os
+import pickle
+import tempfile
+
+import pandas as pd
+
+from shared.template_cache import file_digest
+
+
+# Bump when the normalization applied before caching changes
+SCHEMA_VERSION = 1
+
+CACHE_DIR_NAME = ".cache"
+
+
+def cache_path(path, digest):
+    """
+    Snapshot file for a source file with the given content hash.
+
+    The key covers the content hash, SCHEMA_VERSION and the pandas
+    version, so a changed file, a changed normalization or a pandas
+    upgrade each land on a new snapshot.
+    """
+    source_dir, name = os.path.split(os.path.abspath(path))
+    stem = os.path.splitext(name)[0]
+    pandas_version = pd.__version__.replace(".", "_")
+    return os.path.join(
+        source_dir,
+        CACHE_DIR_NAME,
+        f"{stem}-{digest[:16]}-s{SCHEMA_VERSION}-pd{pandas_version}.pkl"
+    )
+
+
+def _parse(path):
+    df = pd.read_excel(path)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def _write_snapshot(df, snapshot):
+    """Write atomically so a concurrent reader never sees a partial file"""
+    cache_dir = os.path.dirname(snapshot)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _remove_stale(snapshot):
+    """Drop older snapshots of the same source file"""
+    cache_dir, name = os.path.split(snapshot)
+    stem = name.rsplit("-", 3)[0]
+    for other in os.listdir(cache_dir):
+        if other != name and other.endswith(".pkl") and other.rsplit("-", 3)[0] == stem:
+            try:
+                os.remove(os.path.join(cache_dir, other))
+            except OSError:
+                pass
+
+
+def read_excel_cached(path, use_cache=True):
+    """
+    pd.read_excel(path) with column names stripped, served from the
+    snapshot cache when the file content has not changed.
+
+    Args:
+        path: source .xlsx file
+        use_cache: False always parses the workbook and leaves the cache alone
+
+    Returns:
+        DataFrame: a fresh frame the caller may modify
+    """
+    if not use_cache:
+        return _parse(path)
+
+    snapshot = cache_path(path, file_digest(path))
+
+    if os.path.exists(snapshot):
+        try:
+            with open(snapshot, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable input cache {snapshot}: {e}")
+
+    df = _parse(path)
+    try:
+        _write_snapshot(df, snapshot)
+        _remove_stale(snapshot)
+    except OSError as e:
+        print(f"Warning: Could not write input cache for {path}: {e}")
+    return df
@@ -0,0 +1,119 @@
+"""
+Shared Run Instrumentation
+==========================
+Records wall time, CPU time and peak memory for pipeline stages and for
+the steps of every bill, and writes them as a JSON run report.
+Used by both Billing_System and One_Time
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from shared.checkpoint import atomic_output
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, None where unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class StageTimer:
+    """
+    Wall time, CPU time and peak RSS of named stages, in the order they ran.
+
+    peak_rss_mb is the process high-water mark when the stage ended;
+    peak_rss_growth_mb is how far the stage pushed that mark up.
+    """
+
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, **info):
+        peak_before = peak_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            peak_after = peak_rss_mb()
+            record = {
+                "stage": name,
+                "wall_s": round(time.perf_counter() - wall_start, 4),
+                "cpu_s": round(time.process_time() - cpu_start, 4),
+                "peak_rss_mb": peak_after,
+                "peak_rss_growth_mb": (
+                    round(peak_after - peak_before, 1) if peak_after is not None else None
+                ),
+            }
+            record.update(info)
+            self.stages.append(record)
+
+
+class RunReport(StageTimer):
+    """
+    Pipeline stages of one run plus the per-step timings of every bill
+    """
+
+    def __init__(self, program):
+        super().__init__()
+        self.program = program
+        self.started = datetime.now()
+        self.groups = []
+
+    def add_group(self, key, rows, has_template, steps, error=None):
+        """
+        Record one bill.
+
+        Args:
+            key: Split_Key of the group
+            rows: annexure rows in the group
+            has_template: whether a Bill sheet was filled from a template
+            steps: StageTimer.stages from build_bill (load/fill/write/format/images/save)
+            error: failure message, if the bill failed
+        """
+        self.groups.append({
+            "key": key,
+            "rows": rows,
+            "has_template": has_template,
+            "wall_s": round(sum(step["wall_s"] for step in steps), 4),
+            "steps": steps,
+            "error": error,
+        })
+
+    def to_dict(self):
+        step_totals = {}
+        for group in self.groups:
+            for step in group["steps"]:
+                step_totals[step["stage"]] = round(step_totals.get(step["stage"], 0) + step["wall_s"], 4)
+
+        return {
+            "program": self.program,
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_s": round((datetime.now() - self.started).total_seconds(), 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": self.stages,
+            "bill_step_totals": step_totals,
+            "slowest_groups": [
+                group["key"] for group in sorted(self.groups, key=lambda g: g["wall_s"], reverse=True)[:10]
+            ],
+            "groups": self.groups,
+        }
+
+    def save(self, path):
+        with atomic_output(path) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, indent=1)
+        return path
@@ -0,0 +1,93 @@
+"""
+Shared Fixed-Point Money
+========================
+Amounts held as whole paise in int64 arrays, with the rounding the bills
+use, done in integers so nothing drifts however many rows are added up:
+
+    to_paise        rupee amounts -> paise, half away from zero
+    prorate         amount * numerator / denominator, to the nearest paisa
+    apply_rate      amount * tax rate, to the nearest paisa
+    round_rupees    Excel ROUND(x, 0) of a paise amount
+    ceil_rupees     Excel CEILING(x, 1) of paise amounts
+
+Used by Billing_System's "paise" MONEY_MODE
+"""
+
+import numpy as np
+
+
+PAISE_PER_RUPEE = 100
+
+# Tax rates are applied as integer parts per million (0.09 -> 90000)
+RATE_SCALE = 1_000_000
+
+# Annexure columns holding rupee amounts
+MONEY_COLUMNS = [
+    "Billing", "Total Payable Billing", "Charges", "Out of Pocket Exp", "Arrears",
+    "Total", "CGST @9%", "SGST @9%", "IGST @18%", "Grand Total",
+]
+
+
+def to_paise(amounts):
+    """
+    Rupee amounts (floats) to int64 paise, rounding half away from zero.
+
+    The scaled value is first rounded to 6 decimals, so a float such as
+    1234.565 (stored as 1234.56499999...) still counts as a half paisa.
+    """
+    scaled = np.round(np.asarray(amounts, dtype=float) * PAISE_PER_RUPEE, 6)
+    return (np.sign(scaled) * np.floor(np.abs(scaled) + 0.5)).astype(np.int64)
+
+
+def to_rupees(paise):
+    """int64 paise to float rupees for display (the nearest double to each amount)"""
+    return np.asarray(paise, dtype=np.int64) / PAISE_PER_RUPEE
+
+
+def divide_round(numerator, denominator):
+    """Integer numerator / denominator (denominator > 0), half away from zero"""
+    numerator = np.asarray(numerator, dtype=np.int64)
+    denominator = np.asarray(denominator, dtype=np.int64)
+    quotient = (2 * np.abs(numerator) + denominator) // (2 * denominator)
+    return np.sign(numerator) * quotient
+
+
+def prorate(paise, numerator, denominator):
+    """
+    paise * numerator / denominator rounded to the nearest paisa; 0 where
+    denominator is 0. numerator and denominator are integers in the same
+    unit (e.g. hundredths of a day).
+    """
+    paise = np.asarray(paise, dtype=np.int64)
+    numerator = np.asarray(numerator, dtype=np.int64)
+    denominator = np.asarray(denominator, dtype=np.int64)
+    safe = np.where(denominator > 0, denominator, 1)
+    return np.where(denominator > 0, divide_round(paise * numerator, safe), 0)
+
+
+def rate_units(rate):
+    """A tax rate such as 0.09 as integer parts per RATE_SCALE"""
+    return int(round(rate * RATE_SCALE))
+
+
+def apply_rate(paise, rate):
+    """paise * rate rounded to the nearest paisa"""
+    return divide_round(np.asarray(paise, dtype=np.int64) * rate_units(rate), RATE_SCALE)
+
+
+def round_rupees(paise):
+    """Whole rupees of a paise amount, half away from zero (Excel ROUND(x, 0))"""
+    return int(divide_round(paise, PAISE_PER_RUPEE))
+
+
+def ceil_rupees(paise):
+    """Whole rupees of paise amounts, rounded up (Excel CEILING(x, 1)), as int64"""
+    return -(-np.asarray(paise, dtype=np.int64) // PAISE_PER_RUPEE)
+
+
+def rupee_total(amounts):
+    """
+    Exact total of rupee amounts that each have at most 2 decimals, as
+    float rupees (e.g. master summary columns built from paise).
+    """
+    return int(to_paise(amounts).sum()) / PAISE_PER_RUPEE
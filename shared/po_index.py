@@ -0,0 +1,147 @@
+"""
+Shared PO Index
+===============
+PO_Number.xlsx as an index keyed by (Kind Attention Person, Company),
+built with whole-column operations instead of a row loop:
+
+    PoIndex.load(path)    index shared within a process; rebuilt only when
+                          the file's content (SHA-256) changes
+    PoIndex.join(...)     PO Number, Validity and PO Expired for whole
+                          columns of (Kind Attention Person, Company Name)
+                          in one merge
+
+A PO is expired for a bill when the last date in its Validity text
+("From: 01.08.2025 To: 31.01.2026") is before the bill's billing period
+ends. Validity without a readable date is never flagged.
+Used by Billing_System
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from shared.input_cache import read_excel_cached
+from shared.template_cache import file_digest
+
+
+# Last dd.mm.yyyy (or dd/mm/yyyy, dd-mm-yyyy) date in a Validity text
+VALIDITY_DATE = r"(?:.*\D)?(\d{1,2})\s*[./-]\s*(\d{1,2})\s*[./-]\s*(\d{4})"
+
+# Validity cells Excel stored as dates read back as "yyyy-mm-dd ..."
+VALIDITY_ISO_DATE = r"^\s*(\d{4})-(\d{2})-(\d{2})"
+
+
+def normalize_key(values):
+    """Lookup form of a key column: text, stripped, lower case ("nan" for blanks)"""
+    return pd.Series(values, dtype=object).astype(str).fillna("nan").str.strip().str.lower()
+
+
+def validity_end(validity):
+    """
+    Last day of every Validity value. Each distinct text is parsed once.
+
+    Returns:
+        datetime64[D] array, NaT where no date could be read
+    """
+    codes, uniques = pd.factorize(pd.Series(validity, dtype=object), use_na_sentinel=False)
+    text = pd.Series(uniques, dtype=object).astype(str)
+    parts = text.str.extract(VALIDITY_DATE).rename(columns={0: "day", 1: "month", 2: "year"})
+    iso = text.str.extract(VALIDITY_ISO_DATE).rename(columns={0: "year", 1: "month", 2: "day"})
+    parts = parts.fillna(iso)
+    ends = pd.to_datetime(parts[["year", "month", "day"]].astype(float), errors="coerce")
+    return ends.to_numpy(dtype="datetime64[D]")[codes]
+
+
+class PoIndex:
+    """
+    PO Number and Validity of every (Kind Attention Person, Company) of
+    a PO file; later rows win over earlier ones with the same key.
+    """
+
+    # Indexes shared within a process: {(path, use_cache): ((mtime_ns, size), sha256, index)}
+    _loaded = {}
+    _loaded_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, use_cache=True):
+        """
+        Index of the PO file at path, shared by every caller in this process.
+
+        An unchanged mtime/size skips hashing; a touched or copied file with
+        the same content keeps its index.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = (path, use_cache)
+
+        with cls._loaded_lock:
+            entry = cls._loaded.get(key)
+            if entry is not None and entry[0] == signature:
+                return entry[2]
+            digest = file_digest(path)
+            if entry is not None and entry[1] == digest:
+                index = entry[2]
+            else:
+                index = cls(read_excel_cached(path, use_cache=use_cache))
+            cls._loaded[key] = (signature, digest, index)
+            return index
+
+    @classmethod
+    def empty(cls):
+        """Index without POs, for a missing or unreadable PO file"""
+        return cls(pd.DataFrame())
+
+    def __init__(self, po_df):
+        """po_df: the PO file with column names stripped"""
+        def column(name, default=""):
+            if name in po_df.columns:
+                return po_df[name].to_numpy(dtype=object)
+            return np.full(len(po_df), default, dtype=object)
+
+        index = pd.DataFrame({
+            "_kap": normalize_key(column("Kind Attention Person")).to_numpy(),
+            "_company": normalize_key(column("Company")).to_numpy(),
+            "PO Number": column("PO Number"),
+            "Validity": column("Validity"),
+        })
+        index["_valid_to"] = validity_end(index["Validity"])
+        self.df = index.drop_duplicates(["_kap", "_company"], keep="last").reset_index(drop=True)
+
+    def __len__(self):
+        return len(self.df)
+
+    def join(self, kaps, companies, period_ends=None):
+        """
+        PO details for rows given as whole columns.
+
+        Args:
+            kaps: Kind Attention Person values
+            companies: Company Name values
+            period_ends: billing period end of every row (datetime64);
+                None leaves PO Expired False
+
+        Returns:
+            DataFrame with PO Number, Validity ("" where there is no PO) and
+            PO Expired, one row per input row in input order
+        """
+        keys = pd.DataFrame({
+            "_kap": normalize_key(kaps).to_numpy(),
+            "_company": normalize_key(companies).to_numpy(),
+        })
+        joined = keys.merge(self.df, on=["_kap", "_company"], how="left", indicator=True)
+        missing = (joined["_merge"] == "left_only").to_numpy()
+
+        result = pd.DataFrame({
+            col: np.where(missing, "", joined[col].to_numpy(dtype=object))
+            for col in ("PO Number", "Validity")
+        })
+        expired = np.zeros(len(joined), dtype=bool)
+        if period_ends is not None:
+            valid_to = joined["_valid_to"].to_numpy(dtype="datetime64[D]")
+            ends = np.asarray(period_ends, dtype="datetime64[D]")
+            expired = ~np.isnat(valid_to) & (valid_to < ends)
+        result["PO Expired"] = expired
+        return result
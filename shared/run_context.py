@@ -0,0 +1,95 @@
+"""
+Shared Run Context
+==================
+The settings of one billing run (billing period, input and output paths,
+tax rates, worker counts, ...) as one object passed explicitly through
+the billing engines, charge mappers and bill generators. Nothing reads
+module-level config while a run is going on, so runs for different
+periods or programs can share a process, on threads or not.
+
+Each program's config.py stays the default source: its run_context()
+builds a RunContext from the module constants, with optional overrides.
+Used by both Billing_System and One_Time
+"""
+
+
+# Config constant -> value used when a program's config.py does not define it
+SETTINGS = {
+    "BILLING_MONTH": None,
+    "BILLING_YEAR": None,
+    "INPUT_EMPLOYEE_FILE": None,
+    "INPUT_CHARGES_FILE": None,
+    "INPUT_PO_FILE": None,
+    "TEMPLATE_FOLDER": None,
+    "ASSETS_FOLDER": None,
+    "OUTPUT_DIR": None,
+    "OUTPUT_FOLDER": None,
+    "SUMMARY_FILE": None,
+    "CGST_RATE": 0.09,
+    "SGST_RATE": 0.09,
+    "IGST_RATE": 0.18,
+    "BILLING_ENGINE": "columnar",
+    "MONEY_MODE": "float",
+    "VALIDATION_RULES": None,
+    "TEMPLATE_FILL": "patch",
+    "BILL_WORKERS": 1,
+    "SHARD_COUNT": 1,
+    "SHARD_INDEX": 0,
+    "SHARD_BY": "company",
+    "STREAMING_ANNEXURE_MIN_ROWS": 5000,
+    "INPUT_CACHE": True,
+    "INCREMENTAL_BILLS": False,
+    "RESUME": False,
+    "RUN_REPORT": True,
+    "RUN_REPORT_FILE": "run_report.json",
+}
+
+
+class RunContext:
+    """
+    Settings of one run, as lower-case attributes of the config names
+    (ctx.billing_month, ctx.output_folder, ctx.cgst_rate, ...).
+
+    Treat it as read-only once a run has started; replace() returns a
+    modified copy. Instances are plain picklable objects, so they travel
+    to process-pool workers with the jobs that use them.
+    """
+
+    def __init__(self, **settings):
+        unknown = set(settings) - {name.lower() for name in SETTINGS}
+        if unknown:
+            raise TypeError(f"Unknown run settings: {', '.join(sorted(unknown))}")
+        for name, default in SETTINGS.items():
+            setattr(self, name.lower(), settings.get(name.lower(), default))
+
+    @classmethod
+    def from_config(cls, config, **overrides):
+        """
+        Build a context from a config module (or its globals()).
+
+        Args:
+            config: module or dict holding the upper-case config constants
+            overrides: lower-case settings replacing the config values
+        """
+        values = config if isinstance(config, dict) else vars(config)
+        settings = {name.lower(): values[name] for name in SETTINGS if name in values}
+        settings.update(overrides)
+        return cls(**settings)
+
+    def replace(self, **overrides):
+        """Copy of this context with some settings changed"""
+        settings = dict(vars(self))
+        settings.update(overrides)
+        return type(self)(**settings)
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    def __eq__(self, other):
+        return isinstance(other, RunContext) and vars(self) == vars(other)
+
+    def __repr__(self):
+        return (
+            f"RunContext(billing_month={self.billing_month}, billing_year={self.billing_year}, "
+            f"output_folder={self.output_folder!r})"
+        )
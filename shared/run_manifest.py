@@ -0,0 +1,132 @@
+"""
+Shared Run Manifest
+===================
+Fingerprints each Split_Key group and remembers, per output folder, which
+fingerprint every bill was last built from, together with its summary row
+for programs that list unchanged bills from it (One_Time).
+Incremental runs rebuild only the groups whose fingerprint changed.
+Used by both Billing_System and One_Time
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from shared.template_cache import file_digest
+
+
+# Bump when bill layout or summary calculations change, so every bill is rebuilt
+FINGERPRINT_VERSION = 1
+
+MANIFEST_FILE = "run_manifest.json"
+
+
+def frame_digest(df):
+    """
+    SHA-256 over a DataFrame's column names, dtypes and cell values.
+    The index is ignored, so the same rows hash the same in any run.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(col) for col in df.columns]).encode())
+    digest.update(json.dumps([str(dtype) for dtype in df.dtypes]).encode())
+    if len(df.columns):
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+        digest.update(row_hashes.tobytes())
+    return digest.hexdigest()
+
+
+def group_fingerprint(group, charge_rows, template_path, settings):
+    """
+    Fingerprint of everything one bill is built from.
+
+    Args:
+        group: annexure rows of the Split_Key group
+        charge_rows: rows of the charges file the group was billed with
+        template_path: bill template for the group, or None
+        settings: dict of config values that affect the bill (rates, month, ...)
+                  and the hashes of the images its annexure embeds
+
+    Returns:
+        str: hex digest
+    """
+    digest = hashlib.sha256()
+    digest.update(f"v{FINGERPRINT_VERSION}".encode())
+    digest.update(frame_digest(group).encode())
+    digest.update(frame_digest(charge_rows).encode())
+    digest.update((file_digest(template_path) if template_path else "no-template").encode())
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _json_value(value):
+    """numpy scalars in summary rows -> plain Python values"""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class RunManifest:
+    """
+    Fingerprint, template flag and (One_Time) summary row of every bill in
+    an output folder, stored as run_manifest.json next to the bills.
+    """
+
+    def __init__(self, output_folder):
+        self.path = os.path.join(output_folder, MANIFEST_FILE)
+        self.groups = {}
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == FINGERPRINT_VERSION:
+                    self.groups = data.get("groups", {})
+            except (OSError, ValueError) as e:
+                print(f"Warning: Ignoring unreadable run manifest {self.path}: {e}")
+
+    def unchanged(self, key, fingerprint, output_path):
+        """True when the bill at output_path was built from this fingerprint"""
+        entry = self.groups.get(key)
+        return (
+            entry is not None
+            and entry["fingerprint"] == fingerprint
+            and os.path.exists(output_path)
+        )
+
+    def summary(self, key):
+        """(summary_data, has_template) recorded for key; summary_data None when none was recorded"""
+        entry = self.groups[key]
+        return entry.get("summary"), entry["has_template"]
+
+    def record(self, key, fingerprint, summary_data, has_template):
+        """summary_data: the bill's master summary row, or None to record none (Billing_System)"""
+        entry = {"fingerprint": fingerprint, "has_template": has_template}
+        if summary_data is not None:
+            entry["summary"] = summary_data
+        self.groups[key] = entry
+
+    def retain(self, keys):
+        """Forget groups that are no longer part of the run"""
+        keys = set(keys)
+        self.groups = {key: entry for key, entry in self.groups.items() if key in keys}
+
+    def save(self):
+        """Write the manifest atomically"""
+        folder = os.path.dirname(self.path)
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": FINGERPRINT_VERSION, "groups": self.groups},
+                    f, indent=1, default=_json_value
+                )
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,212 @@
+"""
+Shared Sharding
+===============
+Splits one billing run across processes or machines that share a
+directory. Every shard runs the billing engine on the whole employee
+sheet, then builds only its own Split_Key groups:
+
+    SHARD_BY = "company"    whole companies per shard, largest first onto
+                            the least loaded shard (rows), so a company's
+                            bills stay together
+    SHARD_BY = "split_key"  each group by a stable hash of its Split_Key
+
+The assignment depends only on the billing data, so every shard works it
+out alike without talking to the others. A shard writes its bills to its
+own folder plus partial_summary.json: the master summary rows of its
+bills. The merge step reads the partial summaries of every shard and
+writes the master summary in the usual Split_Key order.
+Used by both Billing_System and One_Time (see service/shards.py)
+"""
+
+import glob
+import json
+import os
+import zlib
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from shared.checkpoint import atomic_output
+from shared.run_manifest import _json_value
+
+
+SHARD_BY = ("company", "split_key")
+
+PARTIAL_SUMMARY_FILE = "partial_summary.json"
+
+
+# ================= ASSIGNMENT =================
+def shard_numbers(annex_df, count, by="company"):
+    """
+    Shard (0 .. count - 1) of every row of annex_df.
+
+    Args:
+        annex_df: billing engine output with Company Name and Split_Key
+        count: number of shards
+        by: "company" or "split_key"
+
+    Returns:
+        int64 array, one entry per row
+    """
+    if by == "company":
+        companies = annex_df["Company Name"].astype(str)
+        sizes = companies.value_counts()
+        # Ties broken by name, so every shard computes the same plan
+        loads = [0] * count
+        assigned = {}
+        for company, rows in sorted(sizes.items(), key=lambda item: (-item[1], item[0])):
+            shard = min(range(count), key=lambda i: (loads[i], i))
+            assigned[company] = shard
+            loads[shard] += rows
+        return companies.map(assigned).to_numpy(dtype=np.int64)
+
+    if by == "split_key":
+        codes, keys = pd.factorize(annex_df["Split_Key"])
+        shards = np.array([zlib.crc32(str(key).encode("utf-8")) % count for key in keys], dtype=np.int64)
+        return shards[codes]
+
+    raise ValueError(f"SHARD_BY must be one of {', '.join(SHARD_BY)}, got {by!r}")
+
+
+def check_shard(ctx):
+    """
+    Raises:
+        ValueError: on a shard index outside 0 .. shard_count - 1 or an unknown SHARD_BY
+    """
+    if ctx.shard_count < 1:
+        raise ValueError(f"SHARD_COUNT must be at least 1, got {ctx.shard_count}")
+    if not 0 <= ctx.shard_index < ctx.shard_count:
+        raise ValueError(f"SHARD_INDEX must be between 0 and {ctx.shard_count - 1}, got {ctx.shard_index}")
+    if ctx.shard_by not in SHARD_BY:
+        raise ValueError(f"SHARD_BY must be one of {', '.join(SHARD_BY)}, got {ctx.shard_by!r}")
+
+
+def select_shard(annex_df, ctx):
+    """Rows of annex_df in ctx's shard (all of them when the run is not sharded)"""
+    if ctx.shard_count <= 1:
+        return annex_df
+    check_shard(ctx)
+    mask = shard_numbers(annex_df, ctx.shard_count, ctx.shard_by) == ctx.shard_index
+    return annex_df[mask]
+
+
+def shard_folder(root, index, count):
+    """Output folder of one shard under a sharded run's root"""
+    return os.path.join(root, f"shard-{index}-of-{count}")
+
+
+# ================= PARTIAL SUMMARIES =================
+def _encode(value):
+    """JSON form of a summary value; dates keep their type through the round trip"""
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    return _json_value(value)
+
+
+def _decode(value):
+    if "$datetime" in value:
+        return pd.Timestamp(value["$datetime"])
+    if "$date" in value:
+        return date.fromisoformat(value["$date"])
+    return value
+
+
+def partial_summary_path(output_folder):
+    return os.path.join(output_folder, PARTIAL_SUMMARY_FILE)
+
+
+def remove_partial_summary(output_folder):
+    """Drop a shard's previous partial summary before it is billed again"""
+    path = partial_summary_path(output_folder)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def write_partial_summary(program, summaries, failures, ctx):
+    """
+    Save the master summary rows of one shard to its output folder.
+
+    Args:
+        program: "Billing_System" or "One_Time"
+        summaries: {Split_Key: summary row dict} of the shard's bills
+        failures: (key, error) of the shard's failed bills
+        ctx: RunContext of the shard
+    """
+    data = {
+        "program": program,
+        "billing_month": ctx.billing_month,
+        "billing_year": ctx.billing_year,
+        "shard_index": ctx.shard_index,
+        "shard_count": ctx.shard_count,
+        "shard_by": ctx.shard_by,
+        "summaries": summaries,
+        "failures": [list(failure) for failure in failures],
+    }
+    path = partial_summary_path(ctx.output_folder)
+    with atomic_output(path) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, default=_encode)
+    print(f"Partial summary saved: {path}")
+
+
+def read_partial_summaries(root, program, ctx):
+    """
+    Partial summaries of every shard of a sharded run under root.
+
+    Raises:
+        ValueError: when there are none, shards are missing or duplicated,
+            or they disagree on program, billing period or sharding
+
+    Returns:
+        list: partial summary dicts in shard order
+    """
+    partials = []
+    for path in sorted(glob.glob(os.path.join(root, "*", PARTIAL_SUMMARY_FILE))):
+        with open(path, encoding="utf-8") as f:
+            partials.append(json.load(f, object_hook=_decode))
+    if not partials:
+        raise ValueError(f"No {PARTIAL_SUMMARY_FILE} found under {root}")
+
+    expected = {
+        "program": program,
+        "billing_month": ctx.billing_month,
+        "billing_year": ctx.billing_year,
+        "shard_count": partials[0]["shard_count"],
+        "shard_by": partials[0]["shard_by"],
+    }
+    for partial in partials:
+        for name, value in expected.items():
+            if partial[name] != value:
+                raise ValueError(
+                    f"Shard {partial['shard_index']} has {name} {partial[name]!r}, expected {value!r}"
+                )
+
+    indexes = [partial["shard_index"] for partial in partials]
+    count = expected["shard_count"]
+    missing = sorted(set(range(count)) - set(indexes))
+    if missing:
+        raise ValueError(f"Missing partial summaries of shard(s) {', '.join(map(str, missing))} of {count}")
+    if len(indexes) != len(set(indexes)):
+        raise ValueError(f"Duplicate partial summaries under {root}")
+
+    return sorted(partials, key=lambda partial: partial["shard_index"])
+
+
+def merge_summaries(partials):
+    """
+    Summary rows of every shard in Split_Key order, as an unsharded run
+    lists them.
+
+    Returns:
+        dict: {Split_Key: summary row dict}
+    """
+    merged = {}
+    for partial in partials:
+        for key, summary in partial["summaries"].items():
+            if key in merged:
+                raise ValueError(f"{key} was billed by more than one shard")
+            merged[key] = summary
+    return {key: merged[key] for key in sorted(merged)}
@@ -0,0 +1,122 @@
+"""
+Shared Cell Style Registry
+==========================
+Named cell formats for annexure sheets and master summaries.
+
+The Font, PatternFill, Border and Alignment objects are built once per
+process. A StyleRegistry registers each format with a workbook the first
+time it is used, then styles cells by writing the registered stylesheet
+indexes straight into them, so openpyxl does not hash and look up every
+style object again for every cell. That relies on openpyxl's StyleArray
+layout, so requirements.txt pins the openpyxl minor version.
+Used by both Billing_System and One_Time
+"""
+
+from openpyxl.cell import Cell
+from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+from openpyxl.styles.cell_style import StyleArray
+
+
+# ================= STYLE OBJECTS =================
+ORANGE_FILL = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")
+YELLOW_FILL = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+BOLD_FONT = Font(bold=True, size=10)
+SUMMARY_BOLD_FONT = Font(bold=True)
+THIN_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+CENTER_ALIGNMENT = Alignment(horizontal='center', vertical='center', wrap_text=True)
+SUMMARY_CENTER_ALIGNMENT = Alignment(horizontal='center', vertical='center')
+WHOLE_NUMBER = '0'
+
+
+# ================= NAMED FORMATS =================
+STYLES = {
+    # Annexure sheet
+    "annexure_header": dict(fill=ORANGE_FILL, font=BOLD_FONT, border=THIN_BORDER, alignment=CENTER_ALIGNMENT),
+    "annexure_data": dict(border=THIN_BORDER),
+    "annexure_data_number": dict(border=THIN_BORDER, number_format=WHOLE_NUMBER),
+    "annexure_total": dict(fill=YELLOW_FILL, font=BOLD_FONT, border=THIN_BORDER, alignment=CENTER_ALIGNMENT),
+    "annexure_total_number": dict(
+        fill=YELLOW_FILL, font=BOLD_FONT, border=THIN_BORDER, alignment=CENTER_ALIGNMENT, number_format=WHOLE_NUMBER
+    ),
+    # Master summary
+    "summary_header": dict(fill=ORANGE_FILL, font=SUMMARY_BOLD_FONT, alignment=SUMMARY_CENTER_ALIGNMENT),
+    "summary_number": dict(number_format=WHOLE_NUMBER),
+    "summary_total": dict(fill=YELLOW_FILL, font=SUMMARY_BOLD_FONT),
+    "summary_total_number": dict(fill=YELLOW_FILL, font=SUMMARY_BOLD_FONT, number_format=WHOLE_NUMBER),
+}
+
+# Style attribute -> position in a cell's StyleArray
+_STYLE_SLOTS = {
+    "font": 0,
+    "fill": 1,
+    "border": 2,
+    "number_format": 3,
+    "protection": 4,
+    "alignment": 5,
+}
+
+
+class StyleRegistry:
+    """
+    The STYLES formats registered with one workbook.
+
+    ws: any worksheet of the workbook (write-only ones included)
+    """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self._slots = {}
+
+    def _register(self, name):
+        """Stylesheet indexes of a named format, as [(slot, index)]"""
+        if name not in self._slots:
+            cell = Cell(self.ws, row=1, column=1)
+            cell._style = StyleArray()
+            for attr, value in STYLES[name].items():
+                setattr(cell, attr, value)
+            self._slots[name] = [(_STYLE_SLOTS[attr], cell._style[_STYLE_SLOTS[attr]]) for attr in STYLES[name]]
+        return self._slots[name]
+
+    def style_array(self, name):
+        """Complete style array of a named format, for new write-only cells"""
+        style = StyleArray()
+        for slot, index in self._register(name):
+            style[slot] = index
+        return style
+
+    def apply(self, cell, name):
+        """
+        Give a cell a named format. Like assigning the attributes one by
+        one, parts the format does not set (e.g. a date number format
+        openpyxl picked for the value) are kept.
+        """
+        if cell._style is None:
+            cell._style = StyleArray()
+        style = cell._style
+        for slot, index in self._register(name):
+            style[slot] = index
+
+    def apply_rows(self, ws, min_row, max_row, column_styles):
+        """
+        Format rows min_row..max_row column by column.
+
+        column_styles: one style name (or None to leave the cell alone) per
+                       column, starting at column 1
+        """
+        if min_row > max_row or not column_styles:
+            return
+        slots = [self._register(name) if name else () for name in column_styles]
+        for row in ws.iter_rows(min_row=min_row, max_row=max_row, max_col=len(column_styles)):
+            for cell, cell_slots in zip(row, slots):
+                if not cell_slots:
+                    continue
+                if cell._style is None:
+                    cell._style = StyleArray()
+                style = cell._style
+                for slot, index in cell_slots:
+                    style[slot] = index
@@ -0,0 +1,86 @@
+"""
+Shared Template Cache
+=====================
+Keeps each bill template parsed once per process and hands out fresh
+copies, used by both Billing_System and One_Time
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+
+from openpyxl import load_workbook
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TemplateCache:
+    """
+    Cache of parsed template workbooks keyed by file path.
+
+    A template is parsed with load_workbook the first time it is asked
+    for and kept as a pickled Workbook. Every load() returns a new,
+    independent Workbook unpickled from that blob, which is much cheaper
+    than re-parsing the xlsx.
+
+    Entries are checked against the file's mtime/size on every load;
+    when those change the content hash decides whether to re-parse.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, path):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry["signature"] == signature:
+                return entry
+
+            digest = file_digest(path)
+            if entry is not None and entry["digest"] == digest:
+                # Touched but unchanged
+                entry["signature"] = signature
+                return entry
+
+            wb = load_workbook(path)
+            entry = {
+                "signature": signature,
+                "digest": digest,
+                "blob": pickle.dumps(wb, protocol=pickle.HIGHEST_PROTOCOL),
+            }
+            self._entries[path] = entry
+            return entry
+
+    def load(self, path):
+        """Fresh, mutable Workbook for the template at path"""
+        return pickle.loads(self._entry(path)["blob"])
+
+    def digest(self, path):
+        """Content hash of the cached template at path"""
+        return self._entry(path)["digest"]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Process-wide cache shared by both generators
+template_cache = TemplateCache()
+
+
+def load_template(path):
+    """Fresh copy of the template workbook at path (parsed once per process)"""
+    return template_cache.load(path)
@@ -0,0 +1,664 @@
+"""
+Shared Template Patching
+========================
+Fills a bill template without parsing it into openpyxl. The template's
+zip parts are read once per process; every bill copies them, rewriting
+only the bill sheet's target cells and merged ranges in the sheet XML
+(new text goes to sharedStrings.xml). The Annexure sheet, built with
+openpyxl as before, is then grafted in as a new part together with its
+styles, strings and images.
+
+Everything else in the template (shapes and drawings openpyxl would
+drop, printer settings, theme, ...) is copied byte for byte.
+
+A bill's cells are planned once as ({ref: value}, [merged ranges]), so
+the openpyxl path (fill_cells) and the patch path write the same thing.
+Used by both Billing_System and One_Time (TEMPLATE_FILL = "patch")
+"""
+
+import io
+import numbers
+import os
+import posixpath
+import re
+import threading
+import zipfile
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, quoteattr
+
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string, range_boundaries, get_column_letter
+
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+WORKSHEET_REL = REL_NS + "/worksheet"
+SHARED_STRINGS_REL = REL_NS + "/sharedStrings"
+CALC_CHAIN_REL = REL_NS + "/calcChain"
+
+SHARED_STRINGS_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"
+
+CONTENT_TYPES = "[Content_Types].xml"
+
+# Elements that may sit between </sheetData> and <mergeCells>, in schema order
+_BEFORE_MERGE_CELLS = (
+    "sheetCalcPr", "sheetProtection", "protectedRanges", "scenarios", "autoFilter",
+    "sortState", "dataConsolidate", "customSheetViews",
+)
+
+# Workbook elements that follow <calcPr>, in schema order
+_AFTER_CALC_PR = (
+    "oleSize", "customWorkbookViews", "pivotCaches", "smartTagPr", "smartTagTypes",
+    "webPublishing", "fileRecoveryPr", "webPublishObjects", "extLst",
+)
+
+
+# ================= XML HELPERS =================
+def _elements(xml, tag):
+    """Every <tag .../> or <tag ...>...</tag> in xml (tag must not nest)"""
+    return re.finditer(r"<%s\b(?:[^>]*?/>|[^>]*>.*?</%s>)" % (tag, tag), xml, re.S)
+
+
+def _get_attr(tag_xml, name):
+    match = re.search(r'(?<![\w:])%s="([^"]*)"' % re.escape(name), tag_xml)
+    return match.group(1) if match else None
+
+
+def _set_attr(tag_xml, name, value):
+    """Set an attribute in the opening tag at the start of tag_xml"""
+    end = tag_xml.index(">")
+    head, rest = tag_xml[:end], tag_xml[end:]
+    pattern = r'(?<![\w:])%s="[^"]*"' % re.escape(name)
+    if re.search(pattern, head):
+        head = re.sub(pattern, lambda _: f'{name}="{value}"', head, count=1)
+    else:
+        closing = head.endswith("/")
+        head = (head[:-1] if closing else head) + f' {name}="{value}"' + ("/" if closing else "")
+    return head + rest
+
+
+def _remove_attr(tag_xml, name):
+    end = tag_xml.index(">")
+    head = re.sub(r'\s(?<![\w:])%s="[^"]*"' % re.escape(name), "", tag_xml[:end], count=1)
+    return head + tag_xml[end:]
+
+
+def _append_children(xml, tag, children, child_tag=None):
+    """
+    Append child elements to the <tag> element of xml and update its
+    count attribute. child_tag defaults to tag without its final "s".
+
+    Returns:
+        tuple: (xml, number of children before the append)
+    """
+    match = re.search(r"<%s\b[^>]*?(/>|>(.*?)</%s>)" % (tag, tag), xml, re.S)
+    body = match.group(2) or ""
+    opening = xml[match.start():match.end()].split(">", 1)[0].rstrip("/")
+    child_tag = child_tag or tag[:-1]
+    existing = sum(1 for _ in _elements(body, child_tag))
+    new_element = (
+        _set_attr(opening + ">", "count", existing + len(children))
+        + body + "".join(children) + f"</{tag}>"
+    )
+    return xml[:match.start()] + new_element + xml[match.end():], existing
+
+
+def _string_item(text):
+    space = ' xml:space="preserve"' if text != text.strip() or "\n" in text else ""
+    return f"<si><t{space}>{escape(text)}</t></si>"
+
+
+def _number_text(value):
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _cell_ref(ref):
+    """'H17' -> (row, column index)"""
+    column, row = coordinate_from_string(ref)
+    return row, column_index_from_string(column)
+
+
+# ================= RELATIONSHIPS =================
+def _rels_path(part):
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, "_rels", name + ".rels")
+
+
+def _resolve(part, target):
+    """Part name a relationship Target of part points to"""
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+
+
+def _relationships(rels_xml):
+    """[(Id, Type, Target, external)] of a .rels part"""
+    return [
+        (
+            _get_attr(rel.group(0), "Id"),
+            _get_attr(rel.group(0), "Type"),
+            _get_attr(rel.group(0), "Target"),
+            _get_attr(rel.group(0), "TargetMode") == "External",
+        )
+        for rel in _elements(rels_xml, "Relationship")
+    ]
+
+
+# ================= TEMPLATE PACKAGE =================
+class XlsxPackage:
+    """The parts of an xlsx file as {name: bytes}, in zip order"""
+
+    def __init__(self, data):
+        with zipfile.ZipFile(io.BytesIO(data) if isinstance(data, bytes) else data) as zf:
+            self.infos = zf.infolist()
+            self.parts = {info.filename: zf.read(info) for info in self.infos}
+
+    def text(self, name):
+        return self.parts[name].decode("utf-8")
+
+    def sheet_parts(self):
+        """[(sheet name, part name)] in workbook order"""
+        workbook = self.text("xl/workbook.xml")
+        rels = {rel_id: target for rel_id, _, target, _ in _relationships(self.text("xl/_rels/workbook.xml.rels"))}
+        sheets = []
+        for sheet in _elements(workbook, "sheet"):
+            rel_id = re.search(r'\b\w+:id="([^"]*)"', sheet.group(0)).group(1)
+            sheets.append((_get_attr(sheet.group(0), "name"), _resolve("xl/workbook.xml", rels[rel_id])))
+        return sheets
+
+    def active_sheet_part(self):
+        """Part name of the sheet openpyxl's Workbook.active returns"""
+        view = re.search(r"<workbookView\b[^>]*>", self.text("xl/workbook.xml"))
+        active = int(_get_attr(view.group(0), "activeTab") or 0) if view else 0
+        sheets = self.sheet_parts()
+        return sheets[active if active < len(sheets) else 0][1]
+
+    def shared_strings_part(self):
+        for _, rel_type, target, _ in _relationships(self.text("xl/_rels/workbook.xml.rels")):
+            if rel_type == SHARED_STRINGS_REL:
+                return _resolve("xl/workbook.xml", target)
+        return None
+
+
+class TemplatePackage(XlsxPackage):
+    """
+    A bill template read for patching: its parts, the bill (active)
+    sheet and the shared strings, parsed once.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.path = path
+        self.sheet_part = self.active_sheet_part()
+        self.strings_part = self.shared_strings_part()
+
+        self.strings = []
+        if self.strings_part is not None:
+            root = ElementTree.fromstring(self.parts[self.strings_part])
+            for item in root.findall(f"{{{MAIN_NS}}}si"):
+                # Plain and rich text runs; phonetic runs (rPh) are not part of the value
+                texts = [t.text or "" for t in item.findall(f"{{{MAIN_NS}}}t")]
+                texts += [t.text or "" for t in item.findall(f"{{{MAIN_NS}}}r/{{{MAIN_NS}}}t")]
+                self.strings.append("".join(texts))
+        self.string_index = {}
+        for idx, text in enumerate(self.strings):
+            self.string_index.setdefault(text, idx)
+
+    def cell_value(self, ref):
+        """Value of a bill sheet cell as openpyxl would read it (None when empty)"""
+        row, _ = _cell_ref(ref)
+        sheet = self.text(self.sheet_part)
+        for row_match in _elements(sheet, "row"):
+            if _get_attr(row_match.group(0), "r") != str(row):
+                continue
+            for cell in _elements(row_match.group(0), "c"):
+                if _get_attr(cell.group(0), "r") == ref:
+                    return self._value(cell.group(0))
+        return None
+
+    def _value(self, cell_xml):
+        kind = _get_attr(cell_xml, "t")
+        if kind == "inlineStr":
+            return "".join(re.findall(r"<t\b[^>]*>(.*?)</t>", cell_xml, re.S)) or None
+        value = re.search(r"<v>(.*?)</v>", cell_xml, re.S)
+        if value is None:
+            return None
+        if kind == "s":
+            return self.strings[int(value.group(1))]
+        if kind in ("str", "e"):
+            return value.group(1)
+        number = float(value.group(1))
+        return int(number) if number.is_integer() and "." not in value.group(1) else number
+
+    def fill(self, output_path, cells, merges, annexure_wb=None):
+        """
+        Write a filled copy of the template to output_path.
+
+        Args:
+            cells: {ref: value} for the bill sheet (str, number or None to clear)
+            merges: merged ranges the bill sheet must have
+            annexure_wb: openpyxl Workbook whose active sheet is added after
+                the template's sheets
+        """
+        writer = _PackageWriter(self)
+        writer.patch_sheet(cells, merges)
+        if annexure_wb is not None:
+            buffer = io.BytesIO()
+            annexure_wb.save(buffer)
+            writer.add_sheet(XlsxPackage(buffer.getvalue()))
+        writer.save(output_path)
+
+
+# ================= PACKAGE WRITER =================
+class _PackageWriter:
+    """One bill's copy of a TemplatePackage, changed part by part"""
+
+    def __init__(self, template):
+        self.template = template
+        self.parts = dict(template.parts)
+        self.order = [info.filename for info in template.infos]
+        self.new_strings = []
+        self.string_index = dict(template.string_index)
+        self.string_count = len(template.strings)
+        self.strings_part = template.strings_part
+
+    # ---------- generic parts ----------
+    def text(self, name):
+        return self.parts[name].decode("utf-8")
+
+    def put(self, name, text):
+        if name not in self.parts:
+            self.order.append(name)
+        self.parts[name] = text.encode("utf-8") if isinstance(text, str) else text
+
+    def remove(self, name):
+        self.parts.pop(name, None)
+        if name in self.order:
+            self.order.remove(name)
+
+    def free_name(self, part):
+        """part, renumbered when the name is taken: xl/media/image1.png -> xl/media/image3.png"""
+        if part not in self.parts:
+            return part
+        folder, name = posixpath.split(part)
+        stem, ext = posixpath.splitext(name)
+        stem = stem.rstrip("0123456789")
+        number = 1
+        while posixpath.join(folder, f"{stem}{number}{ext}") in self.parts:
+            number += 1
+        return posixpath.join(folder, f"{stem}{number}{ext}")
+
+    def add_override(self, part, content_type):
+        types = self.text(CONTENT_TYPES)
+        types = types.replace(
+            "</Types>", f'<Override PartName="/{part}" ContentType="{content_type}"/></Types>'
+        )
+        self.put(CONTENT_TYPES, types)
+
+    def add_relationship(self, rels_part, rel_type, target):
+        """Add a relationship to a .rels part and return its Id"""
+        rels = self.text(rels_part)
+        ids = {rel_id for rel_id, _, _, _ in _relationships(rels)}
+        number = len(ids) + 1
+        while f"rId{number}" in ids:
+            number += 1
+        rel_id = f"rId{number}"
+        rels = rels.replace(
+            "</Relationships>",
+            f'<Relationship Id="{rel_id}" Type="{rel_type}" Target="/{target}"/></Relationships>',
+        )
+        self.put(rels_part, rels)
+        return rel_id
+
+    # ---------- shared strings ----------
+    def shared_string(self, text):
+        """Index of text in the shared strings, appending it when new"""
+        idx = self.string_index.get(text)
+        if idx is None:
+            idx = self.string_index[text] = self.string_count
+            self.string_count += 1
+            self.new_strings.append(_string_item(text))
+        return idx
+
+    def _append_string_items(self, items):
+        """Append raw <si> items; returns the index of the first one"""
+        first = self.string_count
+        self.string_count += len(items)
+        self.new_strings.extend(items)
+        return first
+
+    def _write_shared_strings(self):
+        if not self.new_strings:
+            return
+        if self.strings_part is None:
+            self.strings_part = self.free_name("xl/sharedStrings.xml")
+            self.put(self.strings_part, f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<sst xmlns="{MAIN_NS}"></sst>')
+            self.add_override(self.strings_part, SHARED_STRINGS_TYPE)
+            self.add_relationship("xl/_rels/workbook.xml.rels", SHARED_STRINGS_REL, self.strings_part)
+        sst = self.text(self.strings_part)
+        if re.search(r"<sst\b[^>]*/>", sst):
+            sst = re.sub(r"<sst\b([^>]*?)\s*/>", r"<sst\1></sst>", sst)
+        count = self.string_count
+        opening = re.search(r"<sst\b[^>]*>", sst)
+        head = _set_attr(_set_attr(opening.group(0), "count", count), "uniqueCount", count)
+        sst = sst[:opening.start()] + head + sst[opening.end():]
+        sst = sst.replace("</sst>", "".join(self.new_strings) + "</sst>")
+        self.put(self.strings_part, sst)
+
+    # ---------- bill sheet ----------
+    def _cell_xml(self, ref, style, value):
+        s = f' s="{style}"' if style is not None else ""
+        if value is None:
+            return f'<c r="{ref}"{s}/>'
+        if isinstance(value, str):
+            return f'<c r="{ref}"{s} t="s"><v>{self.shared_string(value)}</v></c>'
+        if isinstance(value, bool):
+            return f'<c r="{ref}"{s} t="b"><v>{int(value)}</v></c>'
+        return f'<c r="{ref}"{s}><v>{_number_text(value)}</v></c>'
+
+    def patch_sheet(self, cells, merges):
+        part = self.template.sheet_part
+        sheet = self.text(part)
+
+        existing_merges = {
+            _get_attr(merge.group(0), "ref") for merge in _elements(sheet, "mergeCell")
+        }
+        new_merges = [merge for merge in dict.fromkeys(merges) if merge not in existing_merges]
+
+        # {row: {column: (ref, value, only_if_present)}}
+        updates = {}
+        for ref, value in cells.items():
+            row, col = _cell_ref(ref)
+            updates.setdefault(row, {})[col] = (ref, value, False)
+        # Merging keeps only the top-left value of a new range, as openpyxl does
+        for merge in new_merges:
+            min_col, min_row, max_col, max_row = range_boundaries(merge)
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    if (row, col) != (min_row, min_col):
+                        ref = f"{get_column_letter(col)}{row}"
+                        updates.setdefault(row, {}).setdefault(col, (ref, None, True))
+
+        sheet = self._patch_rows(sheet, updates)
+        if new_merges:
+            sheet = self._add_merges(sheet, new_merges)
+        self.put(part, sheet)
+
+    def _patch_rows(self, sheet, updates):
+        data = re.search(r"<sheetData\b[^>]*?(/>|>(.*?)</sheetData>)", sheet, re.S)
+        rows = []
+        for row_match in _elements(data.group(2) or "", "row"):
+            row_xml = row_match.group(0)
+            number = _get_attr(row_xml, "r")
+            if number is None:
+                raise ValueError(f"{self.template.path}: rows without numbers are not supported")
+            rows.append((int(number), row_xml))
+
+        present = {number for number, _ in rows}
+        for number in updates:
+            if number not in present and any(not only for _, _, only in updates[number].values()):
+                rows.append((number, f'<row r="{number}"/>'))
+        rows.sort(key=lambda item: item[0])
+
+        patched = [
+            self._patch_row(row_xml, updates[number]) if number in updates else row_xml
+            for number, row_xml in rows
+        ]
+        body = "<sheetData>" + "".join(patched) + "</sheetData>"
+        return sheet[:data.start()] + body + sheet[data.end():]
+
+    def _patch_row(self, row_xml, row_updates):
+        match = re.match(r"<row\b[^>]*?(/>|>(.*?)</row>)", row_xml, re.S)
+        opening = row_xml.split(">", 1)[0].rstrip("/") + ">"
+        cells = []
+        for cell in _elements(match.group(2) or "", "c"):
+            _, col = _cell_ref(_get_attr(cell.group(0), "r"))
+            cells.append((col, cell.group(0)))
+
+        by_col = dict(cells)
+        for col, (ref, value, only_if_present) in row_updates.items():
+            existing = by_col.get(col)
+            if existing is None and only_if_present:
+                continue
+            style = _get_attr(existing, "s") if existing is not None else None
+            by_col[col] = self._cell_xml(ref, style, value)
+
+        columns = sorted(by_col)
+        spans = _get_attr(opening, "spans")
+        if spans and columns:
+            low, high = (int(part) for part in spans.split(":"))
+            opening = _set_attr(opening, "spans", f"{min(low, columns[0])}:{max(high, columns[-1])}")
+        return opening + "".join(by_col[col] for col in columns) + "</row>"
+
+    def _add_merges(self, sheet, merges):
+        items = [f'<mergeCell ref="{merge}"/>' for merge in merges]
+        if re.search(r"<mergeCells\b", sheet):
+            sheet, _ = _append_children(sheet, "mergeCells", items)
+            return sheet
+        position = sheet.index("</sheetData>") + len("</sheetData>")
+        skip = re.compile(
+            r"<(%s)\b(?:[^>]*?/>|[^>]*>.*?</\1>)" % "|".join(_BEFORE_MERGE_CELLS), re.S
+        )
+        while True:
+            match = skip.match(sheet, position)
+            if match is None:
+                break
+            position = match.end()
+        block = f'<mergeCells count="{len(items)}">' + "".join(items) + "</mergeCells>"
+        return sheet[:position] + block + sheet[position:]
+
+    # ---------- added sheet ----------
+    def add_sheet(self, source):
+        """Copy the active sheet of another package (with its drawings and images) after the template's sheets"""
+        source_sheet = source.active_sheet_part()
+        title = dict((part, name) for name, part in source.sheet_parts())[source_sheet]
+        taken = {name.lower() for name, _ in self.template.sheet_parts()}
+        base_title, number = title, 1
+        while title.lower() in taken:
+            title = f"{base_title}{number}"
+            number += 1
+
+        names = self._copy_parts(source, source_sheet)
+        sheet_part = names[source_sheet]
+
+        xf_map = self._merge_styles(source.text("xl/styles.xml"))
+        string_map = None
+        source_strings = source.shared_strings_part()
+        if source_strings is not None:
+            items = [item.group(0) for item in _elements(source.text(source_strings), "si")]
+            first = self._append_string_items(items)
+            string_map = lambda idx: first + idx
+        self.put(sheet_part, self._remap_sheet(self.text(sheet_part), xf_map, string_map))
+
+        rel_id = self.add_relationship("xl/_rels/workbook.xml.rels", WORKSHEET_REL, sheet_part)
+        workbook = self.text("xl/workbook.xml")
+        prefix = re.search(r'xmlns:(\w+)="%s"' % re.escape(REL_NS), workbook).group(1)
+        sheet_ids = [int(_get_attr(sheet.group(0), "sheetId")) for sheet in _elements(workbook, "sheet")]
+        entry = f'<sheet name={quoteattr(title)} sheetId="{max(sheet_ids, default=0) + 1}" {prefix}:id="{rel_id}"/>'
+        self.put("xl/workbook.xml", workbook.replace("</sheets>", entry + "</sheets>"))
+
+    def _copy_parts(self, source, root):
+        """
+        Copy root and every part it reaches through relationships under
+        free names; returns {source part: new part}
+        """
+        source_types = source.text(CONTENT_TYPES)
+        names = {}
+        queue = [root]
+        while queue:
+            part = queue.pop(0)
+            if part in names:
+                continue
+            names[part] = self.free_name(part)
+            self.put(names[part], source.parts[part])
+            rels = _rels_path(part)
+            if rels in source.parts:
+                for _, _, target, external in _relationships(source.text(rels)):
+                    if not external:
+                        queue.append(_resolve(part, target))
+
+        for part, new_part in names.items():
+            self.add_override(new_part, _content_type(source_types, part))
+            rels = _rels_path(part)
+            if rels not in source.parts:
+                continue
+            rels_xml = source.text(rels)
+            for rel in _elements(source.text(rels), "Relationship"):
+                if _get_attr(rel.group(0), "TargetMode") == "External":
+                    continue
+                target = _resolve(part, _get_attr(rel.group(0), "Target"))
+                rels_xml = rels_xml.replace(rel.group(0), _set_attr(rel.group(0), "Target", "/" + names[target]))
+            self.put(_rels_path(new_part), rels_xml)
+        return names
+
+    def _merge_styles(self, source_styles):
+        """
+        Append the source workbook's cell formats (with their fonts, fills,
+        borders and number formats) to the template's styles.xml.
+
+        Returns:
+            dict: {source xf index: template xf index}
+        """
+        styles = self.text("xl/styles.xml")
+
+        def children(xml, tag):
+            block = re.search(r"<%ss\b[^>]*?(/>|>(.*?)</%ss>)" % (tag, tag), xml, re.S)
+            return [item.group(0) for item in _elements(block.group(2) or "", tag)] if block else []
+
+        offsets = {}
+        for tag in ("font", "fill", "border"):
+            styles, offsets[tag] = _append_children(styles, tag + "s", children(source_styles, tag))
+
+        # Custom number formats get ids after the template's own
+        num_fmt_map = {}
+        source_formats = children(source_styles, "numFmt")
+        if source_formats:
+            next_id = max(
+                [163] + [int(_get_attr(fmt, "numFmtId")) for fmt in children(styles, "numFmt")]
+            ) + 1
+            renumbered = []
+            for fmt in source_formats:
+                num_fmt_map[_get_attr(fmt, "numFmtId")] = str(next_id)
+                renumbered.append(_set_attr(fmt, "numFmtId", next_id))
+                next_id += 1
+            if not re.search(r"<numFmts\b", styles):
+                opening = re.search(r"<styleSheet\b[^>]*>", styles)
+                styles = styles[:opening.end()] + '<numFmts count="0"></numFmts>' + styles[opening.end():]
+            styles, _ = _append_children(styles, "numFmts", renumbered)
+
+        xfs = []
+        cell_xfs = re.search(r"<cellXfs\b[^>]*>(.*?)</cellXfs>", source_styles, re.S).group(1)
+        for xf in (item.group(0) for item in _elements(cell_xfs, "xf")):
+            num_fmt = _get_attr(xf, "numFmtId") or "0"
+            xf = _set_attr(xf, "numFmtId", num_fmt_map.get(num_fmt, num_fmt))
+            for tag in ("font", "fill", "border"):
+                xf = _set_attr(xf, tag + "Id", int(_get_attr(xf, tag + "Id") or 0) + offsets[tag])
+            xfs.append(_set_attr(xf, "xfId", 0))
+        styles, first = _append_children(styles, "cellXfs", xfs, "xf")
+
+        self.put("xl/styles.xml", styles)
+        return {str(idx): str(first + idx) for idx in range(len(xfs))}
+
+    def _remap_sheet(self, sheet, xf_map, string_map):
+        """Point a copied sheet's style and shared string indexes at the template's"""
+        def remap_cell(match):
+            cell = match.group(0)
+            style = _get_attr(cell, "s")
+            if style is not None:
+                cell = _set_attr(cell, "s", xf_map[style])
+            if _get_attr(cell, "t") == "s" and string_map is not None:
+                cell = re.sub(r"<v>(\d+)</v>", lambda v: f"<v>{string_map(int(v.group(1)))}</v>", cell)
+            return cell
+
+        def remap_tag(attr):
+            def remap(match):
+                value = _get_attr(match.group(0), attr)
+                return _set_attr(match.group(0), attr, xf_map[value]) if value is not None else match.group(0)
+            return remap
+
+        sheet = re.sub(r"<c\b(?:[^>]*?/>|[^>]*>.*?</c>)", remap_cell, sheet, flags=re.S)
+        sheet = re.sub(r"<row\b[^>]*>", remap_tag("s"), sheet)
+        sheet = re.sub(r"<col\b[^>]*>", remap_tag("style"), sheet)
+        # The template's sheet stays the selected tab
+        return re.sub(r"<sheetView\b[^>]*>", lambda m: _remove_attr(m.group(0), "tabSelected"), sheet)
+
+    # ---------- workbook ----------
+    def _prepare_workbook(self):
+        """
+        Drop calcChain.xml (its cells may no longer hold formulas) and have
+        Excel recalculate on open, since new formulas carry no cached values.
+        """
+        rels_part = "xl/_rels/workbook.xml.rels"
+        rels = self.text(rels_part)
+        for rel in _elements(rels, "Relationship"):
+            if _get_attr(rel.group(0), "Type") == CALC_CHAIN_REL:
+                part = _resolve("xl/workbook.xml", _get_attr(rel.group(0), "Target"))
+                self.remove(part)
+                rels = rels.replace(rel.group(0), "")
+                types = re.sub(r'<Override\b[^>]*PartName="/%s"[^>]*/>' % re.escape(part), "", self.text(CONTENT_TYPES))
+                self.put(CONTENT_TYPES, types)
+        self.put(rels_part, rels)
+
+        workbook = self.text("xl/workbook.xml")
+        calc = re.search(r"<calcPr\b[^>]*>", workbook)
+        if calc:
+            workbook = workbook[:calc.start()] + _set_attr(calc.group(0), "fullCalcOnLoad", 1) + workbook[calc.end():]
+        else:
+            following = re.search(r"<(%s)\b|</workbook>" % "|".join(_AFTER_CALC_PR), workbook)
+            workbook = workbook[:following.start()] + '<calcPr fullCalcOnLoad="1"/>' + workbook[following.start():]
+        self.put("xl/workbook.xml", workbook)
+
+    def save(self, output_path):
+        self._write_shared_strings()
+        self._prepare_workbook()
+        infos = {info.filename: info for info in self.template.infos}
+        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name in self.order:
+                info = infos.get(name)
+                if info is None:
+                    info = zipfile.ZipInfo(name, date_time=self.template.infos[0].date_time)
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                zf.writestr(info, self.parts[name])
+
+
+def _content_type(types_xml, part):
+    """Content type of a part from a [Content_Types].xml"""
+    override = re.search(r'<Override\b[^>]*PartName="/%s"[^>]*/>' % re.escape(part), types_xml)
+    if override:
+        return _get_attr(override.group(0), "ContentType")
+    extension = posixpath.splitext(part)[1].lstrip(".").lower()
+    for default in _elements(types_xml, "Default"):
+        if (_get_attr(default.group(0), "Extension") or "").lower() == extension:
+            return _get_attr(default.group(0), "ContentType")
+    return "application/octet-stream"
+
+
+# ================= CACHE =================
+# {path: ((mtime_ns, size), TemplatePackage)}
+_packages = {}
+_packages_lock = threading.Lock()
+
+
+def load_template_package(path):
+    """The TemplatePackage of the template at path, read once per process"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _packages_lock:
+        cached = _packages.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        package = TemplatePackage(path)
+        _packages[path] = (signature, package)
+        return package
+
+
+# ================= OPENPYXL PATH =================
+def fill_cells(ws, cells, merges):
+    """Apply a bill's (cells, merges) plan to an openpyxl worksheet"""
+    for merge in merges:
+        ws.merge_cells(merge)
+    for ref, value in cells.items():
+        ws[ref] = value
@@ -0,0 +1,150 @@
+"""
+Shared Validation Rules
+=======================
+System_Error checks as named rules, each a vectorized predicate over
+whole columns. A rule is a dict:
+
+    name:      unique name; used for per-rule counts and to override or
+               switch off a built-in rule from config.py
+    when:      boolean expression over the check columns, in pandas.eval
+               syntax (& | ~, comparisons, arithmetic); True where the row
+               is in error, e.g. "~is_differential & (doj > cycle_end)"
+    message:   System Error Reason text; {column} placeholders are filled
+               from the failing row
+    blocking:  failing rows are not billed and later rules skip them
+               (default False)
+    enabled:   False switches the rule off (default True)
+
+Reasons of all failing rules are joined with " | " in rule order.
+Used by Billing_System
+"""
+
+import string
+
+import numpy as np
+import pandas as pd
+
+
+RULE_KEYS = {"name", "when", "message", "blocking", "enabled"}
+
+
+class Rule:
+    """One validation rule (see the module docstring)"""
+
+    def __init__(self, name, when, message, blocking=False, enabled=True):
+        self.name = name
+        self.when = when
+        self.message = message
+        self.blocking = blocking
+        self.enabled = enabled
+        # Columns the message needs, e.g. ["eligible_days", "final_billable_days"]
+        self.fields = [field for _, field, _, _ in string.Formatter().parse(message) if field]
+
+    @classmethod
+    def from_dict(cls, rule):
+        """
+        Raises:
+            ValueError: on unknown keys or a missing name/when/message
+        """
+        unknown = set(rule) - RULE_KEYS
+        if unknown:
+            raise ValueError(f"Validation rule {rule.get('name')!r}: unknown keys {', '.join(sorted(unknown))}")
+        missing = {"name", "when", "message"} - set(rule)
+        if missing:
+            raise ValueError(f"Validation rule {rule.get('name')!r}: missing {', '.join(sorted(missing))}")
+        return cls(**rule)
+
+    def mask(self, columns, n):
+        """Boolean array, True where the rule fails"""
+        try:
+            result = pd.eval(self.when, local_dict=columns)
+        except Exception as e:
+            raise ValueError(f"Validation rule {self.name!r} ({self.when}): {type(e).__name__}: {e}")
+        return np.broadcast_to(np.asarray(result, dtype=bool), (n,))
+
+    def messages(self, columns, idx):
+        """Reason text for the failing rows idx"""
+        if not self.fields:
+            return np.full(len(idx), self.message, dtype=object)
+        values = [columns[field][idx] for field in self.fields]
+        return np.array(
+            [self.message.format(**dict(zip(self.fields, row))) for row in zip(*values)],
+            dtype=object,
+        )
+
+
+def merge_rules(builtin, configured):
+    """
+    Built-in rules with the configured ones applied: a configured rule
+    with a built-in's name updates that rule's keys (e.g. {"name": ...,
+    "enabled": False}), any other is added after the built-ins.
+
+    Returns:
+        list: rule dicts
+    """
+    rules = {rule["name"]: dict(rule) for rule in builtin}
+    for rule in configured or ():
+        if "name" not in rule:
+            raise ValueError(f"Validation rule without a name: {rule!r}")
+        rules.setdefault(rule["name"], {}).update(rule)
+    return list(rules.values())
+
+
+class ValidationResult:
+    """
+    Outcome of a RuleSet over n rows.
+
+    failed:   bool array, rows failing any rule
+    blocked:  bool array, rows failing a blocking rule (not billed)
+    reasons:  object array, " | "-joined messages (None where the row passed)
+    counts:   {rule name: failing rows}, in rule order
+    """
+
+    def __init__(self, failed, blocked, reasons, counts):
+        self.failed = failed
+        self.blocked = blocked
+        self.reasons = reasons
+        self.counts = counts
+
+
+class RuleSet:
+    """The enabled rules of a list of rule dicts, in order"""
+
+    def __init__(self, rules):
+        self.rules = [rule for rule in map(Rule.from_dict, rules) if rule.enabled]
+
+    def evaluate(self, columns, n, display=None):
+        """
+        Run every rule over the check columns in one pass.
+
+        Args:
+            columns: {name: array of n values}
+            n: number of rows
+            display: {name: array of n values} shown by the messages in
+                place of columns[name] (e.g. integer rows of a float column)
+
+        Returns:
+            ValidationResult
+        """
+        shown = {**columns, **(display or {})}
+        blocked = np.zeros(n, dtype=bool)
+        reasons = np.full(n, None, dtype=object)
+        counts = {}
+
+        for rule in self.rules:
+            mask = rule.mask(columns, n) & ~blocked
+            idx = np.flatnonzero(mask)
+            counts[rule.name] = len(idx)
+            if not len(idx):
+                continue
+
+            text = rule.messages(shown, idx)
+            current = reasons[idx]
+            joined = pd.notna(current)
+            reasons[idx[~joined]] = text[~joined]
+            reasons[idx[joined]] = current[joined] + " | " + text[joined]
+
+            if rule.blocking:
+                blocked |= mask
+
+        return ValidationResult(pd.notna(reasons), blocked, reasons, counts)
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture(scope="session")
+def recurring():
+    """Billing_System's modules, loaded the way the service loads them"""
+    from service.jobs import get_program
+    return get_program("recurring")
+
+
+@pytest.fixture(scope="session")
+def one_time():
+    """One_Time's modules, loaded the way the service loads them"""
+    from service.jobs import get_program
+    return get_program("one-time")
@@ -0,0 +1,62 @@
+"""
+Amount in words against num2words(lang="en_IN").title(), the text the
+bills showed before the words were rendered here.
+"""
+
+import random
+from fractions import Fraction
+
+import numpy as np
+import pytest
+from num2words import num2words
+
+from shared.amount_words import MAX_AMOUNT, number_to_words_indian, numbers_to_words_indian
+
+
+def expected(num):
+    return num2words(num, lang="en_IN").title() + " Only"
+
+
+def random_amounts(n, seed):
+    """Whole amounts spread over every digit count up to MAX_AMOUNT"""
+    r = random.Random(seed)
+    return [r.randint(0, 10 ** r.randint(1, 10) - 1) for _ in range(n)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_whole_amounts(seed):
+    for num in random_amounts(4000, seed):
+        assert number_to_words_indian(num) == expected(num)
+
+
+def test_boundaries():
+    edges = [0, 1, 19, 20, 99, 100, 101, 999, 1000, 1001, 1100, 99999, 100000, 100001,
+             100100, 9999999, 10000000, 10000001, 10000100, MAX_AMOUNT]
+    for num in edges + [-num for num in edges]:
+        assert number_to_words_indian(num) == expected(num)
+
+
+def test_numpy_and_float_amounts():
+    r = random.Random(7)
+    for num in random_amounts(500, 7):
+        assert number_to_words_indian(np.int64(num)) == expected(num)
+        assert number_to_words_indian(float(num)) == expected(float(num))
+        assert number_to_words_indian(np.float64(num)) == expected(float(num))
+        fraction = num + r.choice([0.5, 0.25, 0.07])
+        assert number_to_words_indian(fraction) == expected(fraction)
+
+
+def test_values_left_to_num2words():
+    assert number_to_words_indian(Fraction(3, 2)) == expected(Fraction(3, 2))
+    # num2words en_IN has no name above crore and raises; the bill shows the digits
+    for num in [MAX_AMOUNT + 1, 10 ** 12]:
+        with pytest.raises(OverflowError):
+            expected(num)
+        assert number_to_words_indian(num) == f"{num} Only"
+    assert number_to_words_indian("abc") == "abc Only"
+
+
+def test_batch_matches_scalar():
+    amounts = random_amounts(2000, 3) + [12.5, np.int64(11800), -5]
+    assert numbers_to_words_indian(amounts) == [number_to_words_indian(num) for num in amounts]
+    assert numbers_to_words_indian([]) == []
@@ -0,0 +1,158 @@
+"""
+The columnar billing engine against the reference row loop: both must
+return frames that compare equal including dtypes.
+"""
+
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from shared.helpers import clean_numeric
+
+
+NUMERIC_COLUMNS = [
+    "Billing", "No of Holidays", "Total Present", "Absents this Month",
+    "Adjustment of Days", "Out of Pocket Exp", "Arrears",
+]
+
+
+def employee_frame(n, seed):
+    """Random employee rows covering joiners, leavers, differential rows and both GST kinds"""
+    r = random.Random(seed)
+
+    def some_date(chance):
+        return date(2025, 12, 1) + timedelta(days=r.randint(0, 120)) if r.random() < chance else None
+
+    rows = []
+    for i in range(n):
+        rows.append({
+            "Kind Attention Person": r.choice(["Adish Talim", "Anil Agarwal", "Dinesh Maheshwari", "Nobody"]),
+            "Employee Name": f"E{i}",
+            "Employee Code": f"C{i}",
+            "Company Name": r.choice(["Jobuss", "Aradhya", "ABNJ"]),
+            "Date of Joining": some_date(0.4),
+            "LDW": some_date(0.3),
+            "Employee Type": r.choice(["Existing", "Diffrential", "New Joiner", None]),
+            "Position": r.choice(["Manager", "Executive", None]),
+            "Billing": r.choice([0, r.randint(1000, 90000)]),
+            "Billing Cycle": r.choice(["21st to 20th", "1st to 31st", "26th to 25th", None]),
+            "Workweek": r.choice(["5 day", "6 day", None]),
+            "No of Holidays": r.choice([0, 1, 2]),
+            "Total Present": r.choice([0, 10, 22, 25]),
+            "Absents this Month": r.choice([0, 1]),
+            "Adjustment of Days": r.choice([0, 1, -1]),
+            "Out of Pocket Exp": r.choice([0, 100, 12]),
+            "Arrears": r.choice([0, 500]),
+            "GST": r.choice(["CGST/SGST", "IGST", None]),
+            "Remark": r.choice([None, "x"]),
+        })
+    return clean_numeric(pd.DataFrame(rows), NUMERIC_COLUMNS)
+
+
+def assert_engines_match(engine, df, ctx):
+    annex_rows, error_rows = engine.process_billing(df.copy(), ctx, engine="rows")
+    annex_cols, error_cols = engine.process_billing(df.copy(), ctx, engine="columnar")
+    pd.testing.assert_frame_equal(annex_rows, annex_cols, check_dtype=True, check_exact=True)
+    pd.testing.assert_frame_equal(error_rows, error_cols, check_dtype=True, check_exact=True)
+    return annex_rows, error_rows
+
+
+@pytest.fixture(scope="module")
+def engine(recurring):
+    return recurring.modules["billing_engine"]
+
+
+@pytest.fixture(scope="module")
+def ctx(recurring):
+    return recurring.context()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_integer_columns(engine, ctx, seed):
+    df = employee_frame(300, seed)
+    assert all(pd.api.types.is_integer_dtype(df[col]) for col in NUMERIC_COLUMNS)
+    annex_df, _ = assert_engines_match(engine, df, ctx)
+    assert annex_df["Billing"].dtype == np.int64
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_mixed_integer_and_float_columns(engine, ctx, seed):
+    df = employee_frame(300, seed)
+    r = random.Random(seed)
+    for col in r.sample(NUMERIC_COLUMNS, 4):
+        df[col] = df[col] + r.choice([0.5, 0.25, 0.125])
+    assert_engines_match(engine, df, ctx)
+
+
+def test_object_column_with_ints_and_floats(engine, ctx):
+    df = employee_frame(300, 7)
+    df["Total Present"] = pd.Series(
+        [v + 0.5 if i % 3 == 0 else int(v) for i, v in enumerate(df["Total Present"])], dtype=object
+    )
+    df["Billing"] = pd.Series(
+        [float(v) if i % 2 else int(v) for i, v in enumerate(df["Billing"])], dtype=object
+    )
+    assert_engines_match(engine, df, ctx)
+
+
+@pytest.mark.parametrize("subset", ["Diffrential", "IGST", "CGST/SGST"])
+def test_uniform_subsets(engine, ctx, subset):
+    df = employee_frame(300, 11)
+    mask = (df["Employee Type"] == subset) | (df["GST"] == subset)
+    assert_engines_match(engine, df[mask], ctx)
+
+
+def test_reason_shows_integer_days_as_int(engine, ctx):
+    df = employee_frame(300, 3)
+    _, error_df = assert_engines_match(engine, df, ctx)
+    reasons = error_df["System Error Reason"].str.cat(sep=" | ")
+    assert "Payable Days (" in reasons
+    assert ".0)" not in reasons
+
+
+def test_empty_frame(engine, ctx):
+    df = employee_frame(10, 0).iloc[:0]
+    annex_df, error_df = engine.process_billing(df, ctx, engine="columnar")
+    assert annex_df.empty and error_df.empty
+
+
+def test_blocking_rule_on_amounts(recurring, engine):
+    rule = {
+        "name": "grand_total_cap", "when": "grand_total > 50000",
+        "message": "Grand Total {grand_total:.2f} over cap", "blocking": True,
+    }
+    ctx = recurring.context(validation_rules=[rule])
+    df = employee_frame(300, 5)
+    annex_df, error_df = engine.process_billing(df.copy(), ctx, engine="columnar")
+    unblocked, _ = engine.process_billing(df.copy(), recurring.context(), engine="columnar")
+
+    capped = error_df["System Error Reason"].str.contains("over cap")
+    assert capped.sum() == error_df.attrs["rule_counts"]["grand_total_cap"] > 0
+    assert (annex_df["Grand Total"] <= 50000).all()
+    assert len(annex_df) == len(unblocked) - capped.sum()
+
+
+def test_charge_mapper_override_reaches_both_engines(recurring, engine, ctx, monkeypatch):
+    base = recurring.modules["charge_mapper"].ChargeMapper
+
+    class FlatFeeMapper(base):
+        """Fixed 500 per employee for billings up to 40000, else 2% of billing"""
+
+        def _calculate_charge(self, row, billing):
+            if billing <= 40000:
+                return 500, "FIXED"
+            return billing * 0.02, "PROPORTIONATE"
+
+    monkeypatch.setattr(engine, "ChargeMapper", FlatFeeMapper)
+    df = employee_frame(300, 13)
+    annex_df, _ = assert_engines_match(engine, df, ctx)
+
+    mapper = FlatFeeMapper.for_context(ctx)
+    charges = mapper.get_charge_columns(df)
+    found = charges["Charge Row"] >= 0
+    assert (charges.loc[found & (df["Billing"] <= 40000), "Charge Value"] == 500).all()
+    assert charges.loc[found & (df["Billing"] <= 40000), "Integer Charge"].all()
+    assert not charges.loc[found & (df["Billing"] > 40000), "Integer Charge"].any()
@@ -0,0 +1,87 @@
+"""
+count_weekends and count_weekends_array against the original day-by-day
+loop over random date ranges.
+"""
+
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from shared.helpers import count_weekends, count_weekends_array
+
+
+WORKWEEKS = ["5 day", "five", "6 day", None]
+
+
+def loop_count_weekends(start, end, workweek):
+    """The original implementation: walk every day from start to end"""
+    sat = 0
+    sun = 0
+    cur = start
+    workweek_str = str(workweek).lower()
+
+    while cur <= end:
+        if cur.weekday() == 5:
+            if "5" in workweek_str or "five" in workweek_str:
+                sat += 1
+        if cur.weekday() == 6:
+            sun += 1
+        cur += timedelta(days=1)
+
+    return sat, sun
+
+
+def random_ranges(n, seed):
+    """(start, end, workweek) triples: long, short, single-day, empty and reversed ranges"""
+    r = random.Random(seed)
+    ranges = []
+    for _ in range(n):
+        start = date(2020, 1, 1) + timedelta(days=r.randint(0, 3000))
+        end = start + timedelta(days=r.choice([r.randint(-40, -1), 0, r.randint(1, 13), r.randint(14, 800)]))
+        ranges.append((start, end, r.choice(WORKWEEKS)))
+    return ranges
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_count_weekends_matches_loop(seed):
+    for start, end, workweek in random_ranges(2000, seed):
+        assert count_weekends(start, end, workweek) == loop_count_weekends(start, end, workweek)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_count_weekends_array_matches_loop(seed):
+    ranges = random_ranges(2000, seed)
+    starts, ends, workweeks = zip(*ranges)
+    sat, sun = count_weekends_array(starts, ends, list(workweeks))
+    expected = np.array([loop_count_weekends(*r) for r in ranges])
+    np.testing.assert_array_equal(sat, expected[:, 0])
+    np.testing.assert_array_equal(sun, expected[:, 1])
+
+
+@pytest.mark.parametrize("workweek", WORKWEEKS)
+def test_single_workweek_string(workweek):
+    ranges = random_ranges(500, 9)
+    starts, ends, _ = zip(*ranges)
+    sat, sun = count_weekends_array(starts, ends, workweek)
+    expected = np.array([loop_count_weekends(s, e, workweek) for s, e, _ in ranges])
+    np.testing.assert_array_equal(sat, expected[:, 0])
+    np.testing.assert_array_equal(sun, expected[:, 1])
+
+
+def test_empty_and_reversed_ranges():
+    saturday = date(2026, 1, 31)
+    assert count_weekends(saturday, saturday, "5 day") == (1, 0)
+    assert count_weekends(saturday, saturday - timedelta(days=1), "5 day") == (0, 0)
+    assert count_weekends(saturday + timedelta(days=30), saturday, "five") == (0, 0)
+
+    sat, sun = count_weekends_array([], [], "5 day")
+    assert len(sat) == len(sun) == 0
+
+    sat, sun = count_weekends_array(
+        [saturday, saturday + timedelta(days=10), None],
+        [saturday - timedelta(days=1), saturday, saturday],
+        "5 day",
+    )
+    assert sat.tolist() == [0, 0, 0] and sun.tolist() == [0, 0, 0]
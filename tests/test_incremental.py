@@ -0,0 +1,54 @@
+"""
+Incremental bill runs: unchanged groups keep their bills, and replacing
+an image the annexures embed rebuilds exactly the bills that show it.
+"""
+
+import re
+import shutil
+from contextlib import redirect_stdout
+from io import StringIO
+
+from service.programs import REPO_ROOT
+
+
+def run(program, ctx):
+    log = StringIO()
+    with redirect_stdout(log):
+        program.main.main(ctx=ctx)
+    return log.getvalue()
+
+
+def generated(log):
+    return re.findall(r"^Generated (\S+)", log, re.M)
+
+
+def rebuilt(log):
+    match = re.search(r"Rebuilding (\d+) of (\d+) bill", log)
+    return int(match.group(1)), int(match.group(2))
+
+
+def test_replaced_stamp_rebuilds_its_company(recurring, tmp_path):
+    assets = tmp_path / "Assets"
+    shutil.copytree(f"{REPO_ROOT}/Assets", assets)
+    output = str(tmp_path / "Bills")
+    ctx = recurring.context(
+        output_folder=output, output_dir=output, assets_folder=str(assets),
+        incremental_bills=True, run_report=False,
+    )
+
+    run(recurring, ctx)
+    count, total = rebuilt(run(recurring, ctx))
+    assert count == 0 and total > 0
+
+    # A different (still valid) stamp for ABNJ only
+    shutil.copyfile(assets / "aradhya.png", assets / "abnj.png")
+    log = run(recurring, ctx)
+    abnj = generated(log)
+    assert rebuilt(log)[0] == len(abnj) > 0
+    assert all(key.endswith("_ABNJ") for key in abnj)
+
+    # sign.png is under every other company's annexures
+    shutil.copyfile(assets / "sign2.png", assets / "sign.png")
+    others = generated(run(recurring, ctx))
+    assert not any(key.endswith("_ABNJ") for key in others)
+    assert len(others) == total - len(abnj)
@@ -0,0 +1,132 @@
+"""
+The billing service through the Flask test client, with jobs run inline
+(workers=0), and JobManager's handling of a pool that cannot take jobs.
+"""
+
+import io
+import threading
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import service.jobs
+from service.app import create_app
+from service.jobs import JobManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return JobManager(str(tmp_path), workers=0, max_queue=1)
+
+
+@pytest.fixture
+def client(manager):
+    return create_app(manager).test_client()
+
+
+def test_job_runs_and_downloads(client):
+    response = client.post("/jobs", json={"mode": "one-time", "month": 2, "year": 2026})
+    assert response.status_code == 202
+    job_id = response.get_json()["id"]
+    assert response.headers["Location"] == f"/jobs/{job_id}"
+
+    job = client.get(f"/jobs/{job_id}").get_json()
+    assert job["status"] == "done", client.get(f"/jobs/{job_id}/log").get_data(as_text=True)
+    assert "One_Time_Master_Summary.xlsx" in job["files"]
+    assert job_id in [listed["id"] for listed in client.get("/jobs").get_json()]
+
+    response = client.get(f"/jobs/{job_id}/download")
+    assert response.status_code == 200
+    assert response.mimetype == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        assert sorted(archive.namelist()) == sorted(job["files"])
+
+    response = client.get(f"/jobs/{job_id}/files/One_Time_Master_Summary.xlsx")
+    assert response.status_code == 200
+    assert response.data[:2] == b"PK"
+
+
+@pytest.mark.parametrize("payload", [
+    {"mode": "weekly", "month": 2, "year": 2026},
+    {"mode": "recurring", "month": 13, "year": 2026},
+    {"mode": "recurring", "month": "feb", "year": 2026},
+    {},
+])
+def test_bad_job_parameters(client, payload):
+    response = client.post("/jobs", json=payload)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_unknown_job_and_file(client, manager, monkeypatch):
+    assert client.get("/jobs/nosuchjob").status_code == 404
+    assert client.get("/jobs/nosuchjob/download").status_code == 404
+
+    monkeypatch.setattr(service.jobs, "run_job", lambda *args: {"files": ["a.xlsx"]})
+    job = manager.submit("recurring", 2, 2026)
+    assert client.get(f"/jobs/{job.id}/files/b.xlsx").status_code == 404
+    assert client.get(f"/jobs/{job.id}/files/../../etc/passwd").status_code == 404
+
+
+def test_full_queue_is_429(client, manager, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_job(*args):
+        started.set()
+        release.wait(10)
+        return {"files": []}
+
+    monkeypatch.setattr(service.jobs, "run_job", blocking_job)
+    running = threading.Thread(target=manager.submit, args=("recurring", 2, 2026))
+    running.start()
+    try:
+        assert started.wait(10)
+        response = client.post("/jobs", json={"mode": "recurring", "month": 2, "year": 2026})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"]
+        assert client.get("/health").get_json()["pending"] == 1
+    finally:
+        release.set()
+        running.join()
+
+    response = client.post("/jobs", json={"mode": "recurring", "month": 2, "year": 2026})
+    assert response.status_code == 202
+
+
+def test_submit_to_shut_down_pool_frees_slot(tmp_path):
+    manager = JobManager(str(tmp_path), workers=1, max_queue=2)
+    manager.shutdown()
+    for _ in range(3):
+        job = manager.submit("recurring", 2, 2026)
+        assert job.status == "failed"
+        assert job.error.startswith("RuntimeError")
+    assert manager.pending() == 0
+
+
+class BrokenExecutor:
+    def __init__(self):
+        self.shut_down = False
+
+    def submit(self, *args):
+        raise BrokenProcessPool("a worker died")
+
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+
+def test_broken_pool_is_replaced(tmp_path):
+    manager = JobManager(str(tmp_path), workers=1, max_queue=1)
+    manager.shutdown()
+    broken = BrokenExecutor()
+    manager._executor = broken
+    try:
+        job = manager.submit("recurring", 2, 2026)
+        assert job.status == "failed"
+        assert job.error.startswith("BrokenProcessPool")
+        assert broken.shut_down
+        assert manager._executor is not broken
+        assert manager.pending() == 0
+    finally:
+        manager.shutdown()
@@ -0,0 +1,77 @@
+"""
+StyleRegistry writes stylesheet indexes straight into cells, which leans
+on openpyxl internals (StyleArray slots). Every named format applied
+through the registry, normal or write-only, must read back the same as
+the format's attributes assigned one by one.
+"""
+
+import datetime
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from shared.annexure_stream import _styled_cell
+from shared.styles import STYLES, StyleRegistry
+
+
+VALUES = [1234, "text", 12.5, datetime.datetime(2024, 4, 1)]
+
+
+def cell_style(cell):
+    return (
+        repr(cell.font), repr(cell.fill), repr(cell.border), repr(cell.alignment), cell.number_format,
+    )
+
+
+def reload_styles(wb, path):
+    wb.save(path)
+    ws = load_workbook(path).active
+    return [[cell_style(cell) for cell in row] for row in ws.iter_rows()]
+
+
+def plain(path):
+    """The reference: each format's attributes assigned to each cell"""
+    wb = Workbook()
+    ws = wb.active
+    for name, attrs in STYLES.items():
+        ws.append(VALUES)
+        for cell in ws[ws.max_row]:
+            for attr, value in attrs.items():
+                setattr(cell, attr, value)
+    return reload_styles(wb, path)
+
+
+@pytest.fixture
+def reference(tmp_path):
+    return plain(tmp_path / "plain.xlsx")
+
+
+def test_apply_matches_attribute_assignment(reference, tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    styles = StyleRegistry(ws)
+    for name in STYLES:
+        ws.append(VALUES)
+        for cell in ws[ws.max_row]:
+            styles.apply(cell, name)
+    assert reload_styles(wb, tmp_path / "apply.xlsx") == reference
+
+
+def test_apply_rows_matches_attribute_assignment(reference, tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    styles = StyleRegistry(ws)
+    for row, name in enumerate(STYLES, start=1):
+        ws.append(VALUES)
+        styles.apply_rows(ws, row, row, [name] * len(VALUES))
+    assert reload_styles(wb, tmp_path / "apply_rows.xlsx") == reference
+
+
+def test_streamed_cells_match_attribute_assignment(reference, tmp_path):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet")
+    styles = StyleRegistry(ws)
+    for name in STYLES:
+        style = styles.style_array(name)
+        ws.append([_styled_cell(ws, value, style) for value in VALUES])
+    assert reload_styles(wb, tmp_path / "write_only.xlsx") == reference
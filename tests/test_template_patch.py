@@ -0,0 +1,113 @@
+"""
+Bills filled by patching the template XML (TEMPLATE_FILL = "patch")
+against bills filled through openpyxl (the reference): reopened with
+openpyxl, both must have the same sheets, cell values, merged ranges
+and cell styles.
+"""
+
+import glob
+import os
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pytest
+from openpyxl import load_workbook
+
+from service.programs import REPO_ROOT
+
+
+# openpyxl drops the templates' wmf logos when it reads a bill back
+pytestmark = pytest.mark.filterwarnings("ignore:wmf image format:UserWarning")
+
+TEMPLATES = sorted(os.path.basename(path) for path in glob.glob(os.path.join(REPO_ROOT, "Templates", "*.xlsx")))
+
+
+def build_bills(program, folder, template_fill):
+    ctx = program.context(
+        output_folder=folder,
+        output_dir=folder,
+        template_fill=template_fill,
+        incremental_bills=False,
+        run_report=False,
+    )
+    with redirect_stdout(StringIO()):
+        program.main.main(ctx=ctx)
+    return folder
+
+
+@pytest.fixture(scope="module")
+def recurring_bills(recurring, tmp_path_factory):
+    return {
+        fill: build_bills(recurring, str(tmp_path_factory.mktemp(fill)), fill)
+        for fill in ("patch", "openpyxl")
+    }
+
+
+@pytest.fixture(scope="module")
+def one_time_bills(one_time, tmp_path_factory):
+    return {
+        fill: build_bills(one_time, str(tmp_path_factory.mktemp(f"one_time_{fill}")), fill)
+        for fill in ("patch", "openpyxl")
+    }
+
+
+def cell_style(cell):
+    return (
+        repr(cell.font), repr(cell.fill), repr(cell.border), repr(cell.alignment),
+        repr(cell.protection), cell.number_format,
+    )
+
+
+def sheet_contents(ws):
+    """Values and styles of every cell that has either, plus merged ranges"""
+    cells = {}
+    for row in ws.iter_rows():
+        for cell in row:
+            if cell.value is not None or cell.has_style:
+                cells[cell.coordinate] = (cell.value, cell_style(cell))
+    return cells, sorted(str(merged) for merged in ws.merged_cells.ranges)
+
+
+def assert_same_workbook(patched_path, reference_path):
+    patched = load_workbook(patched_path)
+    reference = load_workbook(reference_path)
+    assert patched.sheetnames == reference.sheetnames
+    assert patched.active.title == reference.active.title
+    for name in reference.sheetnames:
+        patched_cells, patched_merges = sheet_contents(patched[name])
+        reference_cells, reference_merges = sheet_contents(reference[name])
+        assert patched_merges == reference_merges, name
+        assert patched_cells.keys() == reference_cells.keys(), name
+        for ref, expected in reference_cells.items():
+            assert patched_cells[ref] == expected, f"{name}!{ref}"
+
+
+def test_every_template_has_a_bill(recurring_bills):
+    assert TEMPLATES
+    for fill, folder in recurring_bills.items():
+        missing = [name for name in TEMPLATES if not os.path.exists(os.path.join(folder, name))]
+        assert not missing, fill
+
+
+@pytest.mark.parametrize("name", TEMPLATES)
+def test_patched_bill_matches_openpyxl(recurring_bills, name):
+    patched = load_workbook(os.path.join(recurring_bills["patch"], name))
+    # The bill sheet comes from the template, the annexure is added after it
+    assert len(patched.sheetnames) == 2 and patched.sheetnames[1] == "Annexure"
+    assert_same_workbook(
+        os.path.join(recurring_bills["patch"], name),
+        os.path.join(recurring_bills["openpyxl"], name),
+    )
+
+
+def test_one_time_patched_bills_match_openpyxl(one_time_bills):
+    names = sorted(
+        name for name in os.listdir(one_time_bills["openpyxl"])
+        if name.endswith("_OneTime.xlsx")
+    )
+    assert names
+    for name in names:
+        assert_same_workbook(
+            os.path.join(one_time_bills["patch"], name),
+            os.path.join(one_time_bills["openpyxl"], name),
+        )